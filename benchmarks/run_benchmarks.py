@@ -0,0 +1,443 @@
+"""
+End-to-end benchmarks of FocalAI against local stand-ins for GitHub, PapersWithCode and OpenAI.
+
+Each case is timed over `--repeat` runs after `--warmup` untimed runs and reports its p50 and p95 wall time, and the
+peak Python memory of one further run traced with tracemalloc. The results are compared with baseline.json, and the
+run fails when a case's median time or peak memory exceeds what its baseline allows. The p95 is reported but not
+gated, a single preempted run moves it too far to tell a regression from a busy machine. chat_first_token times a
+streamed chat reply only up to its first piece, with the stand-in pausing `--chat-interval-ms` between pieces, so its
+p50 is the time to first token a user waits for.
+
+    python benchmarks/run_benchmarks.py                     # Compare with the baseline, exit code 1 on a regression
+    python benchmarks/run_benchmarks.py --update-baseline   # Record the current results as the baseline
+    python benchmarks/run_benchmarks.py --latency-ms 80     # Emulate the round trip to the real services
+
+Timings depend on the machine, so the baseline should be recorded on the machine the benchmarks are compared on.
+Against a baseline recorded on another platform or Python version only the memory use is gated.
+Everything the application writes goes to a temporary FOCALAI_HOME, and Qt runs offscreen unless a platform is set.
+"""
+import io
+import os
+import sys
+import json
+import time
+import shlex
+import shutil
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import contextlib
+from typing import Callable
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(os.path.dirname(BENCHMARK_DIR), "src")
+for path in (os.path.join(SRC_DIR, "frontend_build"), SRC_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from stand_ins import StandInConfig, StandInServer
+
+BASELINE_PATH = os.path.join(BENCHMARK_DIR, "baseline.json")
+BASELINE_VERSION = 1
+TIME_SLACK_MS = 5.0 # Absolute slack on top of the tolerance, so cases of a few milliseconds do not fail on timer noise
+MEMORY_SLACK_KB = 512.0
+TIME_METRICS = (("p50_ms", TIME_SLACK_MS),)
+MEMORY_METRICS = (("peak_kb", MEMORY_SLACK_KB),)
+
+def percentile(samples: list[float], fraction: float) -> float:
+    """
+    Returns a percentile of samples by the nearest-rank method.
+
+    Args:
+        samples (list[float]): The samples, in any order.
+        fraction (float): The percentile as a fraction, e.g. 0.95.
+
+    Returns:
+        float: The sample at that rank.
+    """
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered) + 0.5) - 1))]
+
+@contextlib.contextmanager
+def quiet():
+    """Discards what the application prints while a case runs, so the report stays readable."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+def measure(operation: Callable[[], object], repeat: int, warmup: int) -> dict:
+    """
+    Times an operation and measures its peak memory.
+
+    Args:
+        operation (Callable[[], object]): The operation, run `warmup + repeat + 1` times.
+        repeat (int): The number of timed runs.
+        warmup (int): The number of untimed runs first, which fill caches and import modules.
+
+    Returns:
+        dict: 'p50_ms', 'p95_ms', 'mean_ms' and 'peak_kb', the peak memory allocated by Python during one run.
+    """
+    with quiet():
+        for _ in range(warmup):
+            operation()
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            operation()
+            samples.append((time.perf_counter() - start) * 1000)
+        tracemalloc.start()
+        try:
+            operation()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    return {"p50_ms": round(percentile(samples, 0.50), 3),
+            "p95_ms": round(percentile(samples, 0.95), 3),
+            "mean_ms": round(sum(samples) / len(samples), 3),
+            "peak_kb": round(peak / 1024, 1)}
+
+def max_rss_kb() -> float | None:
+    """Returns the peak resident memory of this process in kilobytes, None where it cannot be read."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024 if sys.platform == "darwin" else float(rss) # Bytes on macOS, kilobytes on Linux
+
+class Benchmarks:
+    """
+    Sets up the application against the stand-ins and defines the benchmark cases.
+
+    Attributes:
+        args (argparse.Namespace): The command line settings.
+        server (StandInServer): The running stand-in server.
+        cases (dict[str, Callable[[], dict]]): Each case's name and the function that measures it.
+    """
+    def __init__(self, args: argparse.Namespace, server: StandInServer) -> None:
+        from PySide6.QtWidgets import QApplication
+        from readme_view import prepare_application
+        self.args = args
+        self.server = server
+        prepare_application()
+        self.app = QApplication.instance() or QApplication([sys.argv[0]])
+        self._counter = 0
+        self.cases: dict[str, Callable[[], dict]] = {
+            "readme_fetch": self.readme_fetch,
+            "repository_parse": self.repository_parse,
+            "pwc_search": self.pwc_search,
+            "database_insert_lookup": self.database_insert_lookup,
+            "display_downloads": self.display_downloads,
+            "update_content_cold": self.update_content_cold,
+            "update_content_cached": self.update_content_cached,
+            "chat_stream": self.chat_stream,
+            "chat_first_token": self.chat_first_token,
+            "subprocess_logging": self.subprocess_logging,
+        }
+        self._main_window = None
+        self._model_page = None
+
+    def _unique_url(self, prefix: str) -> str:
+        """Returns the URL of a repository not requested before, so its README misses every cache."""
+        self._counter += 1
+        return f"https://github.com/bench/{prefix}-{self._counter}"
+
+    def _measure(self, operation: Callable[[], object], repeat: int | None = None) -> dict:
+        return measure(operation, repeat or self.args.repeat, self.args.warmup)
+
+    def readme_fetch(self) -> dict:
+        from api_caller import APIManager
+        return self._measure(lambda: APIManager.get_readme_contents(self._unique_url("fetch")))
+
+    def repository_parse(self) -> dict:
+        from repo import Repository
+        with quiet():
+            repository = Repository(self._unique_url("parse"), "A speech recognition model")
+
+        def parse() -> None:
+            repository.install_commands = repository.parse_readme_contents()
+            repository.tables = repository.get_tables()
+            repository.model_type = repository.get_model_type()
+        return self._measure(parse)
+
+    def pwc_search(self) -> dict:
+        from api_caller import APIManager
+        from directories import PWC_KEY_TXT, ensure_parent_dir
+        with open(ensure_parent_dir(PWC_KEY_TXT), 'w') as file:
+            file.write("bench-key")
+        manager = APIManager()
+        manager.record_validation("pwc", "bench-key", True)
+        return self._measure(lambda: manager.get_repo_list("whisper"))
+
+    def database_insert_lookup(self) -> dict:
+        from conda_env import CondaEnvironment
+        from database import DatabaseManager
+        with quiet():
+            environments = [CondaEnvironment(python_version="3.12.1", description="A speech recognition model",
+                                             repository_url=self._unique_url("db")) for _ in range(self.args.environments)]
+        db_dir = tempfile.mkdtemp(prefix="db-", dir=os.environ["FOCALAI_HOME"])
+
+        def insert_and_look_up() -> None:
+            self._counter += 1
+            db = DatabaseManager(os.path.join(db_dir, f"bench-{self._counter}.db"))
+            for environment in environments:
+                db.insert_environment(environment)
+            for environment in environments:
+                db.get_environment_by_name(environment.env_name)
+            db.close()
+        return self._measure(insert_and_look_up)
+
+    def _window(self):
+        """Creates the main window on first use, after the installed models manifest was written."""
+        if self._main_window is None:
+            from styler import Styler
+            from manifest import MANIFEST_VERSION
+            from directories import INSTALLED_MANIFEST, ensure_parent_dir
+            from FocalAI import MainWindow
+            models = [{"url": f"https://github.com/owner{i % 17}/installed-{i}", "owner": f"owner{i % 17}",
+                       "description": f"Installed model {i} for speech recognition", "model_type": "ASR"}
+                      for i in range(self.args.installed)]
+            with open(ensure_parent_dir(INSTALLED_MANIFEST), 'w', encoding='utf-8') as file:
+                json.dump({"version": MANIFEST_VERSION, "models": models}, file)
+            with quiet():
+                self._main_window = MainWindow(Styler())
+        return self._main_window
+
+    def display_downloads(self) -> dict:
+        window = self._window()
+
+        def display() -> None:
+            window.display_downloads()
+            self.app.processEvents()
+        return self._measure(display)
+
+    def _page(self):
+        if self._model_page is None:
+            from model_page import ModelPage
+            window = self._window()
+            with quiet():
+                self._model_page = ModelPage(window.styler, window)
+            self._model_page.resize(1200, 900)
+            self._model_page.show()
+        return self._model_page
+
+    def _show(self, url: str, timeout: float = 30.0) -> None:
+        """
+        Shows a repository on the model page and waits until its README is completely rendered and displayed.
+        A render is complete once its page is in the render cache, which happens after its last section is emitted.
+        """
+        from repo_record import RepoRecord
+        from render_cache import readme_digest
+        page = self._page()
+        page.update_content(RepoRecord(url, "bench", "A speech recognition model"))
+        key = (readme_digest(page.markdown_source), page.styler.theme)
+        deadline = time.monotonic() + timeout
+        while page.render_cache.get_by_key(key) is None:
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"the README of {url} was not rendered within {timeout:.0f} seconds")
+            self.app.processEvents()
+            time.sleep(0.001)
+        self.app.processEvents() # Delivers the sections emitted before the page was cached
+
+    def update_content_cold(self) -> dict:
+        return self._measure(lambda: self._show(self._unique_url("page")))
+
+    def update_content_cached(self) -> dict:
+        url = self._unique_url("page")
+        return self._measure(lambda: self._show(url))
+
+    def _chat_caller(self):
+        """Returns a GPTCaller with a key for the chat stand-in, caching its responses in a directory of its own."""
+        from api_caller import APIManager
+        from GPT_caller import GPTCaller
+        from response_cache import ResponseCache
+        from directories import OPENAI_KEY_TXT, ensure_parent_dir
+        with open(ensure_parent_dir(OPENAI_KEY_TXT), 'w') as file:
+            file.write("bench-key")
+        manager = APIManager()
+        manager.record_validation("openai", "bench-key", True) # Nothing is sent to the real API to validate it
+        cache_dir = tempfile.mkdtemp(prefix="responses-", dir=os.environ["FOCALAI_HOME"])
+        with quiet():
+            return GPTCaller(self._unique_url("chat"), manager, readme="# Model\n\nUsage notes.",
+                             response_cache=ResponseCache(cache_dir=cache_dir))
+
+    def chat_stream(self) -> dict:
+        caller = self._chat_caller()
+
+        def stream() -> None:
+            pieces: list[str] = []
+            text, ok = caller._request_chat_response("bench-key", caller.readme(), "Write sample code.",
+                                                      on_delta=pieces.append)
+            if not ok:
+                raise RuntimeError(f"the chat stand-in failed: {text}")
+        return self._measure(stream)
+
+    def chat_first_token(self) -> dict:
+        """Times a streamed chat request up to its first delta, while the stand-in spaces the pieces like a model."""
+        caller = self._chat_caller()
+
+        class FirstToken(Exception):
+            pass
+
+        def on_delta(piece: str) -> None:
+            raise FirstToken # Stops the stream right away, is_cancelled is only polled once the next piece arrives
+
+        def first_token() -> None:
+            try:
+                text, ok = caller._request_chat_response("bench-key", caller.readme(), "Write sample code.",
+                                                          on_delta=on_delta)
+            except FirstToken:
+                return
+            raise RuntimeError(f"the chat stand-in sent no delta: {text}")
+        config = self.server.config
+        interval, config.chat_interval = config.chat_interval, self.args.chat_interval_ms / 1000
+        try:
+            return self._measure(first_token)
+        finally:
+            config.chat_interval = interval
+
+    def subprocess_logging(self) -> dict:
+        from conda_env import run_subprocess_with_logging
+        lines = self.args.lines
+        script = f"import sys\nfor i in range({lines}): sys.stdout.write(f'step {{i}} loss 0.{{i % 997:03d}}\\n')"
+        command = f"{shlex.quote(sys.executable)} -c {shlex.quote(script)}"
+
+        def run() -> None:
+            count = sum(1 for _ in run_subprocess_with_logging(command, "Benchmark command failed", "bench"))
+            if count != lines:
+                raise RuntimeError(f"expected {lines} lines of output, got {count}")
+        result = self._measure(run, repeat=max(3, self.args.repeat // 4))
+        result["lines_per_s"] = round(lines / (result["p50_ms"] / 1000))
+        return result
+
+    def run(self, selected: list[str]) -> dict[str, dict]:
+        """
+        Runs the selected cases in order, printing each result as it completes.
+
+        Args:
+            selected (list[str]): The names of the cases to run.
+
+        Returns:
+            dict[str, dict]: The results keyed by case name.
+        """
+        results = {}
+        print(f"{'case':<24}{'p50 ms':>10}{'p95 ms':>10}{'peak KB':>11}")
+        for name in selected:
+            results[name] = result = self.cases[name]()
+            extra = f"  {result['lines_per_s']} lines/s" if "lines_per_s" in result else ""
+            print(f"{name:<24}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}{result['peak_kb']:>11.1f}{extra}")
+        return results
+
+def settings(args: argparse.Namespace) -> dict:
+    """Returns the settings that change what is measured, results are only compared when these match."""
+    return {"latency_ms": args.latency_ms, "readme_kb": args.readme_kb, "repositories": args.repositories,
+            "chat_chunks": args.chat_chunks, "chat_interval_ms": args.chat_interval_ms, "installed": args.installed,
+            "environments": args.environments, "lines": args.lines}
+
+def compare(results: dict[str, dict], baseline: dict[str, dict], tolerance: float, timings: bool = True) -> list[str]:
+    """
+    Compares the median times and peak memory of results with a baseline.
+
+    Args:
+        results (dict[str, dict]): The current results keyed by case name.
+        baseline (dict[str, dict]): The baseline results keyed by case name.
+        tolerance (float): The allowed relative increase, e.g. 0.5 for 50%.
+        timings (bool): Whether times are compared, memory use always is. Defaults to True.
+
+    Returns:
+        list[str]: A description of each regression, empty if there are none.
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name}: no baseline, run with --update-baseline to record one")
+            continue
+        for metric, slack in (TIME_METRICS if timings else ()) + MEMORY_METRICS:
+            if metric not in base:
+                continue
+            limit = base[metric] * (1 + tolerance) + slack
+            if result[metric] > limit:
+                regressions.append(f"{name} {metric}: {result[metric]:.2f} exceeds {limit:.2f} "
+                                   f"(baseline {base[metric]:.2f})")
+    return regressions
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("cases", nargs="*", help="The cases to run, all by default")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed runs per case")
+    parser.add_argument("--warmup", type=int, default=2, help="Untimed runs before timing")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="Allowed relative slowdown, 0.5 allows 50%%")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="The baseline file")
+    parser.add_argument("--update-baseline", action="store_true", help="Record the results as the baseline")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Delay the stand-ins add before every reply")
+    parser.add_argument("--readme-kb", type=float, default=20.0, help="Size of the READMEs the stand-in serves")
+    parser.add_argument("--repositories", type=int, default=120, help="Repositories every search matches")
+    parser.add_argument("--chat-chunks", type=int, default=64, help="Pieces a streamed chat reply is sent in")
+    parser.add_argument("--chat-interval-ms", type=float, default=20.0, help="Delay between pieces in chat_first_token")
+    parser.add_argument("--installed", type=int, default=2000, help="Installed models listed by display_downloads")
+    parser.add_argument("--environments", type=int, default=50, help="Environments inserted and looked up")
+    parser.add_argument("--lines", type=int, default=20000, help="Lines of output the logged subprocess writes")
+    parser.add_argument("--keep-home", action="store_true", help="Keep the temporary FOCALAI_HOME for inspection")
+    args = parser.parse_args(argv)
+
+    home = tempfile.mkdtemp(prefix="focalai-bench-")
+    os.environ["FOCALAI_HOME"] = home
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    os.environ.setdefault("FOCALAI_README_VIEW", "text") # QtWebEngine paints asynchronously in another process
+    server = StandInServer(StandInConfig(latency=args.latency_ms / 1000, readme_size=int(args.readme_kb * 1024),
+                                         repository_count=args.repositories, chat_chunks=args.chat_chunks)).start()
+    os.environ.update(server.environment())
+    try:
+        benchmarks = Benchmarks(args, server)
+        unknown = [name for name in args.cases if name not in benchmarks.cases]
+        if unknown:
+            parser.error(f"unknown cases {', '.join(unknown)}, choose from {', '.join(benchmarks.cases)}")
+        results = benchmarks.run(args.cases or list(benchmarks.cases))
+    finally:
+        server.stop()
+        if args.keep_home:
+            print(f"FOCALAI_HOME kept at {home}")
+        else:
+            shutil.rmtree(home, ignore_errors=True)
+    rss = max_rss_kb()
+    if rss is not None:
+        print(f"peak resident memory: {rss / 1024:.1f} MB")
+
+    if args.update_baseline:
+        baseline = {"version": BASELINE_VERSION, "machine": f"{platform.system()} {platform.machine()}",
+                    "python": platform.python_version(), "settings": settings(args), "results": {}}
+        if os.path.isfile(args.baseline):
+            with open(args.baseline, 'r', encoding='utf-8') as file:
+                previous = json.load(file)
+            if previous.get("settings") == settings(args):
+                baseline["results"] = previous.get("results", {}) # Cases that were not run keep their baseline
+        baseline["results"].update(results)
+        with open(args.baseline, 'w', encoding='utf-8') as file:
+            json.dump(baseline, file, indent=2, sort_keys=True)
+            file.write("\n")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.isfile(args.baseline):
+        print(f"No baseline at {args.baseline}, run with --update-baseline to record one")
+        return 0
+    with open(args.baseline, 'r', encoding='utf-8') as file:
+        baseline = json.load(file)
+    if baseline.get("settings") != settings(args):
+        print("The baseline was recorded with different settings, the results were not compared")
+        return 0
+    same_platform = (baseline.get("machine") == f"{platform.system()} {platform.machine()}"
+                     and baseline.get("python") == platform.python_version())
+    if not same_platform:
+        print(f"The baseline was recorded on {baseline.get('machine')} with Python {baseline.get('python')}, "
+              f"only memory use is compared")
+    regressions = compare(results, baseline.get("results", {}), args.tolerance, timings=same_platform)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if not regressions:
+        print(f"No regressions against the baseline (tolerance {args.tolerance:.0%})")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
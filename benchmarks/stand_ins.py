@@ -0,0 +1,232 @@
+"""
+Local HTTP stand-ins for the services FocalAI talks to, so benchmarks measure the application instead of the network.
+
+One threaded server answers the paths of all three services:
+    GET  /repos/{owner}/{name}/readme     GitHub's README metadata, whose download_url points at /raw/...
+    GET  /raw/{owner}/{name}/README.md    The README, generated from the repository name
+    GET  /api/v1/repositories/            The PapersWithCode repository list, honouring name, page and items_per_page
+    POST /v1/chat/completions             The OpenAI chat endpoint, as one JSON reply or as server-sent events
+Point the application at it with FOCALAI_GITHUB_API, FOCALAI_PWC_API and FOCALAI_CHAT_ENDPOINT.
+"""
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+_SECTION = """## {title}
+
+{name} is evaluated on several benchmarks. The numbers below were measured with the released checkpoints and the
+default configuration, see the paper for the full protocol and the ablations of every component.
+
+| Model | Parameters | Dataset | Score |
+|-------|------------|---------|-------|
+| {name}-small | 39M | LibriSpeech | 5.{index} |
+| {name}-large | 1550M | Common Voice | 3.{index} |
+
+```python
+import {module}
+model = {module}.load_model("base")
+result = model.transcribe("audio_{index}.mp3")
+print(result["text"])
+```
+
+"""
+
+def make_readme(owner: str, name: str, size: int) -> str:
+    """
+    Generates a README of about `size` characters with the headings, tables and code blocks real READMEs have.
+    The content depends on the repository, so each repository's README renders and caches separately.
+
+    Args:
+        owner (str): The repository owner.
+        name (str): The repository name.
+        size (int): The approximate length in characters.
+
+    Returns:
+        str: The README markdown.
+    """
+    module = name.replace('-', '_').lower()
+    parts = [f"# {name}\n\n{name} by {owner} is a speech recognition model for transcription and translation.\n\n"
+             f"## Installation\n\n```bash\npip install {module}\npip install -r requirements.txt\n```\n\n"]
+    length = len(parts[0])
+    index = 0
+    while length < size:
+        part = _SECTION.format(title=f"Results {index}", name=name, module=module, index=index)
+        parts.append(part)
+        length += len(part)
+        index += 1
+    return "".join(parts)
+
+class StandInConfig:
+    """
+    The behaviour of the stand-in server.
+
+    Attributes:
+        latency (float): Seconds added before every reply, the round trip to the real service.
+        readme_size (int): The approximate length of generated READMEs in characters.
+        repository_count (int): The number of repositories every PapersWithCode search matches.
+        chat_chunks (int): The number of pieces a chat reply is streamed in.
+        chat_chunk_size (int): The length of each piece of a chat reply in characters.
+        chat_interval (float): Seconds between streamed pieces, the model's time per token.
+        chat_word (str): The word each piece of a chat reply starts with, e.g. non-ASCII text to check decoding.
+    """
+    def __init__(self, latency: float = 0.0, readme_size: int = 20000, repository_count: int = 120,
+                 chat_chunks: int = 64, chat_chunk_size: int = 16, chat_interval: float = 0.0,
+                 chat_word: str = "piece") -> None:
+        self.latency = latency
+        self.readme_size = readme_size
+        self.repository_count = repository_count
+        self.chat_chunks = chat_chunks
+        self.chat_chunk_size = chat_chunk_size
+        self.chat_interval = chat_interval
+        self.chat_word = chat_word
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # Keeps connections alive, as the real services do
+    server: "StandInServer"
+
+    def log_message(self, format, *args) -> None:
+        pass # Request lines would drown the benchmark report
+
+    def _send(self, status: int, body: bytes, content_type: str = "application/json") -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, data, status: int = 200) -> None:
+        self._send(status, json.dumps(data).encode('utf-8'))
+
+    def do_GET(self) -> None:
+        config = self.server.config
+        time.sleep(config.latency)
+        url = urlsplit(self.path)
+        parts = [part for part in url.path.split('/') if part]
+        if len(parts) == 4 and parts[0] == "repos" and parts[3] == "readme":
+            owner, name = parts[1], parts[2]
+            self._send_json({"name": "README.md", "path": "README.md",
+                             "download_url": f"{self.server.url}/raw/{owner}/{name}/README.md"})
+        elif len(parts) == 4 and parts[0] == "raw":
+            body = make_readme(parts[1], parts[2], config.readme_size).encode('utf-8')
+            self._send(200, body, "text/plain; charset=utf-8")
+        elif parts[:3] == ["api", "v1", "repositories"]:
+            self._send_json(self._repository_page(parse_qs(url.query)))
+        else:
+            self._send_json({"message": "Not Found"}, status=404)
+
+    def _repository_page(self, query: dict[str, list[str]]) -> dict:
+        config = self.server.config
+        name = query.get("name", ["model"])[0]
+        page = int(query.get("page", ["1"])[0])
+        per_page = int(query.get("items_per_page", ["50"])[0])
+        start = (page - 1) * per_page
+        indices = range(start, min(start + per_page, config.repository_count))
+        results = [{"url": f"https://github.com/owner{i % 17}/{name}-{i}", "owner": f"owner{i % 17}",
+                    "name": f"{name}-{i}", "description": f"{name} variant {i} for speech recognition",
+                    "stars": 1000 - i, "framework": "pytorch", "is_official": i % 3 == 0} for i in indices]
+        has_next = start + per_page < config.repository_count
+        base = f"{self.server.url}/api/v1/repositories/?name={name}&items_per_page={per_page}"
+        return {"count": config.repository_count,
+                "next": f"{base}&page={page + 1}" if has_next else None,
+                "previous": f"{base}&page={page - 1}" if page > 1 else None,
+                "results": results}
+
+    def do_POST(self) -> None:
+        config = self.server.config
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            request = {}
+        time.sleep(config.latency)
+        if urlsplit(self.path).path.rstrip('/') != "/v1/chat/completions":
+            self._send_json({"error": {"message": "Not Found"}}, status=404)
+            return
+        pieces = [f"{config.chat_word} {i:04d} ".ljust(config.chat_chunk_size, '.') for i in range(config.chat_chunks)]
+        if not request.get("stream"):
+            self._send_json({"choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(pieces)}}]})
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close") # The stream has no length, so the end of the connection ends it
+        self.end_headers()
+        self.close_connection = True
+        try:
+            for piece in pieces:
+                event = {"choices": [{"index": 0, "delta": {"content": piece}}]}
+                self.wfile.write(f"data: {json.dumps(event, ensure_ascii=False)}\n\n".encode('utf-8'))
+                self.wfile.flush()
+                if config.chat_interval:
+                    time.sleep(config.chat_interval)
+            self.wfile.write(b"data: [DONE]\n\n")
+        except (BrokenPipeError, ConnectionResetError):
+            with self.server.lock:
+                self.server.cancelled_streams += 1 # The client cancelled the stream
+
+class StandInServer(ThreadingHTTPServer):
+    """
+    The stand-in server, run on a background thread.
+
+    Attributes:
+        config (StandInConfig): The server's behaviour, which may be changed while it runs.
+        url (str): The base URL of the server.
+        cancelled_streams (int): The number of chat streams the client closed before they ended.
+    """
+    daemon_threads = True
+
+    def __init__(self, config: StandInConfig | None = None, host: str = "127.0.0.1", port: int = 0) -> None:
+        """
+        Initializes the server and binds it to a port.
+
+        Args:
+            config (StandInConfig | None): The server's behaviour. Defaults to StandInConfig().
+            host (str): The interface to listen on. Defaults to the loopback interface.
+            port (int): The port to listen on. Defaults to any free port.
+        """
+        super().__init__((host, port), _Handler)
+        self.config = config or StandInConfig()
+        self.url = f"http://{host}:{self.server_address[1]}"
+        self.cancelled_streams = 0
+        self.lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    def environment(self) -> dict[str, str]:
+        """
+        Returns the environment variables that point the application at this server.
+
+        Returns:
+            dict[str, str]: The variables and their values.
+        """
+        return {"FOCALAI_GITHUB_API": self.url,
+                "FOCALAI_PWC_API": self.url,
+                "FOCALAI_CHAT_ENDPOINT": f"{self.url}/v1/chat/completions"}
+
+    def start(self) -> "StandInServer":
+        """Starts serving on a daemon thread."""
+        self._thread = threading.Thread(target=self.serve_forever, name="stand-in-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stops serving and closes the socket."""
+        self.shutdown()
+        self.server_close()
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Runs the GitHub, PapersWithCode and OpenAI stand-ins until interrupted.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Delay added before every reply")
+    parser.add_argument("--readme-kb", type=float, default=20.0, help="Size of the generated READMEs")
+    parser.add_argument("--repositories", type=int, default=120, help="Repositories every search matches")
+    args = parser.parse_args()
+    server = StandInServer(StandInConfig(latency=args.latency_ms / 1000, readme_size=int(args.readme_kb * 1024),
+                                         repository_count=args.repositories), port=args.port)
+    for variable, value in server.environment().items():
+        print(f"export {variable}={value}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
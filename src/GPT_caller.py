@@ -1,5 +1,6 @@
-import requests
 import os
+import json
+from typing import Callable, Iterable, Iterator
 from api_caller import APIManager
 import sys
 from PySide6.QtWidgets import (QWidget, QInputDialog, QMessageBox)
@@ -8,30 +9,164 @@ module_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
 if module_dir not in sys.path:
     sys.path.append(module_dir)
 
+from log_store import LogStore
+from repo import Repository
+from response_cache import ResponseCache, get_response_cache, response_key, hash_text
+from manifest import get_manifest
+from readme_chunker import ReadmeSelection, select_context
+
+CHAT_ENDPOINT = "https://api.openai.com/v1/chat/completions"  # Correct endpoint for chat models
+CHAT_ENDPOINT_ENV = "FOCALAI_CHAT_ENDPOINT" # Overrides the endpoint, e.g. to point at a local stand-in server
+CHAT_MODEL = "gpt-4-turbo"  # Assuming this is the correct model identifier
+README_TOKEN_BUDGET = 3000 # Tokens of README sent with a question, the most relevant sections are selected to fit
+REQUEST_TIMEOUT = (10, 120) # Seconds to connect, and seconds to wait between pieces of the response
+STREAM_READ_BYTES = 8192 # The most read from a streamed response at once, a read returns whatever already arrived
+SYSTEM_PROMPT = "You are a helpful assistant that helps look at AI model documentation."
+
+# The questions asked about a README, keyed by their field in a full analysis, with the title each answer is shown under
+QUESTIONS = {
+    "sample_code": "With this given documentation, give me just the sample code needed to run this",
+    "parameters": "With this given documentation, what are the parameters needed to run this?",
+    "datasets": "With this given documentation, what are the datasets this model uses?",
+    "more_information": "With this given documentation, where can i find more information on this model?",
+    "report": "With this given documentation, give me a basic report about the model",
+}
+ANALYSIS_TITLES = {
+    "sample_code": "Sample Code",
+    "parameters": "Parameters",
+    "datasets": "Datasets",
+    "more_information": "More Information",
+    "report": "Report",
+}
+ANALYSIS_REQUEST = (
+    "With this given documentation, answer each of the following questions. Reply with only a JSON object that has "
+    "exactly these keys, each holding the answer to its question as a string:\n"
+    + "\n".join(f'"{field}": {question}' for field, question in QUESTIONS.items())
+)
+
+def parse_analysis(response: str) -> dict[str, str] | None:
+    """
+    Reads the answers of a full analysis from the model's JSON reply.
+
+    Args:
+        response (str): The reply, a JSON object possibly wrapped in a markdown code fence.
+
+    Returns:
+        dict[str, str] | None: The answer to each question keyed by its field, or None if the reply is not a JSON
+        object holding every field.
+    """
+    text = response.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[-1].rsplit("```", 1)[0]
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return None
+    if not isinstance(data, dict) or any(field not in data for field in QUESTIONS):
+        return None
+    return {field: data[field] if isinstance(data[field], str) else json.dumps(data[field], indent=2)
+            for field in QUESTIONS}
+
+
+def iter_stream_lines(raw) -> Iterator[str]:
+    """
+    Reads the lines of a streamed response as they arrive. Each read returns whatever data is available instead of
+    waiting for a buffer to fill, so a line is passed on as soon as it is complete. Lines are decoded as UTF-8, which
+    server-sent events always use.
+
+    Args:
+        raw (urllib3.response.HTTPResponse): The raw body of a response requested with `stream=True`.
+
+    Yields:
+        str: Each line, without its terminator.
+    """
+    pending = b""
+    while True:
+        data = raw.read1(STREAM_READ_BYTES)
+        if not data:
+            break
+        *lines, pending = (pending + data).split(b"\n")
+        for line in lines:
+            yield line.rstrip(b"\r").decode('utf-8', errors='replace')
+    if pending:
+        yield pending.rstrip(b"\r").decode('utf-8', errors='replace')
+
+def iter_sse_data(lines: Iterable[str]) -> Iterator[str]:
+    """
+    Parses server-sent events, yielding the data of each event.
+
+    Args:
+        lines (Iterable[str]): The lines of the event stream, without their terminators.
+
+    Yields:
+        str: The data of an event, with the lines of multi-line data joined by newlines.
+    """
+    data: list[str] = []
+    for line in lines:
+        if not line:
+            if data:
+                yield "\n".join(data)
+                data = []
+            continue
+        if line.startswith(':'):
+            continue # Comment, sent by servers to keep the connection alive
+        field, _, value = line.partition(':')
+        if field == "data":
+            data.append(value[1:] if value.startswith(' ') else value)
+    if data:
+        yield "\n".join(data)
 
 class GPTCaller: 
     """
     Interacts with the PapersWithCode API.
 
+    Responses are cached by (model, prompt, README hash) in the shared ResponseCache, so asking the same question about
+    the same README again is answered without an API call, and identical requests in flight share one call. The README
+    is taken from the cached Repository when one is given, and downloaded at most once otherwise.
+
+    Every request method takes optional `on_delta` and `is_cancelled` callbacks, which stream the response as it is
+    generated and stop the stream, as described in `cached_chat_response`.
+
+    `full_analysis` sends the README once and asks for a JSON object answering all five questions. The answers are
+    stored with the model's entry in the installed models manifest, and the five question methods answer from them
+    locally for as long as the README is unchanged.
+
+    Only the README sections most relevant to a question are sent with it, packed into README_TOKEN_BUDGET tokens by
+    `readme_chunker.select_context`. `tokens_saved` adds up the README tokens left out of the requests sent.
+
     Attributes:
         filename: str = 'key.txt'
         api_key: str = None
         doc_url : str
         log_report : str
         check: bool = False
+        response_cache: ResponseCache
+        tokens_saved: int
     """
     api_key = None
     doc_url : str
     log_report : str
     check: bool = False
     cancel: bool = False
-    def __init__(self, doc_url, caller) -> None:
+    def __init__(self, doc_url, caller, readme: str | None = None, response_cache: ResponseCache | None = None) -> None:
         """
         Initialize the API caller with the chatGPT client.
+
+        Args:
+            doc_url (str): The URL of the model's repository.
+            caller (APIManager): The API manager used for keys and README downloads.
+            readme (str | None): The README content, e.g. the cached `Repository.readme_content`. Downloaded on first
+                use when not given.
+            response_cache (ResponseCache | None): The cache responses are stored in. Defaults to the shared cache.
         """
         self.doc_url = doc_url
         self.log_report = None
         self.caller = caller
+        self._readme = readme
+        self._analysis: dict | None = None
+        self._contexts: dict[tuple[str, str], ReadmeSelection] = {}
+        self.tokens_saved = 0
+        self.response_cache = response_cache or get_response_cache()
         self.api_key = caller.get_and_save_key("openai")
         if isinstance(self.api_key, str):
             self.check = True 
@@ -50,110 +185,359 @@ class GPTCaller:
         Returns:
         None. Prints the response from ChatGPT or an error message.
         """
+        return self._request_chat_response(api_key, documentation, request)[0]
+
+    def _request_chat_response(self, api_key: str, documentation: str, request: str,
+                               on_delta: Callable[[str], None] | None = None,
+                               is_cancelled: Callable[[], bool] | None = None, json_mode: bool = False) -> tuple[str, bool]:
+        """
+        Sends a chat request to the API. When `on_delta` is given the response is streamed as server-sent events and
+        each piece of text is passed to `on_delta` as soon as it arrives. With `json_mode` the model is constrained
+        to reply with a JSON object.
+
+        Returns:
+        tuple[str, bool]. The response text, or an error message, and whether the request succeeded. A cancelled
+        stream returns the text received so far and False, so it is not cached.
+        """
+        import requests # Imported on first use to keep it out of application startup
+
             # Set Up the API Request
-        endpoint = "https://api.openai.com/v1/chat/completions"  # Correct endpoint for chat models
+        endpoint = os.environ.get(CHAT_ENDPOINT_ENV) or CHAT_ENDPOINT
         headers = {
             "Authorization": f"Bearer {api_key}",
             "Content-Type": "application/json"
         }
         data = {
-            "model": "gpt-4-turbo",  # Assuming this is the correct model identifier
+            "model": CHAT_MODEL,
             "messages": [
-                {"role": "system", "content": "You are a helpful assistant that helps look at AI model documentation."},
+                {"role": "system", "content": SYSTEM_PROMPT},
                 {"role": "user", "content": documentation + "\n" + request}  # User's question or message
             ]
         }
+        if on_delta is not None:
+            data["stream"] = True
+        if json_mode:
+            data["response_format"] = {"type": "json_object"}
 
         # Make the Request
-        response = requests.post(endpoint, json=data, headers=headers)
+        try:
+            response = requests.post(endpoint, json=data, headers=headers, stream=on_delta is not None,
+                                     timeout=REQUEST_TIMEOUT)
+        except requests.RequestException as e:
+            return f"Failed to get a response: {e}", False
 
         # Handle the Response
-        if response.status_code == 200:
+        if response.status_code != 200:
+            #print(f"Failed to get a response: {response.status_code} - {response.text}")
+            return f"Failed to get a response: {response.status_code} - {response.text}", False
+        if on_delta is not None:
+            return self._read_stream(response, on_delta, is_cancelled)
+        try:
             choices = response.json().get("choices", [])
-            if choices:
-                # Extracting the response text
-                #print("Response from ChatGPT:\n", choices[0].get("message", {}).get("content"))
-                return choices[0].get("message", {}).get("content")
-            else:
-                #print("Received an unexpected response format.")
-                return "Received an unexpected response format."
+        except ValueError:
+            choices = []
+        if choices:
+            # Extracting the response text
+            #print("Response from ChatGPT:\n", choices[0].get("message", {}).get("content"))
+            content = choices[0].get("message", {}).get("content")
+            return content, isinstance(content, str)
         else:
-            #print(f"Failed to get a response: {response.status_code} - {response.text}")
-            return f"Failed to get a response: {response.status_code} - {response.text}"
+            #print("Received an unexpected response format.")
+            return "Received an unexpected response format.", False
+
+    @staticmethod
+    def _read_stream(response, on_delta: Callable[[str], None],
+                     is_cancelled: Callable[[], bool] | None = None) -> tuple[str, bool]:
+        """
+        Reads a streamed chat response, passing each piece of text to `on_delta`.
+
+        Returns:
+        tuple[str, bool]. The full text and whether the stream completed.
+        """
+        import requests
+        import urllib3
+        pieces: list[str] = []
+        completed = False
+        try:
+            for data in iter_sse_data(iter_stream_lines(response.raw)):
+                if is_cancelled is not None and is_cancelled():
+                    break
+                if data == "[DONE]":
+                    completed = True
+                    break
+                try:
+                    choices = json.loads(data).get("choices", [])
+                except ValueError:
+                    continue
+                delta = choices[0].get("delta", {}).get("content") if choices else None
+                if delta:
+                    pieces.append(delta)
+                    on_delta(delta)
+        except (requests.RequestException, urllib3.exceptions.HTTPError, OSError) as e:
+            text = "".join(pieces)
+            return (text + "\n\n" if text else "") + f"The response was interrupted: {e}", False
+        finally:
+            response.close()  # Closing the connection is what stops the server from generating a cancelled response
+        return "".join(pieces), completed
+
+    def readme(self) -> str:
+        """
+        Returns the README of the model, downloading it only if it was not given and was not downloaded before.
+
+        Returns:
+        str. The README content, empty if it could not be retrieved.
+        """
+        if self._readme is None:
+            self._readme = self.caller.get_readme_contents(self.doc_url)  # Stays None on failure, so it is retried
+        return self._readme or ""
+
+    def select(self, documentation: str, request: str) -> ReadmeSelection:
+        """
+        Selects the sections of the README relevant to a request that fit README_TOKEN_BUDGET. Selections are kept,
+        so asking again does not re-rank the README. Nothing is counted in `tokens_saved`.
 
-    def make_sample_code(self) -> str:
+        Parameters:
+        - documentation: str. The README.
+        - request: str. The question asked about it.
+
+        Returns:
+        ReadmeSelection. The selected sections.
+        """
+        key = (hash_text(documentation), request)
+        selection = self._contexts.get(key)
+        if selection is None:
+            selection = self._contexts[key] = select_context(documentation, request, README_TOKEN_BUDGET)
+        return selection
+
+    def record_savings(self, selection: ReadmeSelection) -> None:
+        """
+        Counts the README tokens a request left out in `tokens_saved` and reports them. Called for each request sent,
+        so answers from the response cache save nothing.
+
+        Parameters:
+        - selection: ReadmeSelection. The selection sent with the request.
+        """
+        self.tokens_saved += selection.saved_tokens
+        print(f"README context: {selection.used_tokens:,} of {selection.total_tokens:,} tokens in "
+              f"{len(selection.chunks)} sections, {selection.saved_tokens:,} tokens saved")
+
+    @staticmethod
+    def _response_parts(documentation: str, request: str) -> dict:
+        """Returns the values a response is keyed by in the response cache."""
+        return {"model": CHAT_MODEL, "system_prompt": SYSTEM_PROMPT, "request": request, "document_hash": hash_text(documentation)}
+
+    def cached_chat_response(self, documentation: str, request: str, on_delta: Callable[[str], None] | None = None,
+                             is_cancelled: Callable[[], bool] | None = None, json_mode: bool = False,
+                             selection: ReadmeSelection | None = None) -> str:
+        """
+        Answers a request about a document from the response cache, calling the API only on a miss.
+
+        Parameters:
+        - documentation: str. The document the request is about.
+        - request: str. The users request given based off the function called
+        - on_delta: Callable[[str], None] | None. When given, the response is streamed and passed to it piece by
+          piece. A cached response, or one shared with an identical request in flight, is passed to it whole.
+        - is_cancelled: Callable[[], bool] | None. Polled while streaming, the stream stops once it returns True.
+        - json_mode: bool. Whether the model is constrained to reply with a JSON object.
+        - selection: ReadmeSelection | None. The README selection `documentation` was taken from, whose savings are
+          counted if the request is sent.
+
+        Returns:
+        str. The response from ChatGPT or an error message.
+        """
+        parts = self._response_parts(documentation, request)
+        key = response_key(**parts)
+        streamed = False
+
+        def fetch() -> tuple[str, bool]:
+            nonlocal streamed
+            streamed = on_delta is not None
+            if selection is not None:
+                self.record_savings(selection)
+            return self._request_chat_response(self.api_key, documentation, request, on_delta, is_cancelled, json_mode)
+
+        response = self.response_cache.get_or_fetch(key, fetch, parts)
+        if on_delta is not None and not streamed:
+            on_delta(response)
+        return response
+
+    def stored_analysis(self, documentation: str) -> dict[str, str] | None:
+        """
+        Looks up the answers of a full analysis of a README, without calling the API. The answers are taken from this
+        caller, the model's manifest entry or the response cache, and only if they were made for the same README.
+
+        Parameters:
+        - documentation: str. The README the analysis is about.
+
+        Returns:
+        dict[str, str] | None. The answer to each question keyed by its field, or None if the README was not analysed.
+        """
+        readme_hash = hash_text(documentation)
+        if self._analysis is not None and self._analysis.get("readme_hash") == readme_hash:
+            return self._analysis["answers"]
+        entry = get_manifest().get(self.doc_url) or {}
+        analysis = entry.get("analysis")
+        if not (isinstance(analysis, dict) and analysis.get("readme_hash") == readme_hash and analysis.get("model") == CHAT_MODEL):
+            context = self.select(documentation, ANALYSIS_REQUEST).text  # Only a lookup, nothing is sent
+            response = self.response_cache.get(response_key(**self._response_parts(context, ANALYSIS_REQUEST)))
+            answers = parse_analysis(response) if response is not None else None
+            if answers is None:
+                return None
+            analysis = {"readme_hash": readme_hash, "model": CHAT_MODEL, "answers": answers}
+        self._analysis = analysis
+        return analysis["answers"]
+
+    def store_analysis(self, documentation: str, answers: dict[str, str]) -> None:
+        """
+        Keeps the answers of a full analysis and stores them with the model's manifest entry, if it is installed.
+
+        Parameters:
+        - documentation: str. The README the analysis is about.
+        - answers: dict[str, str]. The answer to each question keyed by its field.
+        """
+        self._analysis = {"readme_hash": hash_text(documentation), "model": CHAT_MODEL, "answers": answers}
+        manifest = get_manifest()
+        entry = manifest.get(self.doc_url)
+        if entry is None:
+            return
+        entry["analysis"] = self._analysis
+        try:
+            manifest.upsert(entry, notify=False)  # Runs on a worker thread, and no view shows the analysis
+        except OSError as e:
+            print(f"Couldn't store the analysis in the installed models manifest: {e}")
+
+    @staticmethod
+    def format_analysis(answers: dict[str, str]) -> str:
+        """
+        Formats the answers of a full analysis for display.
+
+        Parameters:
+        - answers: dict[str, str]. The answer to each question keyed by its field.
+
+        Returns:
+        str. The answers under their titles.
+        """
+        return "\n\n".join(f"{ANALYSIS_TITLES[field]}\n{answers[field]}" for field in QUESTIONS)
+
+    def full_analysis(self, on_delta: Callable[[str], None] | None = None, is_cancelled: Callable[[], bool] | None = None) -> str:
+        """
+        Answers all five questions about the README with a single request for a JSON object, and stores the answers
+        so the question methods are answered locally afterwards.
+
+        Returns:
+        str. The formatted answers, or an error message.
+        """
+        documentation = self.readme()
+        answers = self.stored_analysis(documentation)
+        if answers is None:
+            # Streamed to keep the request cancellable, the JSON itself is only shown once it is complete
+            selection = self.select(documentation, ANALYSIS_REQUEST)
+            response = self.cached_chat_response(selection.text, ANALYSIS_REQUEST, lambda text: None, is_cancelled,
+                                                 json_mode=True, selection=selection)
+            answers = parse_analysis(response)
+            if answers is None:
+                self.response_cache.remove(response_key(**self._response_parts(selection.text, ANALYSIS_REQUEST)))
+                ret = f"Could not read the full analysis:\n{response}"
+                if on_delta is not None:
+                    on_delta(ret)
+                return ret
+            self.store_analysis(documentation, answers)
+        ret = self.format_analysis(answers)
+        if on_delta is not None:
+            on_delta(ret)
+        return ret
+
+    def answer(self, field: str, on_delta: Callable[[str], None] | None = None,
+               is_cancelled: Callable[[], bool] | None = None) -> str:
+        """
+        Answers one of the questions about the README, from a stored full analysis when there is one.
+
+        Parameters:
+        - field: str. The question's key in QUESTIONS.
+
+        Returns:
+        str. The answer, or an error message.
+        """
+        documentation = self.readme()
+        answers = self.stored_analysis(documentation)
+        if answers is not None:
+            if on_delta is not None:
+                on_delta(answers[field])
+            return answers[field]
+        selection = self.select(documentation, QUESTIONS[field])
+        return self.cached_chat_response(selection.text, QUESTIONS[field], on_delta, is_cancelled, selection=selection)
+
+    def make_sample_code(self, on_delta: Callable[[str], None] | None = None, is_cancelled: Callable[[], bool] | None = None) -> str:
         """
         Generates sample code for using a specified model.
 
         Returns:
         str. A string containing the sample code.
         """
-        request = "With this given documentation, give me just the sample code needed to run this"
-        documentation : str = self.caller.get_readme_contents(self.doc_url)
-        sample_code = self.get_chat_response(self.api_key, documentation, request)
+        sample_code = self.answer("sample_code", on_delta, is_cancelled)
         return sample_code
     
-    def find_model_parameters(self) -> str:
+    def find_model_parameters(self, on_delta: Callable[[str], None] | None = None, is_cancelled: Callable[[], bool] | None = None) -> str:
         """
         Finds the number of parameters for a specified model.
 
         Returns:
         str. A string containing the parameters
         """
-        request = "With this given documentation, what are the parameters needed to run this?"
-        documentation : str = self.caller.get_readme_contents(self.doc_url)
-        ret = self.get_chat_response(self.api_key, documentation, request)
+        ret = self.answer("parameters", on_delta, is_cancelled)
         return ret
 
-    def find_model_datasets(self) -> str:
+    def find_model_datasets(self, on_delta: Callable[[str], None] | None = None, is_cancelled: Callable[[], bool] | None = None) -> str:
         """
         Identifies the datasets used by a specified model.
         
         Returns:
         str. A string containing the datasets.
         """
-        request = "With this given documentation, what are the datasets this model uses?"
-        documentation : str = self.caller.get_readme_contents(self.doc_url)
-        ret = self.get_chat_response(self.api_key, documentation, request)
+        ret = self.answer("datasets", on_delta, is_cancelled)
         return ret
 
-    def find_model_content(self) -> str:
+    def find_model_content(self, on_delta: Callable[[str], None] | None = None, is_cancelled: Callable[[], bool] | None = None) -> str:
         """
         Provides information on where to find content about using a specified model.
 
         Returns:
         str. A string containing the location for more info.
         """
-        request = "With this given documentation, where can i find more information on this model?"
-        documentation : str = self.caller.get_readme_contents(self.doc_url)
-        ret = self.get_chat_response(self.api_key, documentation, request)
+        ret = self.answer("more_information", on_delta, is_cancelled)
         return ret
 
-    def write_model_report(self) -> str:
+    def write_model_report(self, on_delta: Callable[[str], None] | None = None, is_cancelled: Callable[[], bool] | None = None) -> str:
         """
         Writes a report about a specified model.
 
         Returns:
         str. A string containing the report.
         """
-        request = "With this given documentation, give me a basic report about the model"
-        documentation : str = self.caller.get_readme_contents(self.doc_url)
-        ret = self.get_chat_response(self.api_key, documentation, request)
+        ret = self.answer("report", on_delta, is_cancelled)
         return ret
     
-    def output_log_test(self) -> str:
+    def output_log_test(self, on_delta: Callable[[str], None] | None = None, is_cancelled: Callable[[], bool] | None = None) -> str:
         """
-        Writes a report about a specified model.
+        Writes a report about the latest run of the model, sending only the relevant slice of its log:
+        the lines around the first detected error, or the end of the log if the run succeeded.
 
         Returns:
         str. A string containing the log report.
         """
         request = "With this given output from the model, give me a basic report about the output"
-        file_path = os.path.join('..', 'logging', 'output_log_test.txt')
-        with open(file_path, 'r') as file:
-            content = file.read()
+        store = LogStore()
+        try:
+            store.sync()
+            env_name = Repository.parse_name(self.doc_url)
+            run = store.latest_run(env=env_name, name="call") or store.latest_run(env=env_name)
+            if run is None:
+                return "No run logs were found for this model, run it first."
+            content = store.error_slice(run["run_id"])
+        finally:
+            store.close()
 
-        ret = self.get_chat_response(self.api_key, content, request)
+        ret = self.cached_chat_response(content, request, on_delta, is_cancelled)
     
         return ret
 
@@ -1,10 +1,13 @@
 import re
 import os
 import sys
-import requests  # Import requests for synchronous HTTP calls
-from paperswithcode import PapersWithCodeClient
-from paperswithcode.models.repository import Repositories
+import json
+import time
+import hashlib
+import threading
+from typing import TYPE_CHECKING
 from PySide6.QtWidgets import (QWidget, QInputDialog, QMessageBox) # This module has frontend components but is not part of the frontend_build
+from PySide6.QtCore import QRunnable, QThreadPool, Signal
 
 module_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
 if module_dir not in sys.path:
@@ -12,66 +15,218 @@ if module_dir not in sys.path:
 
 from directories import PWC_KEY_TXT
 from directories import OPENAI_KEY_TXT
+from directories import KEY_VALIDATION_JSON
+from directories import ensure_parent_dir
+from tracing import span
+
+# requests and paperswithcode are imported on first use, they are slow to import and not needed to show the window
+if TYPE_CHECKING:
+    from paperswithcode.models.repository import Repositories
+
+KEY_VALIDATION_TTL = 7 * 24 * 3600 # Seconds a cached key validation result stays trusted before it is re-checked
+KEY_REJECTED_STATUSES = (401, 403) # Only these answers prove a key invalid, anything else leaves its status unknown
+GITHUB_API = "https://api.github.com"
+GITHUB_API_ENV = "FOCALAI_GITHUB_API" # Overrides the GitHub API base URL, e.g. to point at a local stand-in server
+PWC_API_ENV = "FOCALAI_PWC_API" # Overrides the PapersWithCode server URL, e.g. to point at a local stand-in server
+
+def _key_fingerprint(api_key: str) -> str:
+    """Returns a short hash identifying a key in the validation cache, so the key itself is not stored twice."""
+    return hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:16]
+
+class _KeyValidationTask(QRunnable):
+    """
+    Validates an API key on the thread pool and reports the result through the manager's keyValidated signal.
+    """
+    def __init__(self, manager: "APIManager", key_type: str, api_key: str) -> None:
+        super().__init__()
+        self.manager = manager
+        self.key_type = key_type
+        self.api_key = api_key
+
+    def run(self) -> None:
+        validate_api_key = self.manager.is_openai_api_key_valid if self.key_type == 'openai' else self.manager.is_pwc_api_key_valid
+        try:
+            valid = validate_api_key(self.api_key)
+        except Exception as e:
+            print(f"Could not validate the {self.key_type} key: {e}")
+            valid = None
+        if valid is None:
+            # Unknown, e.g. no network, so nothing is cached, the key stays in use and is checked again next time
+            self.manager._validating.discard(self.key_type)
+            return
+        self.manager.record_validation(self.key_type, self.api_key, valid)
+        self.manager.keyValidated.emit(self.key_type, valid)
 
 class APIManager(QWidget):
     """
     Manages API interactions and key validations, including interfacing with specific APIs.
 
+    Nothing here touches the network while the application starts. The PapersWithCode client is created on the first
+    remote search, and keys are validated in the background with the result cached for KEY_VALIDATION_TTL seconds.
+    Without a usable PapersWithCode key the manager is offline, and searches only cover installed models.
+
     Attributes:
         api_type (str): Type of API, 'openai' or 'pwc' to handle different APIs.
         client (PapersWithCodeClient | None): API client for PapersWithCode, or other clients for different APIs.
+        offline (bool): True when remote search is unavailable because there is no valid PapersWithCode key.
+        keyValidated (Signal): Emitted with (key_type, is_valid) when a background key validation finishes.
     """
     abort_flag: bool = False
+    keyValidated = Signal(str, bool)
 
     def __init__(self):
         """
-        Initializes an instance of the APIManager class. This constructor sets up the client for the PapersWithCode API by calling the init_pwc_client method, which handles API key retrieval and client initialization.
+        Initializes an instance of the APIManager class. The client for the PapersWithCode API is set up by the init_pwc_client method the first time it is used, which handles API key retrieval and client initialization.
         """
         super().__init__()
-        self.client = None
-        self.init_pwc_client()
+        self._client = None
+        self._client_lock = threading.Lock()  # The client shares one connection, concurrent requests get each other's replies
+        self.offline = False
+        self._validating: set[str] = set()
+        self.keyValidated.connect(self._on_key_validated)
+
+    @property
+    def client(self):
+        """
+        The PapersWithCode client, created on first use so that startup neither imports paperswithcode nor asks for a key.
+
+        Returns:
+            PapersWithCodeClient | None: The API client, or None when offline.
+        """
+        if self._client is None and not self.offline:
+            self.init_pwc_client()
+        return self._client
 
     def init_pwc_client(self):
         """
         Initializes the PapersWithCode client using an API key stored in a local file or obtained through user input.
-        Raises an exception if the API key is not found or the client cannot be initialized.
+        Switches to offline mode if no key is available.
         """
         api_key = self.get_and_save_key("pwc")
         if api_key:
-            self.client = PapersWithCodeClient(token=api_key)
+            from paperswithcode import PapersWithCodeClient
+            self._client = PapersWithCodeClient(token=api_key, url=os.environ.get(PWC_API_ENV))
         else:
-            raise ValueError("PWC KEY not found")
-    
+            print("No Papers With Code key available, only installed models can be searched")
+            self.offline = True
+
+    @staticmethod
+    def _key_file(key_type: str) -> str:
+        return OPENAI_KEY_TXT if key_type == 'openai' else PWC_KEY_TXT
+
     def get_and_save_key(self, key_type: str) -> str | None:
         """
-        Retrieves and saves the API key from a file or through user input validation.
+        Retrieves the API key from a file, or asks for it and saves it. The key is returned right away and validated
+        in the background, unless a recent validation of the same key is cached.
 
         Args:
             key_type (str): Specifies the type of API key to retrieve ('openai' or 'pwc').
 
         Returns:
-            str | None: Returns the API key if found or validated, None if the operation is aborted or fails.
+            str | None: Returns the API key if found or entered, None if the key is known to be invalid or the request is aborted.
         """
-        key_file = OPENAI_KEY_TXT if key_type == 'openai' else PWC_KEY_TXT
+        key_file = self._key_file(key_type)
         key_name = "Open AI" if key_type == 'openai' else "Papers With Code"
-        validate_api_key = self.is_openai_api_key_valid if key_type == 'openai' else self.is_pwc_api_key_valid
 
         if os.path.isfile(key_file):
             with open(key_file, 'r') as file:
-                return file.read().strip()
-
-        while not self.abort_flag:
-            api_key, ok = QInputDialog.getText(self, 'Key Request', f'Please enter your {key_name} API key:')
-            if ok and validate_api_key(api_key):
-                with open(key_file, 'w') as file:
-                    file.write(api_key)
-                return api_key
-            elif not ok:
-                self.abort_flag = True
+                api_key = file.read().strip()
+            status = self.validation_status(key_type, api_key)
+            if status is False:
+                print(f"The stored {key_name} key was rejected when it was last checked")
                 return None
-            else:
-                QMessageBox.warning(self, "Invalid Key", "The provided API key is invalid, please try again.")
-                
+            if status is None:
+                self.validate_key_async(key_type, api_key)
+            return api_key
+
+        if self.abort_flag:
+            return None
+        api_key, ok = QInputDialog.getText(self, 'Key Request', f'Please enter your {key_name} API key:')
+        api_key = api_key.strip()
+        if not ok or not api_key:
+            self.abort_flag = True
+            return None
+        with open(ensure_parent_dir(key_file), 'w') as file:
+            file.write(api_key)
+        self.validate_key_async(key_type, api_key)
+        return api_key
+
+    def _read_validations(self) -> dict:
+        try:
+            with open(KEY_VALIDATION_JSON, 'r', encoding='utf-8') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def validation_status(self, key_type: str, api_key: str) -> bool | None:
+        """
+        Looks up the cached validation result of a key.
+
+        Args:
+            key_type (str): The type of key, 'openai' or 'pwc'.
+            api_key (str): The key.
+
+        Returns:
+            bool | None: The cached result, or None if the key was never checked or the result is older than KEY_VALIDATION_TTL.
+        """
+        record = self._read_validations().get(key_type)
+        if not record or record.get("fingerprint") != _key_fingerprint(api_key):
+            return None
+        if time.time() - record.get("checked", 0) > KEY_VALIDATION_TTL:
+            return None
+        return bool(record.get("valid"))
+
+    def record_validation(self, key_type: str, api_key: str, valid: bool) -> None:
+        """
+        Caches the validation result of a key with the time it was checked.
+
+        Args:
+            key_type (str): The type of key, 'openai' or 'pwc'.
+            api_key (str): The key.
+            valid (bool): Whether the key was accepted.
+        """
+        records = self._read_validations()
+        records[key_type] = {"fingerprint": _key_fingerprint(api_key), "valid": valid, "checked": time.time()}
+        try:
+            with open(ensure_parent_dir(KEY_VALIDATION_JSON), 'w', encoding='utf-8') as file:
+                json.dump(records, file)
+        except OSError as e:
+            print(f"Could not cache the key validation result: {e}")
+
+    def validate_key_async(self, key_type: str, api_key: str) -> None:
+        """
+        Validates a key on the thread pool. The result is cached and reported through keyValidated.
+
+        Args:
+            key_type (str): The type of key, 'openai' or 'pwc'.
+            api_key (str): The key to validate.
+        """
+        if key_type in self._validating:
+            return
+        self._validating.add(key_type)
+        QThreadPool.globalInstance().start(_KeyValidationTask(self, key_type, api_key))
+
+    def _on_key_validated(self, key_type: str, valid: bool) -> None:
+        """Drops a rejected key, switching to offline mode if it was the PapersWithCode key."""
+        self._validating.discard(key_type)
+        if valid:
+            return
+        key_name = "Open AI" if key_type == 'openai' else "Papers With Code"
+        try:
+            os.remove(self._key_file(key_type))
+        except OSError:
+            pass
+        if key_type == 'pwc':
+            self._client = None
+            self.offline = True
+        QMessageBox.warning(self, "Invalid Key", f"The provided {key_name} API key is invalid and was removed. "
+                            "Only installed models can be searched until a valid key is entered.")
+
+    def go_online(self) -> None:
+        """Leaves offline mode, so the next remote search asks for a key again if none is stored."""
+        self.offline = False
+        self.abort_flag = False
+
     @staticmethod
     def get_readme_contents(repo_url: str) -> str | None:
         """
@@ -83,51 +238,70 @@ class APIManager(QWidget):
         Returns:
             str | None: The content of the README file if successful, None if the operation fails.
         """
+        import requests
         parts = repo_url.rstrip('/').split('/')
         repo_owner, repo_name = parts[-2], parts[-1]
-        api_url = f"https://api.github.com/repos/{repo_owner}/{repo_name}/readme"
-        response = requests.get(api_url)
-        if response.status_code == 200:
-            data = response.json()
-            download_url = data.get('download_url')
-            if download_url:
-                readme_response = requests.get(download_url)
-                if readme_response.status_code == 200:
-                    return readme_response.text
-        return None
+        api_base = (os.environ.get(GITHUB_API_ENV) or GITHUB_API).rstrip('/')
+        api_url = f"{api_base}/repos/{repo_owner}/{repo_name}/readme"
+        with span("github.readme", repo=f"{repo_owner}/{repo_name}") as trace:
+            response = requests.get(api_url)
+            trace.set(status=response.status_code)
+            if response.status_code == 200:
+                data = response.json()
+                download_url = data.get('download_url')
+                if download_url:
+                    with span("github.readme_download") as download:
+                        readme_response = requests.get(download_url)
+                        download.set(status=readme_response.status_code, chars=len(readme_response.text))
+                    if readme_response.status_code == 200:
+                        return readme_response.text
+            return None
 
-    def get_repo_list(self, query: str = None) -> Repositories | None:
+    def get_repo_list(self, query: str = None, page: int = 1) -> "Repositories | None":
         """
-        Fetches a list of repositories matching a specific query from PapersWithCode.
+        Fetches a page of repositories matching a specific query from PapersWithCode. Safe to call from any thread
+        once the client exists, requests are sent one at a time.
 
         Args:
             query (str): A search term to filter the repositories. Optional.
+            page (int): The page of results to fetch, `next_page` of the previous page. Defaults to 1.
 
         Returns:
-            Repositories | None: An object containing repository data if successful, None if no data found or an error occurs.
+            Repositories | None: An object containing repository data if successful, None if offline, no data found or an error occurs.
         """
-        if query is not None:
-            return self.client.repository_list(name=query)
+        if query is None or self.client is None:
+            return None
+        try:
+            with self._client_lock, span("pwc.repository_list", query=query, page=page):
+                return self.client.repository_list(name=query, page=page)
+        except Exception as e:
+            print(f"Papers With Code search failed: {e}")
+            return None
 
-    def is_openai_api_key_valid(self, api_key: str) -> bool:
+    def is_openai_api_key_valid(self, api_key: str) -> bool | None:
         """
-        Validates a PapersWithCode API key by making a test request using the client.
+        Validates an OpenAI API key by making a test request.
 
         Args:
             api_key (str): The API key to validate.
 
         Returns:
-            bool: True if the API key is valid and the test request succeeds, False otherwise.
+            bool | None: True if the key is accepted, False if it is rejected, None if the answer says neither.
+
+        Raises:
+            requests.RequestException: If the API cannot be reached, so the key's status is unknown.
         """
+        import requests
         url = "https://api.openai.com/v1/engines"
         headers = {"Authorization": f"Bearer {api_key}"}
-        try:
-            response = requests.get(url, headers=headers)
-            return response.status_code == 200
-        except requests.RequestException:
+        response = requests.get(url, headers=headers, timeout=30)
+        if response.status_code == 200:
+            return True
+        if response.status_code in KEY_REJECTED_STATUSES:
             return False
+        return None
 
-    def is_pwc_api_key_valid(self, api_key: str) -> bool:
+    def is_pwc_api_key_valid(self, api_key: str) -> bool | None:
         """
         Validates a PapersWithCode API key by making a test request using the client.
 
@@ -135,14 +309,23 @@ class APIManager(QWidget):
             api_key (str): The API key to validate.
 
         Returns:
-            bool: True if the API key is valid and the test request succeeds, False otherwise.
+            bool | None: True if the key is accepted, False if it is rejected, None if the answer says neither.
+
+        Raises:
+            tea_client.errors.HttpClientError: If the server cannot be reached, so the key's status is unknown.
         """
-        temp = PapersWithCodeClient(token=api_key)
+        from paperswithcode import PapersWithCodeClient
+        from tea_client.errors import HttpClientError
+        temp = PapersWithCodeClient(token=api_key, url=os.environ.get(PWC_API_ENV))
         try:
-            test = temp.repository_list(name="whisper")
+            temp.repository_list(name="whisper")
             return True
-        except Exception as e:
-            print(e)
-            return False
+        except HttpClientError as e:
+            if e.response is not None and e.status_code in KEY_REJECTED_STATUSES:
+                return False
+            if e.response is None:
+                raise # Not reachable or timed out
+            print(f"Papers With Code answered the key check with {e}")
+            return None
 
 
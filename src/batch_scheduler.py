@@ -0,0 +1,208 @@
+"""
+Micro-batching for the resident model servers. Only uses the standard library, since the servers run with the Python
+of the model's environment.
+"""
+from __future__ import annotations
+
+import time
+import threading
+from collections import Counter, deque
+from typing import Any, Callable
+
+class Job:
+    """
+    A request submitted to a MicroBatchScheduler.
+
+    Attributes:
+        payload (Any): The request, as passed to `submit`.
+        submitted (float): The `time.monotonic` time the request was submitted.
+    """
+    __slots__ = ("payload", "submitted", "_done", "_result", "_error")
+
+    def __init__(self, payload: Any) -> None:
+        self.payload = payload
+        self.submitted = time.monotonic()
+        self._done = threading.Event()
+        self._result: Any = None
+        self._error: BaseException | None = None
+
+    def wait(self, timeout: float | None = None) -> Any:
+        """
+        Waits for the request to be answered.
+
+        Args:
+            timeout (float | None): The number of seconds to wait. Defaults to waiting until it is answered.
+
+        Returns:
+            Any: The result of the request.
+
+        Raises:
+            TimeoutError: If the request was not answered in time.
+            BaseException: The error raised while answering the request.
+        """
+        if not self._done.wait(timeout):
+            raise TimeoutError("the request was not answered in time")
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+class MicroBatchScheduler:
+    """
+    Collects requests into micro-batches and answers each batch with one call.
+
+    A batch is dispatched once it holds `max_batch_size` requests or its first request waited `max_wait` seconds.
+    When a batch function is given and a batch holds more than one request, the whole batch is passed to it in one
+    call; otherwise requests are answered one by one with the single function. Requests sharing a conflict key, e.g.
+    the same chat session, are never put in the same batch.
+
+    The batch function receives the payloads and returns one result per payload. A result that is an exception is
+    raised to that request's caller only.
+
+    Attributes:
+        max_batch_size (int): The largest number of requests in one batch.
+        max_wait (float): The number of seconds the first request of a batch waits for more requests.
+        name (str): A name for the dispatcher thread.
+    """
+    def __init__(self, single: Callable[[Any], Any], batch: Callable[[list[Any]], list[Any]] | None = None,
+                 max_batch_size: int = 8, max_wait: float = 0.01, conflict_key: Callable[[Any], Any] | None = None,
+                 name: str = "batch-scheduler", latency_samples: int = 2048) -> None:
+        """
+        Initializes the scheduler and starts its dispatcher thread.
+
+        Args:
+            single (Callable[[Any], Any]): Answers one request.
+            batch (Callable[[list[Any]], list[Any]] | None): Answers several requests in one call, None if the model
+                does not support batching.
+            max_batch_size (int): The largest number of requests in one batch. Defaults to 8.
+            max_wait (float): Seconds the first request of a batch waits for more. Defaults to 10 ms.
+            conflict_key (Callable[[Any], Any] | None): Returns a key for a payload, requests with equal keys are
+                answered in separate batches.
+            name (str): A name for the dispatcher thread.
+            latency_samples (int): The number of recent latencies kept for the percentiles. Defaults to 2048.
+        """
+        self.single = single
+        self.batch = batch
+        self.max_batch_size = max(1, max_batch_size) if batch is not None else 1
+        self.max_wait = max_wait
+        self.conflict_key = conflict_key
+        self.name = name
+        self._queue: deque[Job] = deque()
+        self._condition = threading.Condition()
+        self._closed = False
+        self._batch_sizes: Counter[int] = Counter()
+        self._latencies: deque[float] = deque(maxlen=latency_samples)
+        self._completed = 0
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, payload: Any) -> Job:
+        """
+        Queues a request.
+
+        Args:
+            payload (Any): The request.
+
+        Returns:
+            Job: The queued request, whose `wait` returns its result.
+
+        Raises:
+            RuntimeError: If the scheduler was closed.
+        """
+        job = Job(payload)
+        with self._condition:
+            if self._closed:
+                raise RuntimeError(f"{self.name} is closed")
+            self._queue.append(job)
+            self._condition.notify()
+        return job
+
+    def close(self) -> None:
+        """Stops the dispatcher once the queued requests are answered."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+
+    def _take_batch(self) -> list[Job] | None:
+        """Waits for a batch to fill or for its first request to wait `max_wait`, and removes it from the queue."""
+        with self._condition:
+            while not self._queue:
+                if self._closed:
+                    return None
+                self._condition.wait()
+            deadline = self._queue[0].submitted + self.max_wait
+            while len(self._queue) < self.max_batch_size and not self._closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            jobs: list[Job] = []
+            keys = set()
+            deferred: list[Job] = []
+            while self._queue and len(jobs) < self.max_batch_size:
+                job = self._queue.popleft()
+                key = self.conflict_key(job.payload) if self.conflict_key is not None else None
+                if key is not None and key in keys:
+                    deferred.append(job)  # Answered in a later batch, after the one it conflicts with
+                    continue
+                keys.add(key)
+                jobs.append(job)
+            self._queue.extendleft(reversed(deferred))
+            return jobs
+
+    def _run(self) -> None:
+        while True:
+            jobs = self._take_batch()
+            if jobs is None:
+                return
+            if self.batch is not None and len(jobs) > 1:
+                try:
+                    results = self.batch([job.payload for job in jobs])
+                    if len(results) != len(jobs):
+                        raise RuntimeError(f"the batch function returned {len(results)} results for {len(jobs)} requests")
+                except BaseException as e:
+                    results = [e] * len(jobs)
+            else:
+                results = []
+                for job in jobs:
+                    try:
+                        results.append(self.single(job.payload))
+                    except BaseException as e:
+                        results.append(e)
+            now = time.monotonic()
+            with self._condition:
+                self._batch_sizes[len(jobs)] += 1
+                for job in jobs:
+                    self._latencies.append(now - job.submitted)
+                self._completed += len(jobs)
+            for job, result in zip(jobs, results):
+                if isinstance(result, BaseException):
+                    job._error = result
+                else:
+                    job._result = result
+                job._done.set()
+
+    @staticmethod
+    def _percentile(samples: list[float], fraction: float) -> float | None:
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+
+    def stats(self) -> dict:
+        """
+        Reports the scheduler's load.
+
+        Returns:
+            dict: 'queue_depth' (requests waiting), 'completed' (requests answered), 'batch_sizes' (a histogram of
+            batch sizes, keyed by size as a string), and 'p50_ms' and 'p99_ms' (the latency from submission to
+            answer over recent requests, None before any request was answered).
+        """
+        with self._condition:
+            latencies = sorted(self._latencies)
+            return {
+                "queue_depth": len(self._queue),
+                "completed": self._completed,
+                "batch_sizes": {str(size): count for size, count in sorted(self._batch_sizes.items())},
+                "p50_ms": None if not latencies else round(self._percentile(latencies, 0.50) * 1000, 2),
+                "p99_ms": None if not latencies else round(self._percentile(latencies, 0.99) * 1000, 2),
+            }
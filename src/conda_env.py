@@ -1,32 +1,40 @@
 import subprocess
 import os
+import io
 from repo import Repository
-from directories import LOG_DIR, ENV_LIST_LOG
+from directories import LOG_DIR, CONDA_ENV_REGISTRY
+from run_log import RunLogWriter
 general_logging_dir: str = os.path.expanduser("~/FocalAI/logs/")
 
-def run_subprocess_with_logging(command: str, error_message: str, log_file_dir: str):
+def run_subprocess_with_logging(command: str, error_message: str, run_name: str, env_name: str | None = None):
     """
     Runs a subprocess with the given arguments and logs the output and any errors encountered.
 
+    Output is written to a per-run log under RUN_LOG_DIR through a RunLogWriter, which buffers writes, rotates large logs
+    and records the run's command, environment, duration and exit code in the run index.
+
     Args:
         command (str): The arguments to pass to the subprocess.
         error_message (str): The error message to display if the subprocess encounters an error.
-        logging_directory (str): The directory to store logging information.
-        log_file_name (str): The name of the log file.
+        run_name (str): The name of the run (e.g. 'create' or 'call'), used as the prefix of the run id.
+        env_name (str | None): The conda environment the command runs in, recorded in the run index. Optional.
     """
-
     try:
-        with open(log_file_dir, 'w') as log_file:
-            process = subprocess.Popen(command, shell=True, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+        with RunLogWriter(run_name, command, env_name=env_name) as log_writer:
+            process = subprocess.Popen(command, shell=True, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+            # newline='' keeps bare '\r' terminators so progress-bar updates can be collapsed by the reader
+            output = io.TextIOWrapper(process.stdout, encoding='utf-8', errors='replace', newline='')
 
             # Read output live and yield lines
-            for line in process.stdout:
-                log_file.write(line)
-                log_file.flush()
-                yield line
-            
-            process.stdout.close()
-            return_code = process.wait()
+            try:
+                for line in output:
+                    log_writer.write(line)
+                    yield line
+            finally:
+                # Also runs when the caller stops iterating early, so the process is always reaped and its exit code logged
+                output.close()
+                return_code = process.wait()
+                log_writer.exit_code = return_code
             if return_code:
                 raise subprocess.CalledProcessError(return_code, command)
     except subprocess.CalledProcessError as e:
@@ -36,6 +44,87 @@ def run_subprocess_with_logging(command: str, error_message: str, log_file_dir:
         print(f"OS error occurred, possibly due to a missing executable or insufficient permissions.\n{e}")
         yield "OS error occurred, check permissions or executable."
 
+class CondaEnvRegistry:
+    """
+    A cached view of conda's environment registry file, which lists the prefix of every environment conda created.
+    The file is only re-read when its modification time or size changes, so lookups do not need a `conda env list` run.
+
+    Attributes:
+        path (str): The path of the registry file.
+    """
+    def __init__(self, path: str | None = None) -> None:
+        """
+        Initializes the registry. Nothing is read until it is first queried.
+
+        Args:
+            path (str | None): The path of the registry file. Defaults to CONDA_ENV_REGISTRY.
+        """
+        self.path = path or CONDA_ENV_REGISTRY
+        self._names: set[str] = set()
+        self._stamp: tuple[int, int] | None = None
+        self._loaded = False
+
+    def _file_stamp(self) -> tuple[int, int] | None:
+        """Returns the registry file's modification time and size, or None if it does not exist."""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _read(self) -> set[str]:
+        """Reads the names of the registered environments whose prefixes still exist."""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                prefixes = [line.strip() for line in file if line.strip()]
+        except OSError:
+            return set()
+        # conda leaves removed environments in the file until it next prunes it, so check the prefix is still there
+        return {os.path.basename(prefix.rstrip('/\\')) for prefix in prefixes if os.path.isdir(prefix)}
+
+    def refresh(self) -> tuple[set[str], set[str]]:
+        """
+        Re-reads the registry if it changed since it was last read.
+
+        Returns:
+            tuple[set[str], set[str]]: The names of the environments that were added and removed.
+        """
+        stamp = self._file_stamp()
+        if self._loaded and stamp == self._stamp:
+            return set(), set()
+        names = self._read() if stamp is not None else set()
+        added, removed = names - self._names, self._names - names
+        self._names, self._stamp, self._loaded = names, stamp, True
+        return added, removed
+
+    def names(self) -> set[str]:
+        """
+        Returns the names of the registered environments.
+
+        Returns:
+            set[str]: The environment names.
+        """
+        self.refresh()
+        return set(self._names)
+
+    def __contains__(self, env_name: str) -> bool:
+        self.refresh()
+        return env_name in self._names
+
+_env_registry: CondaEnvRegistry | None = None
+
+def get_env_registry() -> CondaEnvRegistry:
+    """
+    Returns the process-wide conda environment registry.
+
+    Returns:
+        CondaEnvRegistry: The shared registry.
+    """
+    global _env_registry
+    if _env_registry is None:
+        _env_registry = CondaEnvRegistry()
+    return _env_registry
+
 def check_if_exists(env_name: str) -> bool:
     """
     Checks whether a specific Anaconda environment exists by listing all environments and searching for the specified name.
@@ -46,20 +135,19 @@ def check_if_exists(env_name: str) -> bool:
     Returns:
         bool: True if the environment exists, False otherwise. If an error occurs during the process, it prints an error message and returns False.
 
-    This function executes the 'conda env list' command, logs the output to a file, and then searches through this file to find if the specified environment name is listed. It handles any exceptions by logging the error and returns False if the environment is not found or an error occurs.
+    The cached conda environment registry is checked first. Otherwise this function executes the 'conda env list' command, logs the output as an 'env_list' run, and searches the listed lines for the specified environment name. It handles any exceptions by logging the error and returns False if the environment is not found or an error occurs.
     """
+    # Environments in conda's registry file are known to exist without running conda
+    if env_name in get_env_registry():
+        return True
+
     command = "conda env list"
     error_message = "Error finding installed environments"
 
-    run_subprocess_with_logging(command, error_message, ENV_LIST_LOG)
-
     try:
-        with open(ENV_LIST_LOG, 'r') as log_file:
-            environments = log_file.readlines()
-        for env in environments:
-            if env_name in env:
-                return True
-        return False
+        # The whole listing is read so that the run finishes and is logged with its exit code
+        listing = list(run_subprocess_with_logging(command, error_message, "env_list"))
+        return any(env_name in env for env in listing)
     except Exception as e:
         print(f"An error occurred while processing environments list: {e}")
         return False
@@ -1,5 +1,6 @@
 from database_util import Database
 from conda_env import CondaEnvironment, check_if_exists
+from directories import ensure_parent_dir
 import os
 from typing import Callable, Tuple, Any
 
@@ -19,11 +20,10 @@ class DatabaseManager(Database):
         - Exception: If the directory does not exist and cannot be created.
         """
         # Check if the database directory exists; if not, attempt to create it
-        # if not os.path.exists(db_path):
-        #     try:
-        #         os.makedirs(db_path)
-        #     except Exception as e:
-        #         raise Exception(f"Failed to create the database directory: {e}")
+        try:
+            ensure_parent_dir(db_path)
+        except OSError as e:
+            raise Exception(f"Failed to create the database directory: {e}")
         self.running_env: CondaEnvironment | None = None
         self.is_running = False
         # Proceed with the original initialization from the parent class
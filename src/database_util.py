@@ -2,6 +2,7 @@ import sqlite3
 from conda_env import CondaEnvironment
 import pickle
 import os
+from tracing import span
 
 class Database:
     """
@@ -258,16 +259,19 @@ class Database:
         Returns:
             CondaEnvironment | None: The retrieved Conda environment or None if not found.
         """
-        try:
-            self.cursor.execute("SELECT serialized_env FROM conda_environments WHERE env_name = ?", (env_name,))
-            row = self.cursor.fetchone()
-            if row:
-                print("Found env")
-                return pickle.loads(row[0])
-            print("Not found")
-            return None
-        except sqlite3.Error:
-            return None
+        with span("db.get_environment_by_name", env_name=env_name) as trace:
+            try:
+                self.cursor.execute("SELECT serialized_env FROM conda_environments WHERE env_name = ?", (env_name,))
+                row = self.cursor.fetchone()
+                if row:
+                    print("Found env")
+                    with span("db.unpickle", bytes=len(row[0])):
+                        return pickle.loads(row[0])
+                print("Not found")
+                trace.set(found=False)
+                return None
+            except sqlite3.Error:
+                return None
 
     def close(self) -> None:
         """Closes the database connection."""
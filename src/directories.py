@@ -1,79 +1,193 @@
 import os
-import logging
 import sys
-# Setup basic logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Importing this module touches nothing on disk. Paths are resolved on first access and directories are created by
+# the code that writes into them, through ensure_dir and ensure_parent_dir.
+
+BASE_DIR_ENV = "FOCALAI_HOME" # Overrides the base directory, e.g. to keep test and benchmark runs on a tmpfs
 
 def get_base_dir():
     """Determine and return the base path of the application."""
+    override = os.environ.get(BASE_DIR_ENV)
+    if override:
+        return os.path.abspath(os.path.expanduser(override))
     if getattr(sys, 'frozen', False):
         # The application is frozen
         return os.path.dirname(sys.executable)
     else:
         # The application is not frozen
-        return os.path.dirname(__file__)
-
-
-# Base directory where your application resides
-BASE_DIR = get_base_dir()
-print(__file__)
-# Child-level Directories
-LOG_DIR = os.path.join(BASE_DIR, 'logs')
-DATA_DIR = os.path.join(BASE_DIR, 'data')
-TEMP_DIR = os.path.join(BASE_DIR, 'temp')
-REPORTS_DIR = os.path.join(BASE_DIR, 'reports')
-USER_SCRIPTS_DIR = os.path.join(BASE_DIR, 'user_scripts')
-USER_GEN_DIR = os.path.join(BASE_DIR, 'user_gen')
-
-# Grandchild-level directory
-DRAG_N_DROP_DIR = os.path.join(TEMP_DIR, 'drag_n_drop') # Stores the file for the drag and drop module
-REPO_JSONS_DIR = os.path.join(DATA_DIR, 'repo_jsons') # Stores the repository jsons directory
-RUN_LOG_DIR = os.path.join(LOG_DIR, 'run_logs')
-BUILD_LOG_DIR = os.path.join(LOG_DIR, 'build') # Stores the data for app build process
-KEYS_DIR = os.path.join(USER_GEN_DIR, 'keys')
-
-# Leaf file paths
-DB_PATH = os.path.join(DATA_DIR, 'conda_environments.db') # Stores the data for the database of environments. Logic exists within the DatabaseManager to create the db file as needed
-CALL_LOG = os.path.join(LOG_DIR, 'call.log') # Stores the data for the Anaconda environment calls
-CREATE_LOG = os.path.join(LOG_DIR, 'create.log') # Stores the data for the Anaconda environment creation runs
-DELETE_LOG = os.path.join(LOG_DIR, 'delete.log') # Stores the data for the Anaconda environment deletion runs
-ENV_LIST_LOG = os.path.join(LOG_DIR, 'env_list_log.log') # Stores the data for the current shell env list runs
-OPENAI_KEY_TXT = os.path.join(KEYS_DIR, 'openai_key.txt')
-PWC_KEY_TXT = os.path.join(KEYS_DIR, 'pwc_key.txt')
-# Function to create directories safely
-def create_directory(path):
-    try:
-        os.makedirs(path, exist_ok=True)
-        logging.info(f"Directory created or verified: {path}")
-    except OSError as e:
-        logging.error(f"Failed to create directory {path}: {e}")
-
-# Ensure directories exist
-directories = [
-    LOG_DIR, DATA_DIR, TEMP_DIR, REPORTS_DIR, USER_SCRIPTS_DIR, USER_GEN_DIR, BUILD_LOG_DIR,
-    DRAG_N_DROP_DIR, REPO_JSONS_DIR, RUN_LOG_DIR, KEYS_DIR
+        return os.path.dirname(os.path.abspath(__file__))
+
+# Each path is (parent, name), where the parent is another entry or 'BASE_DIR'
+_LAYOUT: dict[str, tuple[str, str]] = {
+    # Child-level Directories
+    'LOG_DIR': ('BASE_DIR', 'logs'),
+    'DATA_DIR': ('BASE_DIR', 'data'),
+    'TEMP_DIR': ('BASE_DIR', 'temp'),
+    'REPORTS_DIR': ('BASE_DIR', 'reports'),
+    'USER_SCRIPTS_DIR': ('BASE_DIR', 'user_scripts'),
+    'USER_GEN_DIR': ('BASE_DIR', 'user_gen'),
+
+    # Grandchild-level directory
+    'DRAG_N_DROP_DIR': ('TEMP_DIR', 'drag_n_drop'), # Stores the file for the drag and drop module
+    'REPO_JSONS_DIR': ('DATA_DIR', 'repo_jsons'), # Stores the repository jsons directory
+    'INPUT_STORE_DIR': ('DATA_DIR', 'input_store'), # Stores model inputs by content hash, with an index of their names
+    'RENDER_CACHE_DIR': ('TEMP_DIR', 'render_cache'), # Stores rendered README pages, keyed by README hash and theme
+    'RESULT_CACHE_DIR': ('TEMP_DIR', 'result_cache'), # Stores model results, keyed by environment, script and input hashes
+    'RESPONSE_CACHE_DIR': ('TEMP_DIR', 'response_cache'), # Stores chat responses, keyed by model, prompt and README hash
+    'LLM_SOCKET_DIR': ('TEMP_DIR', 'llm'), # Stores the Unix sockets of the LLM generation servers
+    'RUN_LOG_DIR': ('LOG_DIR', 'run_logs'),
+    'BUILD_LOG_DIR': ('LOG_DIR', 'build'), # Stores the data for app build process
+    'KEYS_DIR': ('USER_GEN_DIR', 'keys'),
+
+    # Leaf file paths
+    'DB_PATH': ('DATA_DIR', 'conda_environments.db'), # Stores the data for the database of environments. The DatabaseManager creates its directory as needed
+    'CALL_LOG': ('LOG_DIR', 'call.log'), # Stores the data for the Anaconda environment calls
+    'CREATE_LOG': ('LOG_DIR', 'create.log'), # Stores the data for the Anaconda environment creation runs
+    'DELETE_LOG': ('LOG_DIR', 'delete.log'), # Stores the data for the Anaconda environment deletion runs
+    'ENV_LIST_LOG': ('LOG_DIR', 'env_list_log.log'), # Stores the data for the current shell env list runs
+    'INSTALLED_MANIFEST': ('DATA_DIR', 'installed_models.json'), # Single manifest of installed models, replaces the per-model files in REPO_JSONS_DIR
+    'LLM_SERVER_LOG': ('LOG_DIR', 'llm_server.log'), # Stores the output of the LLM generation servers
+    'LOG_INDEX_DB': ('LOG_DIR', 'log_index.db'), # Searchable index of the run logs, synced from the run log index file
+    'STALL_LOG': ('LOG_DIR', 'stalls.log'), # Stores the main thread stacks captured when the GUI event loop stalled
+    'OPENAI_KEY_TXT': ('KEYS_DIR', 'openai_key.txt'),
+    'PWC_KEY_TXT': ('KEYS_DIR', 'pwc_key.txt'),
+    'KEY_VALIDATION_JSON': ('KEYS_DIR', 'key_validation.json'), # Cached key validation results with the time they were checked
+}
+
+# The application directories, as created by create_directories
+APP_DIRECTORIES = [
+    'LOG_DIR', 'DATA_DIR', 'TEMP_DIR', 'REPORTS_DIR', 'USER_SCRIPTS_DIR', 'USER_GEN_DIR', 'BUILD_LOG_DIR',
+    'DRAG_N_DROP_DIR', 'REPO_JSONS_DIR', 'INPUT_STORE_DIR', 'RENDER_CACHE_DIR', 'RESULT_CACHE_DIR',
+    'RESPONSE_CACHE_DIR', 'LLM_SOCKET_DIR', 'RUN_LOG_DIR', 'KEYS_DIR'
 ]
+
+CONDA_ENV_REGISTRY = os.path.join(os.path.expanduser('~'), '.conda', 'environments.txt') # Conda's registry of environment prefixes
+
+class Paths:
+    """
+    Resolves the application paths under a base directory. Paths are computed on first access and cached, and nothing
+    is created on disk.
+
+    Attributes:
+        base_dir (str): The directory every application path is under.
+    """
+    def __init__(self, base_dir: str | None = None) -> None:
+        """
+        Initializes the paths.
+
+        Args:
+            base_dir (str | None): The base directory. Defaults to the directory chosen by `get_base_dir`, which
+                honours the FOCALAI_HOME environment variable.
+        """
+        self._resolved: dict[str, str] = {}
+        if base_dir is not None:
+            self._resolved['BASE_DIR'] = os.path.abspath(base_dir)
+
+    @property
+    def base_dir(self) -> str:
+        return self.resolve('BASE_DIR')
+
+    def resolve(self, name: str) -> str:
+        """
+        Returns the path registered under a name such as 'RUN_LOG_DIR'.
+
+        Args:
+            name (str): The name of the path.
+
+        Returns:
+            str: The absolute path.
+
+        Raises:
+            KeyError: If no path is registered under the name.
+        """
+        path = self._resolved.get(name)
+        if path is None:
+            if name == 'BASE_DIR':
+                path = get_base_dir()
+            else:
+                parent, child = _LAYOUT[name]
+                path = os.path.join(self.resolve(parent), child)
+            self._resolved[name] = path
+        return path
+
+    def __getattr__(self, name: str) -> str:
+        if name in _LAYOUT:
+            return self.resolve(name)
+        raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+
+    def __dir__(self) -> list[str]:
+        return sorted(set(super().__dir__()) | set(_LAYOUT))
+
+_paths: Paths | None = None
+
+def get_paths() -> Paths:
+    """
+    Returns the paths shared by the whole process.
+
+    Returns:
+        Paths: The shared paths.
+    """
+    global _paths
+    if _paths is None:
+        _paths = Paths()
+    return _paths
+
+def __getattr__(name: str) -> str:
+    """Resolves the module level path constants, such as DATA_DIR, on first access."""
+    if name == 'BASE_DIR' or name in _LAYOUT:
+        path = get_paths().resolve(name)
+        globals()[name] = path # Later lookups skip this function
+        return path
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(_LAYOUT) | {'BASE_DIR'})
+
+_created: set[str] = set()
+
+def ensure_dir(path: str) -> str:
+    """
+    Creates a directory and its parents if they do not exist. Each directory is only checked once per process.
+
+    Args:
+        path (str): The directory.
+
+    Returns:
+        str: The directory, so the call can wrap the path being written to.
+    """
+    if path and path not in _created:
+        os.makedirs(path, exist_ok=True)
+        _created.add(path)
+    return path
+
+def ensure_parent_dir(file_path: str) -> str:
+    """
+    Creates the directory a file is about to be written to.
+
+    Args:
+        file_path (str): The path of the file.
+
+    Returns:
+        str: The path of the file.
+    """
+    ensure_dir(os.path.dirname(file_path))
+    return file_path
+
 # Function to create directories safely
-def create_directories(directory_list):
+def create_directories(directory_list=None):
+    """
+    Creates directories up front and logs each one, for tools that want the whole layout in place.
+
+    Args:
+        directory_list (list[str] | None): The directories to create. Defaults to every application directory.
+    """
+    import logging
+    if directory_list is None:
+        directory_list = [get_paths().resolve(name) for name in APP_DIRECTORIES]
     for path in directory_list:
         try:
-            os.makedirs(path, exist_ok=True)
+            ensure_dir(path)
             logging.info(f"Directory created or verified: {path}")
         except OSError as e:
             logging.error(f"Failed to create directory {path}: {e}")
-
-# Ensure directories exist
-create_directories(directories)
-
-# # Check and log information about key files
-# if os.path.isdir(KEYS_DIR):
-#     logging.info(f"Key directory path ready: {KEYS_DIR}")
-# else:
-#     logging.error(f"Key directory does not exist: {KEYS_DIR}")
-
-# # Display the database path for debugging purposes
-# if os.path.isdir(os.path.dirname(DB_PATH)):
-#     logging.info(f"Database path ready: {DB_PATH}")
-# else:
-#     logging.error(f"Database directory does not exist: {os.path.dirname(DB_PATH)}")
-
@@ -1,142 +1,33 @@
 import os
 import sys
-import json
+import logging
 from dataclasses import dataclass
 from PySide6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
-                               QHBoxLayout, QLineEdit, QListWidget, QStackedWidget, QListWidgetItem, QLabel, QPushButton)
+                               QHBoxLayout, QLineEdit, QListView, QStackedWidget, QPushButton)
 
-from PySide6.QtCore import Slot, QCoreApplication
+from PySide6.QtCore import Slot, QCoreApplication, QModelIndex
 from PySide6.QtGui import QFont
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 
 #Local Imports
-from model_page import ModelPage
 from styler import Styler
 from vertical_menu import VerticalMenu
-from repo import Repository
-from directories import REPO_JSONS_DIR
+from repo_list_model import RepoListModel, RepoItemDelegate
+from fs_watcher import DebouncedWatcher
+from readme_view import prepare_application
+from startup_profile import PROFILE_FLAG, is_profiling_child, profile_startup, install_first_paint_probe
 
 module_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
 if module_dir not in sys.path:
     sys.path.append(module_dir)
 
 from api_caller import APIManager
-
-class RepoWidget(QWidget):
-    """
-    A widget that displays detailed information about a repository.
-
-    This widget is designed to be used in a graphical user interface to present
-    relevant information about a repository, such as its name, owner, description,
-    and URL. It also indicates whether the repository is available locally.
-
-    Attributes:
-        repo_info (object): An object containing the repository information.
-            It should have `name`, `owner`, `description`, `url`, and optionally `is_installed` attributes.
-        parent (QWidget, optional): The parent widget. Defaults to None.
-    """
-    def __init__(self, repo_info, parent=None):
-        """
-        Initializes the RepoWidget with repository information and sets up the UI components.
-
-        Args:
-            repo_info (object): The repository information object with attributes necessary for display.
-            parent (QWidget, optional): The parent widget. Defaults to None.
-
-        The repo_info object must have the following attributes:
-        - name: The name of the repository.
-        - owner: The owner of the repository.
-        - description: A brief description of the repository.
-        - url: The URL to the repository.
-        - is_installed (optional): A boolean indicating if the repository is locally available.
-        """
-        super().__init__(parent)
-        layout = QVBoxLayout()
-
-        # Create labels for each piece of repo info
-        name_label = QLabel(f"Name: {repo_info.name}")
-        owner_label = QLabel(f"Owner: {repo_info.owner}")
-        description_label = QLabel(f"Description: {repo_info.description}")
-        url_label = QLabel(f"URL: {repo_info.url}")
-        url_label.setOpenExternalLinks(True)  # Make the URL clickable
-        
-        # Add labels to the layout
-        layout.addWidget(name_label)
-        layout.addWidget(owner_label)
-        layout.addWidget(description_label)
-        layout.addWidget(url_label)
-        
-        # Check if 'online' attribute exists and create a label accordingly
-        if hasattr(repo_info, 'is_installed') and repo_info.is_installed:
-            is_downloaded = QLabel("Locally Available")
-            font = QFont("Arial", 12)
-            font.setItalic(True)
-            is_downloaded.setFont(font)
-            is_downloaded.setStyleSheet("color: green;")
-        else:
-            is_downloaded = QLabel("Not Locally Available")
-            font = QFont("Arial", 12)
-            font.setItalic(False)
-            is_downloaded.setFont(font)
-            is_downloaded.setStyleSheet("color: red;")  # Use red for better visibility on negative status
-
-        # Add 'is_downloaded' label to the layout
-        layout.addWidget(is_downloaded)
-        
-        # Apply layout to the widget
-        self.setLayout(layout)
-
-class RepoTempObj:
-    """
-    A temporary object for holding repository information.
-
-    This class is designed to act as a simple container for repository data,
-    providing easy access and manipulation of its attributes in memory.
-
-    Attributes:
-        name (str): The name of the repository.
-        owner (str): The owner of the repository.
-        description (str): A description of the repository.
-        url (str): The URL to the repository.
-        is_installed (bool): Indicates whether the repository is locally installed.
-    """
-    name: str
-    owner: str
-    description: str
-    url: str
-    is_installed: bool
-
-    def __init__(self, entry_dict) -> None:
-        """
-        Initializes the RepoTempObj instance with data from a dictionary.
-
-        Args:
-            entry_dict (dict): A dictionary containing repository data. 
-            This dictionary must include 'url', 'owner', and 'description' keys.
-
-        The 'url' key is used to extract the repository name using a static method `parse_name` from the `Repository` class.
-        """
-        self.url = entry_dict["url"]
-        self.name = Repository.parse_name(self.url)
-        self.owner = entry_dict["owner"]
-        self.description = entry_dict["description"]
-        self.is_installed = True
-
-    def __str__(self) -> str:
-        """
-        Provides a string representation of the repository data.
-
-        Returns:
-            str: A formatted string displaying the attributes of the repository.
-        """
-        res = [
-        f"name: {self.name}",
-        f"owner: {self.owner}",
-        f"url: {self.url}",
-        f"description: {self.description}"
-        ]
-        
-        return "\n".join(res)
+from repo_record import RepoRecord
+from manifest import get_manifest
+from conda_env import get_env_registry
+from directories import INSTALLED_MANIFEST, CONDA_ENV_REGISTRY, ensure_parent_dir
+from tracing import traced
+from stall_monitor import StallMonitor
 
 class MainWindow(QMainWindow):
     """
@@ -145,9 +36,15 @@ class MainWindow(QMainWindow):
     Attributes:
         styler (Styler): A Styler object used for applying and managing styles across the application.
         centralWidget (QWidget): The central widget of the main window.
-        list_widget (QListWidget): Widget displaying a list of repositories.
+        list_widget (QListView): View displaying the list of repositories, painted by a RepoItemDelegate.
+        repo_model (RepoListModel): The model holding the RepoRecord entries shown in the list view.
+        manifest (InstalledManifest): The shared manifest of installed models.
+        showing_downloads (bool): Whether the list currently shows the installed models rather than search results.
+        env_registry (CondaEnvRegistry): The cached conda environment registry.
+        watcher (DebouncedWatcher): Watches the manifest and the conda environment registry for outside changes.
         search_bar (QLineEdit): Input field for searching repositories.
         detail_view (QStackedWidget): Widget that displays detailed views of the selected repository.
+        model_page (ModelPage): The page showing the selected repository, built the first time it is needed.
         menu (VerticalMenu): The application's menu system.
     """
     def __init__(self, styler: Styler) -> None:
@@ -172,6 +69,15 @@ class MainWindow(QMainWindow):
         self.styler.register_component(self)
         self.styler.style_me()
         self.caller = APIManager()
+        self.manifest = get_manifest()
+        self.manifest.add_listener(self.on_manifest_changed)
+        self.showing_downloads = False
+        self.env_registry = get_env_registry()
+        self.env_registry.refresh()
+        # Installs and removals made by other processes arrive as debounced deltas, no polling or rescans
+        self.watcher = DebouncedWatcher(parent=self)
+        self.watcher.watch_file(ensure_parent_dir(INSTALLED_MANIFEST), self.manifest.refresh) # The data directory must exist to be watched
+        self.watcher.watch_file(CONDA_ENV_REGISTRY, self.on_env_registry_changed)
         self.setWindowTitle("Main Window with Menu and Details")
 
         # Central widget and layout
@@ -179,8 +85,12 @@ class MainWindow(QMainWindow):
         self.setCentralWidget(self.centralWidget)
         layout = QHBoxLayout()
 
-        # List and search
-        self.list_widget = QListWidget()
+        # List and search. Rows are painted by the delegate, so only visible entries cost anything
+        self.repo_model = RepoListModel(self)
+        self.list_widget = QListView()
+        self.list_widget.setModel(self.repo_model)
+        self.list_widget.setItemDelegate(RepoItemDelegate(self.list_widget))
+        self.list_widget.setUniformItemSizes(True)
         self.search_bar = QLineEdit()
         self.search_bar.setPlaceholderText("Search...")
 
@@ -204,9 +114,8 @@ class MainWindow(QMainWindow):
         layout.addLayout(list_layout)
         layout.addWidget(self.detail_view)
 
-        self.list_widget.itemClicked.connect(self.display_item)
+        self.list_widget.clicked.connect(self.display_item)
 
-        self.repos = []  # List to store repo objects
         self.centralWidget.setLayout(layout)
 
         #Initialize at full screen windowed
@@ -217,37 +126,63 @@ class MainWindow(QMainWindow):
         self.menu = VerticalMenu(self, self.styler)
         self.display_downloads() # Function to display all downloaded models as widgets. This must run as it is the inital state of the application
     
+    @property
+    def repos(self) -> list[RepoRecord]:
+        """
+        The repository entries currently listed, backed by the list model.
+
+        Returns:
+            list[RepoRecord]: The entries in display order.
+        """
+        return self.repo_model.records
+
     def display_downloads(self):
         """
-        Displays downloaded models in the list widget. It reads JSON data from a directory and populates the list.
+        Displays downloaded models in the list view. It reads the installed models manifest and populates the list.
         This method sets up initial view state of the application, displaying all downloaded models.
         """
-        # Clear the current items in the list widget to refresh the display
-        self.list_widget.clear()
-        
-        # Retrieve the list of installed repositories using the provided method
-        installed_models_list = self.process_json_files(REPO_JSONS_DIR)
-        self.repos = []
-        
-        # Iterate over each repository info dictionary and create a repository widget for it
-        for repo_dict in installed_models_list:
-            # Create a temporary repository object from dictionary
-            repo_entry = RepoTempObj(repo_dict)
-            print(repo_entry)
-            # Append to the list of repository objects
-            self.repos.append(repo_entry)
-            
-            # Create the custom widget to display the repository information
-            repo_widget = RepoWidget(repo_entry)
-            
-            # Create a QListWidgetItem and set its size hint to the size of the repo widget
-            item = QListWidgetItem()
-            item.setSizeHint(repo_widget.sizeHint())
-            
-            # Add the item to the list widget and set the custom widget to be displayed in the list item
-            self.list_widget.addItem(item)
-            self.list_widget.setItemWidget(item, repo_widget)
-        
+        # Retrieve the list of installed repositories from the manifest, a single cached file read
+        installed_models_list = self.manifest.entries()
+
+        # Replace the model contents in one reset, the delegate paints each entry on demand
+        self.repo_model.set_records([RepoRecord.from_dict(repo_dict) for repo_dict in installed_models_list])
+        self.showing_downloads = True
+
+    def on_manifest_changed(self, action: str, entry: dict) -> None:
+        """
+        Updates the single affected row when a model is installed or removed, instead of reloading the whole list.
+
+        Args:
+            action (str): 'upsert' when the entry was added or updated, 'remove' when it was removed.
+            entry (dict): The manifest entry that changed.
+        """
+        row = self.repo_model.find_row(entry["url"])
+        if self.showing_downloads:
+            if action == "remove":
+                self.repo_model.remove_record(row)
+            elif row >= 0:
+                self.repo_model.replace_record(row, RepoRecord.from_dict(entry))
+            else:
+                self.repo_model.append_records([RepoRecord.from_dict(entry)])
+        elif row >= 0:
+            # Search results only reflect the installed status of the entry
+            record = self.repo_model.record(row)
+            self.repo_model.replace_record(row, record.with_installed(action == "upsert"))
+
+    def on_env_registry_changed(self) -> None:
+        """
+        Updates the installed status of listed models whose conda environment was created or removed outside the application.
+        """
+        added, removed = self.env_registry.refresh()
+        if not added and not removed:
+            return
+        installed_urls = self.manifest.urls()
+        for row, record in enumerate(self.repo_model.records):
+            if record.name in added and record.url in installed_urls:
+                self.repo_model.replace_record(row, record.with_installed(True))
+            elif record.name in removed:
+                print(f"Environment for {record.name} was removed outside the application")
+                self.repo_model.replace_record(row, record.with_installed(False))
 
     def create_menus(self):
         """
@@ -257,10 +192,25 @@ class MainWindow(QMainWindow):
 
     def setup_detail_views(self):
         """
-        Sets up the detailed view components of the application.
+        Sets up the detailed view components of the application. The model page is only built when a repository is
+        first selected, so its imports and widgets are not part of startup.
+        """
+        self._model_page = None
+        self.detail_view.addWidget(QWidget())  # Placeholder until the model page exists
+
+    @property
+    def model_page(self):
+        """
+        The page showing the selected repository, built and added to the detail view on first access.
+
+        Returns:
+            ModelPage: The model page.
         """
-        self.model_page = ModelPage(self.styler, self)
-        self.detail_view.addWidget(self.model_page)
+        if self._model_page is None:
+            from model_page import ModelPage
+            self._model_page = ModelPage(self.styler, self)
+            self.detail_view.addWidget(self._model_page)
+        return self._model_page
 
     @Slot()
     def trigger_search(self):
@@ -272,55 +222,65 @@ class MainWindow(QMainWindow):
         if searchText:  # Only search if there's text
             self.search_items(searchText)
 
-    def process_json_files(self, directory: str) -> list[dict]:
-        """
-        Reads and processes JSON files from a specified directory to extract repository data.
-
-        Args:
-            directory (str): Path to the directory containing JSON files.
-
-        Returns:
-            list[dict]: A list of dictionaries containing repository data.
-        """
-        installed_list: list[dict] = []
-        # Iterate over each file in the directory
-        for filename in os.listdir(directory):
-
-            # Check if the file is a JSON file
-            if filename.endswith('.json'):
-                # Construct the full file path
-                filepath = os.path.join(directory, filename)
-                # Open and read the JSON file
-                with open(filepath, 'r') as file:
-                    data: dict = json.load(file)
-                    # Process the data (for demonstration, we'll just print it)
-                    installed_list.append(data)
-
-        return installed_list
-
+    @traced("ui.search")
     def search_items(self, text: str):
         """
-        Filters repositories based on a search query and updates the list widget with the results.
+        Filters repositories based on a search query and updates the list view with the results.
+        The first page of results is shown immediately, further pages are fetched as the list is scrolled to the end.
+        When remote search is unavailable the installed models are searched instead.
 
         Args:
             text (str): The search query used to filter repository listings.
         """
-        self.list_widget.clear()  # Clear current items
-        self.repos.clear()  # Clear the repository list
-        found_repos = self.caller.get_repo_list(text.lower().replace(" ", "-"))
-        
-        # Add functionality for searching through the installed repos
+        query = text.lower().replace(" ", "-")
+        found_repos = self.caller.get_repo_list(query)
+        if found_repos is None:
+            # Offline, or the remote search failed, so the installed models are searched instead
+            self.repo_model.set_records(self.search_installed(text))
+            self.showing_downloads = False
+            return
+        installed_urls = self.manifest.urls()
+
+        def to_records(results: list) -> list[RepoRecord]:
+            records = [RepoRecord.from_pwc(result) for result in results]
+            return [record.with_installed(record.url in installed_urls) for record in records]
+
+        self.repo_model.set_records(to_records(found_repos.results))
+        self.showing_downloads = False
+
+        next_page = [found_repos.next_page]
+
+        def fetch_next_page() -> list | None:  # Run on the thread pool by the model, so it must not touch widgets
+            if next_page[0] is None:
+                return None
+            page = self.caller.get_repo_list(query, page=next_page[0])
+            if page is None:
+                return None
+            next_page[0] = page.next_page
+            return to_records(page.results)
+
+        if next_page[0] is not None:
+            self.repo_model.set_fetcher(fetch_next_page)
+
+    def search_installed(self, text: str) -> list[RepoRecord]:
+        """
+        Searches the installed models locally, used when remote search is unavailable. Every word of the query has to
+        appear in the name, owner or description of a model.
 
+        Args:
+            text (str): The search query.
 
-        resulting_repos: list = found_repos.results
-        
-        for repo in resulting_repos:
-            self.repos.append(repo)  # Add the repo object to the list
-            repo_widget = RepoWidget(repo)
-            item = QListWidgetItem()
-            item.setSizeHint(repo_widget.sizeHint())
-            self.list_widget.addItem(item)
-            self.list_widget.setItemWidget(item, repo_widget)
+        Returns:
+            list[RepoRecord]: The matching installed models.
+        """
+        terms = text.lower().replace("-", " ").split()
+        matches = []
+        for entry in self.manifest.entries():
+            record = RepoRecord.from_dict(entry)
+            haystack = f"{record.name} {record.owner} {record.description}".lower().replace("-", " ")
+            if all(term in haystack for term in terms):
+                matches.append(record)
+        return matches
 
     def update_style(self) -> None:
         """
@@ -328,16 +288,19 @@ class MainWindow(QMainWindow):
         """
         pass
 
-    @Slot()
-    def display_item(self):
+    @Slot(QModelIndex)
+    @traced("ui.display_item")
+    def display_item(self, index: QModelIndex):
         """
-        Displays details of the selected repository in the detail view when an item is selected from the list widget.
+        Displays details of the selected repository in the detail view when an item is selected from the list view.
+
+        Args:
+            index (QModelIndex): The index of the clicked entry.
         """
         print("displaying item")
-        current_row = self.list_widget.currentRow()  # Get the currently selected item's row
-        print(current_row)
-        if 0 <= current_row < len(self.repos):
-            repo = self.repos[current_row]
+        repo = self.repo_model.record(index.row())
+        print(index.row())
+        if repo is not None:
             if self.model_page.install_page:
                 self.model_page.install_page.change_to_main_model_page() # Ensure that main model page is displayed
                 
@@ -345,8 +308,18 @@ class MainWindow(QMainWindow):
             self.detail_view.setCurrentWidget(self.model_page)
 
 if __name__ == "__main__":
+    if PROFILE_FLAG in sys.argv and not is_profiling_child():
+        # Re-runs the application with -X importtime and reports the import costs and the time to the first paint
+        sys.exit(profile_startup(os.path.abspath(__file__), sys.argv[1:]))
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    prepare_application() # QtWebEngine requires shared OpenGL contexts to be set before the application exists
     app = QApplication(sys.argv)
     styler = Styler()
     mainWindow = MainWindow(styler)
+    install_first_paint_probe(mainWindow)
+    stall_monitor = StallMonitor.from_environment(parent=mainWindow) # Logs the main thread's stack when the GUI freezes
+    if stall_monitor is not None:
+        stall_monitor.start()
+        app.aboutToQuit.connect(lambda: (stall_monitor.stop(), print(stall_monitor.report())))
     mainWindow.show()
     sys.exit(app.exec())
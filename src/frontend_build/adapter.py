@@ -1,16 +1,62 @@
+import io
 import os
 import sys
-from PySide6.QtWidgets import QWidget, QApplication, QHBoxLayout
+import shutil
+import platform
+import contextlib
+from PySide6.QtWidgets import QWidget, QApplication, QVBoxLayout, QCheckBox
 from PySide6.QtCore import Signal
+from PySide6.QtGui import QImage
+
+module_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+if module_dir not in sys.path:
+    sys.path.append(module_dir)
 
 from model_uis import LLMPlayer, DragAndDropPlayer, DefaultPlayer # Implemented elsewhere assume they only return values when the receive them from their user interaction widgets via a slot
+from result_cache import ResultCache, get_result_cache, result_key, hash_text
+from input_store import get_input_store, hash_file
+
+class _Tee(io.TextIOBase):
+    """Writes to a stream while keeping a copy of everything written."""
+    def __init__(self, stream) -> None:
+        self.stream = stream
+        self.buffer = io.StringIO()
+
+    def write(self, text: str) -> int:
+        self.buffer.write(text)
+        if self.stream is not None:
+            self.stream.write(text)
+        return len(text)
+
+    def flush(self) -> None:
+        if self.stream is not None:
+            self.stream.flush()
 
 class Adapter(QWidget):
+    """
+    Connects a model script to the player widget for its model type. Input from the player is passed to the script
+    through inputReady, and the script shows its result with display_output.
+
+    Results are cached by (environment, Python version, script hash, input hash). When the same script in the same
+    environment receives an input it already processed, the stored output is shown and the files the run produced are
+    restored without emitting inputReady. Checking "Force re-run" runs the model anyway and replaces the stored result.
+    Chat prompts are never cached, since their answer depends on the conversation before them. Runs whose slot raised
+    are not cached either, so failures are never replayed.
+
+    Attributes:
+        inputReady (Signal): Emitted with the input when the model has to run on it.
+        result_cache (ResultCache): The cache results are stored in.
+        force_rerun_box (QCheckBox): When checked, cached results are ignored.
+    """
     inputReady = Signal(str)  # Defines a signal to emit when input is ready
+    UNCACHED_MODEL_TYPES = ("LLM",) # Players whose inputs are turns of a conversation rather than whole inputs
 
-    def __init__(self, model_type: str) -> None:
+    def __init__(self, model_type: str, result_cache: ResultCache | None = None) -> None:
         super().__init__()  # Initialize the QWidget base class
         self.model_type = model_type
+        self.result_cache = result_cache or get_result_cache()
+        self._script_hash: str | None = None
+        self._pending: dict | None = None  # The key and captured output of the run in progress
         self.init_UI()
 
     def init_UI(self) -> None:
@@ -20,19 +66,167 @@ class Adapter(QWidget):
             "LLM": LLMPlayer(),
         }
         self.player = self.model_input_widget_dict[self.model_type]
-        self.mainLayout = QHBoxLayout()  # Correctly create an instance of QHBoxLayout
+        self.mainLayout = QVBoxLayout()
         if not isinstance(self.player, QWidget):
             raise TypeError("Model Player incorrectly initialized")
         self.player.inputReceived.connect(self.handle_input)
         self.mainLayout.addWidget(self.player)
+        self.force_rerun_box = QCheckBox("Force re-run")
+        self.force_rerun_box.setToolTip("Run the model even if this input was already processed by this script")
+        self.mainLayout.addWidget(self.force_rerun_box)
         self.setLayout(self.mainLayout)  # Set the layout to the widget
 
+    @staticmethod
+    def runtime_identity() -> tuple[str, str]:
+        """
+        Identifies the environment the script runs in.
+
+        Returns:
+            tuple[str, str]: The conda environment name and the Python version.
+        """
+        env_name = os.environ.get("CONDA_DEFAULT_ENV") or os.path.basename(sys.prefix)
+        return env_name, platform.python_version()
+
+    def script_hash(self) -> str:
+        """
+        Hashes the running script, so editing the script invalidates its cached results.
+
+        Returns:
+            str: The hex digest of the script's content, or of an empty string when there is no script file.
+        """
+        if self._script_hash is None:
+            script = getattr(sys.modules.get("__main__"), "__file__", None)
+            try:
+                self._script_hash = hash_file(script) if script else hash_text("")
+            except OSError:
+                self._script_hash = hash_text("")
+        return self._script_hash
+
+    @staticmethod
+    def input_hash(input_data: str) -> str:
+        """
+        Hashes an input. Stored inputs are identified by their digest without reading them, other files are hashed,
+        and text is hashed as is.
+
+        Args:
+            input_data (str): A file path or a text input.
+
+        Returns:
+            str: The hex digest of the input's content.
+        """
+        if os.path.isfile(input_data):
+            entry = get_input_store().find_by_path(input_data)
+            return entry["digest"] if entry is not None else hash_file(input_data)
+        return hash_text(input_data)
+
+    @staticmethod
+    def _snapshot(directory: str) -> dict[str, tuple[int, int]]:
+        """Records the files in a directory with their modification time and size."""
+        files = {}
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_file():
+                        stat = entry.stat()
+                        files[entry.path] = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            pass
+        return files
+
     def handle_input(self, input_data):
-        """Slot to handle input data from the player."""
-        if isinstance(input_data, str):
-            self.inputReady.emit(input_data)  # Emit the signal with the input data
+        """Slot to handle input data from the player. A stored input is pinned while the model runs on it."""
+        if not isinstance(input_data, str):
+            return
+        store = get_input_store()
+        entry = store.find_by_path(input_data) if os.path.isfile(input_data) else None
+        if entry is not None:
+            store.pin(entry["digest"])  # The input cannot be evicted or cleared while the model runs on it
+        try:
+            self.run_input(input_data, entry)
+        finally:
+            if entry is not None:
+                store.unpin(entry["digest"])
+
+    def run_input(self, input_data: str, entry: dict | None) -> None:
+        """
+        Runs the model on an input, or replays its cached result.
+
+        Args:
+            input_data (str): A file path or a text input.
+            entry (dict | None): The input's entry in the input store, None if it is not a stored input.
+        """
+        if self.model_type in self.UNCACHED_MODEL_TYPES:
+            self.inputReady.emit(input_data)
+            return
+        env_name, python_version = self.runtime_identity()
+        parts = {"env_name": env_name, "python_version": python_version, "script_hash": self.script_hash(),
+                 "input_hash": entry["digest"] if entry is not None else self.input_hash(input_data)}
+        key = result_key(**parts)
+        if not self.force_rerun_box.isChecked():
+            cached = self.result_cache.get(key)
+            if cached is not None:
+                self.replay(cached)
+                return
+
+        # The script's slot runs inside emit, so what it prints and the files it writes belong to this input
+        working_dir = os.getcwd()
+        before = self._snapshot(working_dir)
+        tee = _Tee(sys.stdout)
+        self._pending = {"key": key, "parts": parts, "tee": tee, "working_dir": working_dir, "before": before}
+        # Qt reports an exception raised in a slot through sys.excepthook instead of raising it from emit
+        excepthook = sys.excepthook
+        failures = []
+
+        def record_failure(*exc_info) -> None:
+            failures.append(exc_info[1])
+            excepthook(*exc_info)
+        sys.excepthook = record_failure
+        try:
+            with contextlib.redirect_stdout(tee):
+                self.inputReady.emit(input_data)  # Emit the signal with the input data
+        finally:
+            sys.excepthook = excepthook
+            pending, self._pending = self._pending, None
+        if pending is not None and "output" in pending and not failures:
+            self.store_result(pending)
+
+    def replay(self, cached: dict) -> None:
+        """
+        Shows a cached result: restores the files the run produced, reprints its output and displays it.
+
+        Args:
+            cached (dict): The result's metadata from the result cache.
+        """
+        working_dir = os.getcwd()
+        for path in cached["file_paths"]:
+            try:
+                shutil.copy2(path, os.path.join(working_dir, os.path.basename(path)))
+            except OSError as e:
+                print(f"Could not restore {os.path.basename(path)} from the result cache: {e}")
+        if cached.get("stdout"):
+            sys.stdout.write(cached["stdout"])
+        print("Result served from the result cache, check 'Force re-run' to run the model again")
+        if cached["output_type"] == "image":
+            self.player.displayOutput(QImage(cached["output_path"]))
+        else:
+            self.player.displayOutput(cached["text"])
+
+    def store_result(self, pending: dict) -> None:
+        """Stores the output of a finished run with what it printed and the files it produced."""
+        output = pending["output"]
+        after = self._snapshot(pending["working_dir"])
+        produced = [path for path, stamp in after.items() if pending["before"].get(path) != stamp]
+        if isinstance(output, QImage):
+            self.result_cache.put(pending["key"], pending["parts"], "image",
+                                  write_image=lambda path: output.save(path, "PNG"),
+                                  stdout=pending["tee"].buffer.getvalue(), files=produced, exit_code=0)
+        elif isinstance(output, str):
+            self.result_cache.put(pending["key"], pending["parts"], "text", text=output,
+                                  stdout=pending["tee"].buffer.getvalue(), files=produced, exit_code=0)
 
     def display_output(self, output) -> None:
+        if self._pending is not None:
+            self._pending["output"] = output  # Stored once the script's slot returns
         self.player.displayOutput(output)
 
 
@@ -46,4 +240,4 @@ if __name__ == "__main__":
         x = data
         adapter.display_output(x)  # Optionally, display some output
 
-    sys.exit(app.exec())  # Start the event loop and exit the application appropriately
\ No newline at end of file
+    sys.exit(app.exec())  # Start the event loop and exit the application appropriately
@@ -0,0 +1,135 @@
+import time
+import threading
+from typing import Callable
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+from log_stream import LogStream
+
+class _ChatTask(QRunnable):
+    """
+    Runs one chat request on the thread pool, feeding the response into the stream as it arrives.
+    """
+    def __init__(self, stream: "ChatStream", generation: int, request: Callable[..., str]) -> None:
+        super().__init__()
+        self.stream = stream
+        self.generation = generation
+        self.request = request
+
+    def run(self) -> None:
+        delivered = False
+
+        def on_delta(text: str) -> None:
+            nonlocal delivered
+            delivered = self.stream._feed(self.generation, text) or delivered
+
+        try:
+            text = self.request(on_delta=on_delta, is_cancelled=lambda: self.stream.is_cancelled(self.generation))
+        except Exception as e:
+            text = f"Failed to get a response: {e}"
+        if not delivered:
+            self.stream._feed(self.generation, text)  # Messages that were not streamed, such as errors, are shown whole
+        self.stream._finished.emit(self.generation, text)
+
+class ChatStream(QObject):
+    """
+    Runs chat requests off the GUI thread and delivers their responses piece by piece.
+
+    Pieces are coalesced by a LogStream, so a fast stream costs one GUI update every `interval_ms` milliseconds instead
+    of one per token. Only one request runs at a time. Starting a request or calling `cancel` supersedes the previous
+    one: its remaining pieces are dropped and its connection is closed at the next piece it receives.
+
+    Attributes:
+        deltaReady (Signal): Emitted on the GUI thread with the text received since the last emission.
+        finished (Signal): Emitted on the GUI thread with the response text and whether it was cancelled.
+        generation (int): The generation of the most recent request.
+        running (bool): True while a request is in progress.
+        time_to_first_token (float | None): Seconds from the start of the last request to its first piece.
+    """
+    deltaReady = Signal(str)
+    finished = Signal(str, bool)
+    _finished = Signal(int, str)
+
+    def __init__(self, interval_ms: int = 50, parent=None) -> None:
+        """
+        Initializes the stream. It must be created on the GUI thread.
+
+        Args:
+            interval_ms (int): How often pieces are delivered, in milliseconds. Defaults to 50.
+            parent (QObject, optional): The parent object. Defaults to None.
+        """
+        super().__init__(parent)
+        self.generation = 0
+        self.running = False
+        self.time_to_first_token: float | None = None
+        self._started_at = 0.0
+        self._lock = threading.Lock()
+        self._log = LogStream(interval_ms=interval_ms, parent=self)
+        self._log.frameReady.connect(self.deltaReady)
+        self._finished.connect(self._on_finished)
+
+    def start(self, request: Callable[..., str]) -> int:
+        """
+        Starts a request, cancelling the one in progress.
+
+        Args:
+            request (Callable[..., str]): A GPTCaller request method, called on a worker thread with the `on_delta` and
+                `is_cancelled` keyword arguments.
+
+        Returns:
+            int: The generation of the request.
+        """
+        if self.running:
+            self.cancel()
+        with self._lock:
+            self.generation += 1
+            generation = self.generation
+        self.running = True
+        self.time_to_first_token = None
+        self._started_at = time.perf_counter()
+        self._log.start()
+        QThreadPool.globalInstance().start(_ChatTask(self, generation, request))
+        return generation
+
+    def is_cancelled(self, generation: int) -> bool:
+        """
+        Checks whether a request was superseded or cancelled.
+
+        Args:
+            generation (int): The generation of the request.
+
+        Returns:
+            bool: True if the request should stop.
+        """
+        with self._lock:
+            return generation != self.generation
+
+    def cancel(self) -> None:
+        """Cancels the request in progress, delivering what was received so far and emitting `finished`."""
+        if not self.running:
+            return
+        with self._lock:
+            self.generation += 1
+        self._finish("", cancelled=True)
+
+    def _feed(self, generation: int, text: str) -> bool:
+        """Buffers a piece of a response unless its request was cancelled. Called from the worker thread."""
+        with self._lock: # Held while feeding, so no piece of a cancelled request is buffered after `cancel` returns
+            if generation != self.generation:
+                return False
+            if self.time_to_first_token is None:
+                self.time_to_first_token = time.perf_counter() - self._started_at
+            # A bare carriage return would make the buffer overwrite the previous piece, as it does for progress bars
+            self._log.feed(text.replace('\r\n', '\n').replace('\r', '\n'))
+            return True
+
+    def _on_finished(self, generation: int, text: str) -> None:
+        if generation == self.generation and self.running:
+            self._finish(text, cancelled=False)
+
+    def _finish(self, text: str, cancelled: bool) -> None:
+        self.running = False
+        self._log.stop()  # Delivers the pieces still buffered before `finished`
+        if self.time_to_first_token is not None:
+            print(f"Chat response: first token after {self.time_to_first_token:.2f} s, "
+                  f"complete after {time.perf_counter() - self._started_at:.2f} s")
+        self.finished.emit(text, cancelled)
@@ -1,6 +1,5 @@
 import os
 import sys
-import shutil
 from PySide6.QtWidgets import QWidget, QVBoxLayout, QLabel
 from PySide6.QtCore import Qt, Signal
 
@@ -9,13 +8,18 @@ module_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
 if module_dir not in sys.path:
     sys.path.append(module_dir)
 
-from directories import DRAG_N_DROP_DIR
+from file_intake import get_file_intake
+from input_store import PinnedInput
 
 class FileDropWidget(QWidget):
     """A widget that supports dragging and dropping files into it.
+    Dropped files are added to the input store through the shared FileIntake, which links them instead of copying
+    whenever possible and reuses an input that was dropped before. The dropped input stays pinned in the store until
+    another file is dropped or the widget is destroyed.
     
     Attributes:
-        filesDropped (Signal): Custom signal that emits the path of the dropped file.
+        selection (PinnedInput): The dropped input, pinned in the input store.
+        filesDropped (Signal): Custom signal that emits the path of the dropped file in the input store.
     """
     
     
@@ -25,6 +29,8 @@ class FileDropWidget(QWidget):
         """Initialize the FileDropWidget with drag and drop enabled."""
         super().__init__()
         self.setAcceptDrops(True)
+        self.selection = selection = PinnedInput()
+        self.destroyed.connect(lambda: selection.release())
         self.init_ui()
 
     def init_ui(self):
@@ -61,18 +67,19 @@ class FileDropWidget(QWidget):
             if first_file_url.isLocalFile():
                 src_path = first_file_url.toLocalFile()
                 if os.path.isfile(src_path):  # Check if it's a file not a directory
+                    # Earlier inputs are kept, the file is stored next to them or reuses an identical one
                     file_name = os.path.basename(src_path)
-                    dest_path = os.path.join(DRAG_N_DROP_DIR, file_name)
+                    self.label.setText(f"Adding {file_name}...")
+                    get_file_intake().intake(src_path, self.on_file_ready, self.on_copy_progress,
+                                             lambda message: print(f"Could not take in file {src_path}: {message}"))
 
-                    # Clear existing files in the directory
-                    for existing_file in os.listdir(DRAG_N_DROP_DIR):
-                        os.remove(os.path.join(DRAG_N_DROP_DIR, existing_file))
+    def on_file_ready(self, dest_path: str, method: str):
+        """Shows the dropped file once it is in the input store, pins it and emits its path."""
+        entry = self.selection.select(dest_path)
+        self.label.setText(entry["name"] if entry is not None else os.path.basename(dest_path))  # Stored objects are named by digest
+        self.label.setStyleSheet("color: #000000; font-style: normal;")
+        self.filesDropped.emit(dest_path)  # Emit signal with path of the stored input
 
-                    # Copy the new file
-                    try:
-                        shutil.copy(src_path, dest_path)
-                        self.label.setText(file_name)  # Update label to show copied file
-                        self.label.setStyleSheet("color: #000000; font-style: normal;")
-                        self.filesDropped.emit(dest_path)  # Emit signal with path of copied file
-                    except Exception as e:
-                        print(f"Could not copy file {src_path} to {dest_path}: {e}")
+    def on_copy_progress(self, percent: int):
+        """Shows the progress of a file that has to be copied."""
+        self.label.setText(f"Copying... {percent}%")
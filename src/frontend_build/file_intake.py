@@ -0,0 +1,130 @@
+import os
+import sys
+from typing import Callable
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+module_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+if module_dir not in sys.path:
+    sys.path.append(module_dir)
+
+from input_store import InputStore, get_input_store
+
+class _IntakeTask(QRunnable):
+    """
+    Adds one file to the input store on the thread pool, so hashing and any copying never block the GUI.
+    """
+    def __init__(self, intake: "FileIntake", ticket: int, src_path: str) -> None:
+        super().__init__()
+        self.intake = intake
+        self.ticket = ticket
+        self.src_path = src_path
+        self._reported = -1
+
+    def _progress(self, stage: str, done: int, total: int) -> None:
+        if stage != 'copy':
+            return
+        percent = done * 100 // (total or 1)
+        if percent != self._reported:
+            self._reported = percent
+            self.intake._progressed.emit(self.ticket, percent)
+
+    def run(self) -> None:
+        try:
+            entry, method = self.intake.store.add(self.src_path, self._progress)
+            self.intake._finished.emit(self.ticket, entry["path"], method)
+        except Exception as e:
+            self.intake._failed.emit(self.ticket, str(e))
+
+class FileIntake(QObject):
+    """
+    Brings dropped files into the input store in the background and reports back on the GUI thread.
+
+    The store links a file in instead of copying it whenever the file system allows, and reuses the stored input when
+    the same content was dropped before. Earlier inputs are never removed by a drop, clearing them is left to the user.
+
+    Attributes:
+        store (InputStore): The store files are added to.
+    """
+    _finished = Signal(int, str, str)
+    _progressed = Signal(int, int)
+    _failed = Signal(int, str)
+
+    def __init__(self, store: InputStore | None = None, parent=None) -> None:
+        """
+        Initializes the intake.
+
+        Args:
+            store (InputStore | None): The store files are added to. Defaults to the shared input store.
+            parent (QObject, optional): The parent object. Defaults to None.
+        """
+        super().__init__(parent)
+        self.store = store or get_input_store()
+        self._callbacks: dict[int, tuple[Callable, Callable | None, Callable | None]] = {}
+        self._next_ticket = 0
+        self._finished.connect(self._on_finished)
+        self._progressed.connect(self._on_progressed)
+        self._failed.connect(self._on_failed)
+
+    def intake(self, src_path: str, on_ready: Callable[[str, str], None],
+               on_progress: Callable[[int], None] | None = None, on_error: Callable[[str], None] | None = None) -> int:
+        """
+        Adds a file to the input store in the background. The callbacks are called on the GUI thread.
+
+        Args:
+            src_path (str): The file to take in.
+            on_ready (Callable[[str, str], None]): Called with the path of the stored input and how it was stored:
+                'reflink', 'hardlink', 'copy' or 'duplicate' when the same content was already stored.
+            on_progress (Callable[[int], None] | None): Called with the percentage copied when the file has to be copied.
+            on_error (Callable[[str], None] | None): Called with the error message if the file could not be taken in.
+
+        Returns:
+            int: A ticket identifying the request.
+        """
+        self._next_ticket += 1
+        ticket = self._next_ticket
+        self._callbacks[ticket] = (on_ready, on_progress, on_error)
+        QThreadPool.globalInstance().start(_IntakeTask(self, ticket, os.path.abspath(src_path)))
+        return ticket
+
+    def contains(self, path: str) -> bool:
+        """
+        Checks whether a path is a stored input.
+
+        Args:
+            path (str): The path to check.
+
+        Returns:
+            bool: True if the path is an object of the input store.
+        """
+        return self.store.find_by_path(path) is not None
+
+    def _on_finished(self, ticket: int, path: str, method: str) -> None:
+        on_ready, _, _ = self._callbacks.pop(ticket, (None, None, None))
+        if on_ready is not None:
+            on_ready(path, method)
+
+    def _on_progressed(self, ticket: int, percent: int) -> None:
+        _, on_progress, _ = self._callbacks.get(ticket, (None, None, None))
+        if on_progress is not None:
+            on_progress(percent)
+
+    def _on_failed(self, ticket: int, message: str) -> None:
+        _, _, on_error = self._callbacks.pop(ticket, (None, None, None))
+        if on_error is not None:
+            on_error(message)
+        else:
+            print(f"Could not take in file: {message}")
+
+_intake: FileIntake | None = None
+
+def get_file_intake() -> FileIntake:
+    """
+    Returns the intake shared by every widget that takes in files.
+
+    Returns:
+        FileIntake: The shared intake.
+    """
+    global _intake
+    if _intake is None:
+        _intake = FileIntake()
+    return _intake
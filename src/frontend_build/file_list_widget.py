@@ -1,87 +1,141 @@
 import os
 import sys
-import shutil
-from PySide6.QtWidgets import QListWidget, QMessageBox
+from PySide6.QtWidgets import QListWidget, QListWidgetItem, QMessageBox
+from PySide6.QtCore import Qt, Signal
 
 # Remove for final build
 module_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
 if module_dir not in sys.path:
     sys.path.append(module_dir)
 
-from directories import DRAG_N_DROP_DIR
+from fs_watcher import DebouncedWatcher
+from file_intake import get_file_intake
+from input_store import get_input_store, PinnedInput
+from directories import ensure_parent_dir
 
 class FileListWidget(QListWidget):
     """
-    A widget that displays a list of files from a specified directory, allowing for file management within the widget.
+    A widget that lists the stored model inputs, most recently used first. The list is read from the input store's
+    index, so showing it never reads or hashes the files. It is kept in sync through the store's listeners and a
+    DebouncedWatcher on the index, which adds or removes only the entries that changed.
 
     Attributes:
-        folder_path (str): Path to the directory whose files are to be displayed and managed.
+        store (InputStore): The store whose inputs are listed.
+        watcher (DebouncedWatcher): Watches the store's index for inputs added or removed by other processes.
+        selection (PinnedInput): The current input, pinned in the store while it is selected.
+        inputSelected (Signal): Emitted with the path of an input when it is activated, to run a model on it again.
     """
+    inputSelected = Signal(str)
+    _storeChanged = Signal(str, dict)  # Store listeners may run on a worker thread, this delivers them on the GUI thread
+
     def __init__(self, parent=None):
         """
-        Initializes the FileListWidget with a specific parent and sets up the directory from which files will be managed.
+        Initializes the FileListWidget with a specific parent and lists the stored inputs.
 
         Args:
             parent (QWidget, optional): Parent widget. Defaults to None.
         """
         super().__init__(parent)
-        self.folder_path = DRAG_N_DROP_DIR
-        self.ensure_folder_exists(self.folder_path)
+        self.store = get_input_store()
+        self._items: dict[str, QListWidgetItem] = {}
+        self._storeChanged.connect(self.apply_change)
+        store, listener = self.store, self._storeChanged.emit
+        store.add_listener(listener)
+        self.destroyed.connect(lambda: store.remove_listener(listener))
+        self.watcher = DebouncedWatcher(parent=self)
+        self.watcher.watch_file(ensure_parent_dir(self.store.index_path), self.store.refresh) # The store directory must exist to be watched
+        self.selection = selection = PinnedInput(self.store)
+        self.destroyed.connect(lambda: selection.release())
+        self.itemActivated.connect(self.on_item_activated)
+        self.currentItemChanged.connect(self.on_current_item_changed)
         self.populate_initial_list()
 
-    def ensure_folder_exists(self, folder_path):
+    def add_file(self, file_path):
         """
-        Ensures that the specified folder exists. If it doesn't, the folder is created.
+        Adds a file to the input store and the list widget. Stored inputs, such as those taken in by the
+        FileDropWidget, are only listed. Other files are taken in through the shared FileIntake, which links them
+        instead of copying whenever possible and reuses an identical input that is already stored.
 
         Args:
-            folder_path (str): Path to the directory to check and create if necessary.
+            file_path (str): The path of the file to be added to the store and list.
+
+        Shows an error if the file could not be added.
         """
-        if not os.path.exists(folder_path):
-            os.makedirs(folder_path)
+        entry = self.store.find_by_path(file_path)
+        if entry is not None:
+            self.apply_change("add", entry)
+            return
+        get_file_intake().intake(file_path, lambda dest_path, method: self.add_file(dest_path),
+                                 on_error=lambda message: QMessageBox.critical(self, "Error", f"Could not add file: {message}"))
 
-    def add_file(self, file_path):
+    def populate_initial_list(self):
+        """
+        Populates the list widget from the input store's index.
+        This method is called on initialization and when the list is refreshed.
+        """
+        for entry in self.store.entries():
+            self.apply_change("add", entry)
+
+    def apply_change(self, action: str, entry: dict):
         """
-        Adds a file to the folder and the list widget if it does not already exist in the folder.
+        Adds or removes the list entry of an input that was stored in or deleted from the input store.
 
         Args:
-            file_path (str): The path of the file to be added to the directory and list.
+            action (str): 'add' when the input was stored, 'remove' when it was deleted.
+            entry (dict): The input's index entry.
+        """
+        digest = entry["digest"]
+        if action == "remove":
+            item = self._items.pop(digest, None)
+            if item is not None:
+                self.takeItem(self.row(item))
+        elif digest not in self._items:
+            item = QListWidgetItem(entry["name"])
+            item.setData(Qt.UserRole, entry["path"])
+            item.setToolTip(f"{entry['path']}\n{entry['mime']}, {entry['size']:,} bytes")
+            self._items[digest] = item
+            self.addItem(item)
 
-        Shows a warning if the file already exists and an error if the file could not be added.
+    def on_current_item_changed(self, current: QListWidgetItem | None, previous: QListWidgetItem | None):
         """
-        basename = os.path.basename(file_path)
-        dest_path = os.path.join(self.folder_path, basename)
-        if os.path.exists(dest_path):
-            QMessageBox.warning(self, "File Exists", f"A file named {basename} already exists.")
-            return  # Exit the method to avoid overwriting the file and causing an error.
-        try:
-            shutil.copy(file_path, dest_path)
-            self.addItem(basename)  # Changed to add just the file name, not the full path.
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Could not add file: {e}")
+        Pins the selected input and releases the one selected before.
 
+        Args:
+            current (QListWidgetItem | None): The selected item.
+            previous (QListWidgetItem | None): The item selected before.
+        """
+        self.selection.select(current.data(Qt.UserRole) if current is not None else None)
 
-    def populate_initial_list(self):
+    def on_item_activated(self, item: QListWidgetItem):
         """
-        Populates the list widget with file names from the directory.
-        This method is called on initialization and when the list is refreshed.
+        Marks the activated input as used and emits its path.
+
+        Args:
+            item (QListWidgetItem): The activated item.
         """
-        for file_name in os.listdir(self.folder_path):
-            self.addItem(os.path.join(self.folder_path, file_name))
-        # In FileListWidget class
+        path = item.data(Qt.UserRole)
+        entry = self.store.find_by_path(path)
+        if entry is not None:
+            self.store.touch(entry["digest"])
+            self.inputSelected.emit(path)
 
     def update_file_list(self, file_paths):
         """
         Updates the file list by adding new files from a list of file paths.
 
         Args:
-            file_paths (list of str): Paths of the files to be added.
+            file_paths (str | list of str): Path or paths of the files to be added.
         """
+        if isinstance(file_paths, str):
+            file_paths = [file_paths]  # The FileDropWidget emits a single path
         for file_path in file_paths:
             self.add_file(file_path)  # Assuming add_file is your method for adding items
 
     def refresh_list(self):
         """
-        Clears and repopulates the file list to reflect the current state of the folder.
+        Clears and repopulates the file list to reflect the current state of the store.
+        The listeners and the watcher normally keep the list current, so this is only needed to force a full resync.
         """
         self.clear()  # Clear the current list
-        self.populate_initial_list()  # Repopulate list based on the current folder content
+        self._items.clear()
+        self.populate_initial_list()  # Repopulate list based on the current store content
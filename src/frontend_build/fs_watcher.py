@@ -0,0 +1,127 @@
+import os
+from typing import Callable
+from PySide6.QtCore import QObject, QFileSystemWatcher, QTimer, Slot
+
+class DebouncedWatcher(QObject):
+    """
+    Watches files and directories through QFileSystemWatcher (inotify on Linux) and reports changes as debounced deltas,
+    so views can update the affected entries instead of polling or rebuilding themselves.
+
+    Bursts of events, such as a copy writing a file in many chunks or an atomic replace, are coalesced and handled
+    once `debounce_ms` milliseconds after the last event. Watched files are also tracked through their parent directory,
+    which lets the watcher pick a file back up after it was replaced by a rename or created for the first time.
+
+    QFileSystemWatcher does not report which entries of a directory changed, so a directory change costs a single
+    listing of entry names, which is compared against the previous listing. No file in the directory is opened or stat'ed.
+
+    Attributes:
+        debounce_ms (int): The quiet period after the last event before callbacks run, in milliseconds.
+    """
+    def __init__(self, debounce_ms: int = 150, parent=None) -> None:
+        """
+        Initializes the watcher.
+
+        Args:
+            debounce_ms (int): The quiet period after the last event before callbacks run. Defaults to 150.
+            parent (QObject, optional): The parent object. Defaults to None.
+        """
+        super().__init__(parent)
+        self.debounce_ms = debounce_ms
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.fileChanged.connect(self._on_event)
+        self._watcher.directoryChanged.connect(self._on_event)
+        self._file_callbacks: dict[str, list[Callable[[], None]]] = {}
+        self._dir_callbacks: dict[str, list[Callable[[set[str], set[str]], None]]] = {}
+        self._snapshots: dict[str, set[str]] = {}
+        self._pending: set[str] = set()
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(debounce_ms)
+        self._timer.timeout.connect(self._dispatch)
+
+    @staticmethod
+    def _normalize(path: str) -> str:
+        return os.path.abspath(path)
+
+    @staticmethod
+    def _list_names(directory: str) -> set[str]:
+        """Returns the entry names of a directory, or an empty set if it cannot be listed."""
+        try:
+            with os.scandir(directory) as entries:
+                return {entry.name for entry in entries}
+        except OSError:
+            return set()
+
+    def _add_path(self, path: str) -> None:
+        """Adds a path to the underlying watcher if it exists and is not watched yet."""
+        if os.path.exists(path) and path not in self._watcher.files() and path not in self._watcher.directories():
+            self._watcher.addPath(path)
+
+    def watch_file(self, path: str, callback: Callable[[], None]) -> None:
+        """
+        Calls `callback` whenever a file is modified, replaced, created or removed.
+
+        Args:
+            path (str): The path of the file. It does not need to exist yet.
+            callback (Callable[[], None]): The function to call after a burst of changes.
+        """
+        path = self._normalize(path)
+        self._file_callbacks.setdefault(path, []).append(callback)
+        self._add_path(path)
+        parent_dir = os.path.dirname(path)
+        if parent_dir not in self._snapshots:
+            self._snapshots[parent_dir] = self._list_names(parent_dir)
+        self._add_path(parent_dir)
+
+    def watch_directory(self, path: str, callback: Callable[[set[str], set[str]], None]) -> set[str]:
+        """
+        Calls `callback(added, removed)` with the names of entries that appeared in or disappeared from a directory.
+
+        Args:
+            path (str): The path of the directory.
+            callback (Callable[[set[str], set[str]], None]): The function to call with the added and removed entry names.
+
+        Returns:
+            set[str]: The entry names currently in the directory, to populate a view with.
+        """
+        path = self._normalize(path)
+        self._dir_callbacks.setdefault(path, []).append(callback)
+        if path not in self._snapshots:
+            self._snapshots[path] = self._list_names(path)
+        self._add_path(path)
+        return set(self._snapshots[path])
+
+    @Slot(str)
+    def _on_event(self, path: str) -> None:
+        """Records a changed path and restarts the debounce timer."""
+        self._pending.add(path)
+        self._timer.start()
+
+    def _dispatch(self) -> None:
+        """Runs the callbacks for every path that changed during the last burst of events."""
+        pending, self._pending = self._pending, set()
+        changed_files: set[str] = set()
+        for path in pending:
+            if path in self._file_callbacks:
+                changed_files.add(path)
+            if path not in self._snapshots:
+                continue
+            names = self._list_names(path)
+            added, removed = names - self._snapshots[path], self._snapshots[path] - names
+            self._snapshots[path] = names
+            if not added and not removed:
+                continue
+            # Watched files created, or replaced by a rename, show up as directory changes
+            for name in added | removed:
+                file_path = os.path.join(path, name)
+                if file_path in self._file_callbacks:
+                    changed_files.add(file_path)
+            for callback in self._dir_callbacks.get(path, []):
+                callback(added, removed)
+        for file_path in changed_files:
+            # A replaced file is a new inode, so the watch is renewed rather than trusted to have survived
+            if file_path in self._watcher.files():
+                self._watcher.removePath(file_path)
+            self._add_path(file_path)
+            for callback in self._file_callbacks[file_path]:
+                callback()
@@ -1,17 +1,15 @@
-from PySide6.QtWidgets import QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QFrame, QWidget, QSizePolicy, QListWidget, QTextEdit, QMessageBox
+from PySide6.QtWidgets import QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QFrame, QWidget, QSizePolicy, QListWidget, QMessageBox
 from PySide6.QtCore import Qt, QThread, QEventLoop
-from PySide6.QtWebEngineWidgets import QWebEngineView  # Import QWebEngineView
-import markdown
 import sys
 import os
 from PySide6.QtGui import QIcon, QFont
 from typing import Callable
 import subprocess
-import json
 
 # Working dir imports
 from styler import Styler
 from worker import Worker
+from log_stream import LogStream, LogView
 # Calculate the path to the directory containing
 module_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
 if module_dir not in sys.path:
@@ -19,10 +17,11 @@ if module_dir not in sys.path:
 
 # Project imports
 from directories import REPO_JSONS_DIR
+from manifest import get_manifest
 from conda_env import CondaEnvironment
 from repo import Repository
 
-def run_environment_command(widget, worker_name, command: str, error_message: str) -> bool:
+def run_environment_command(widget, worker_name, command: str, error_message: str, env_name: str | None = None) -> bool:
         """
         Executes a specified command in a separate thread and updates the widget based on the command's success or failure.
 
@@ -31,18 +30,20 @@ def run_environment_command(widget, worker_name, command: str, error_message: st
             worker_name (str): A name identifier for the worker thread.
             command (str): The command to be executed by the worker.
             error_message (str): A message to display if the command execution fails.
+            env_name (str | None): The conda environment the command runs in, recorded in the run log index. Optional.
 
         Returns:
             bool: True if the command execution was successful, False otherwise.
         """
-        # Create the worker and thread
-        worker = Worker(worker_name, command, error_message)
+        # Create the stream, worker and thread. The stream lives on the GUI thread and batches output into frames
+        stream = LogStream(parent=widget)
+        stream.frameReady.connect(widget.update_progress_widget)
+        worker = Worker(worker_name, command, error_message, stream, env_name=env_name)
         thread = QThread()
         loop = QEventLoop()  # Event loop to wait for completion
 
         # Move the worker to the thread and connect signals
         worker.moveToThread(thread)
-        worker.output.connect(widget.update_progress_widget)
         thread.started.connect(worker.run_command)
 
         # Use the finished signal to quit the loop and capture the success flag
@@ -50,6 +51,7 @@ def run_environment_command(widget, worker_name, command: str, error_message: st
 
         def on_finished(success):
             success_flag[0] = success
+            stream.stop()  # Deliver the last buffered frame
             loop.quit()
 
         worker.finished.connect(on_finished)
@@ -60,6 +62,7 @@ def run_environment_command(widget, worker_name, command: str, error_message: st
         thread.finished.connect(thread.deleteLater)
 
         # Start the thread and the event loop
+        stream.start()
         thread.start()
         loop.exec()  # This will block until the worker emits `finished`
 
@@ -171,9 +174,8 @@ class InstallPage(QFrame):
         list_layout.addWidget(self.commands_to_run_widget)
 
         # Progress Widget initialization
-        self.progress_subwidget = QTextEdit(self)
+        self.progress_subwidget = LogView(self)
         self.progress_subwidget.setPlaceholderText("Progress Display, Installation output will show up here")
-        self.progress_subwidget.setReadOnly(True)  # Make the progress widget read-only
         self.progress_subwidget.setSizePolicy(QSizePolicy.Preferred, QSizePolicy.Expanding)  # Adjust size policy
 
         # Create a widget for the progress window and label
@@ -200,7 +202,7 @@ class InstallPage(QFrame):
             background-color: #F0F0F0;
             border-radius: 10px;
         }
-        QLineEdit, QTextEdit {
+        QLineEdit, QTextEdit, QPlainTextEdit {
             border: 2px solid #CCCCCC;
             border-radius: 5px;
             padding: 5px;
@@ -258,7 +260,7 @@ class InstallPage(QFrame):
 
         # Environment creation (blocking)
         create_tuple = self.new_env.create()
-        creation_success = run_environment_command(self, worker_name="create",command=create_tuple[0], error_message=create_tuple[1])
+        creation_success = run_environment_command(self, worker_name="create",command=create_tuple[0], error_message=create_tuple[1], env_name=self.new_env.env_name)
         if not creation_success:
             print("Env Creation failed")
             return  # Stop further execution if environment creation fails
@@ -266,7 +268,7 @@ class InstallPage(QFrame):
         # Execute other commands (asynchronously or with a blocking pattern if necessary)
         call_tuple = self.new_env(formatted_command)
         print(call_tuple)
-        if run_environment_command(self, worker_name="call" ,command=call_tuple[0], error_message=call_tuple[1]):
+        if run_environment_command(self, worker_name="call" ,command=call_tuple[0], error_message=call_tuple[1], env_name=self.new_env.env_name):
             self.new_env.is_installed = True
             QMessageBox.information(self, "Success", f"Installation of {self.new_env.repository.repo_name} Successful!\nCheck log for details.")
             self.install_store()
@@ -284,7 +286,7 @@ class InstallPage(QFrame):
         This method handles the cleanup process by deleting the environment and outputs the success status.
         """
         delete_tuple = self.new_env.delete()
-        delete_succes = run_environment_command(self, worker_name="delete", command=delete_tuple[0], error_message=delete_tuple[1])
+        delete_succes = run_environment_command(self, worker_name="delete", command=delete_tuple[0], error_message=delete_tuple[1], env_name=self.new_env.env_name)
         print(f"Environment Deleted: {delete_succes}")
 
     def clear_commands_to_run(self):
@@ -371,25 +373,24 @@ class InstallPage(QFrame):
     
     def update_progress_widget(self, text: str):
         """
-        Appends text to the progress widget, which displays ongoing processes or results.
+        Appends a frame of text to the progress widget, which displays ongoing processes or results.
 
         Args:
-        text (str): The text to be appended to the progress widget. This text typically includes command outputs or status updates.
+        text (str): The frame to be appended to the progress widget. This text typically includes command outputs or status updates.
         """
         
-        # Append text to the progress_widget, ensuring thread safety
-        self.progress_subwidget.append(text)
+        # Frames arrive on the GUI thread already batched by the LogStream
+        self.progress_subwidget.append_frame(text)
     
     def install_store(self):
         """
-        Stores all relevant model information in a JSON file. This includes the model's description, name, URL, type, and owner.
+        Records the model in the installed models manifest. This includes the model's description, name, URL, type, and owner.
 
-        The stored JSON file facilitates later retrieval and management of installed models.
+        The manifest facilitates later retrieval and management of installed models, and notifies open views of the new entry.
         """
         
-        #stores the all model information like description, name, url, model type in a .JSON
+        #stores the all model information like description, name, url, model type in the manifest
         repo: Repository = self.new_env.repository
-        file = os.path.join(REPO_JSONS_DIR, f"{repo.repo_name}.json")
         modelInfo = {
             "name":repo.repo_name,
             "url":repo.repo_url,
@@ -397,17 +398,25 @@ class InstallPage(QFrame):
             "description": repo.description,
             "owner": repo.owner
         }
-        with open(file, "w") as outfile:
-            json.dump(modelInfo, outfile)
+        try:
+            get_manifest().upsert(modelInfo)
+        except OSError as e:
+            print(f"Couldn't store {repo.repo_name} in the installed models manifest: {e}")
 
     def remove_json(self):
         """
-        Attempts to remove the JSON file associated with the environment's repository.
+        Attempts to remove the environment's repository from the installed models manifest, along with any legacy per-model JSON file.
         This method is typically called when uninstalling a model or cleaning up resources.
         """
         repo: Repository = self.new_env.repository
-        file = os.path.join(REPO_JSONS_DIR, f"{repo.repo_name}.json")
         try:
-            os.remove(file)
-        except:
-            print("Couldn't remove " + file)
+            if not get_manifest().remove(repo.repo_url):
+                print(f"{repo.repo_name} was not in the installed models manifest")
+        except OSError as e:
+            print(f"Couldn't remove {repo.repo_name} from the installed models manifest: {e}")
+        legacy_file = os.path.join(REPO_JSONS_DIR, f"{repo.repo_name}.json")
+        if os.path.exists(legacy_file):
+            try:
+                os.remove(legacy_file)
+            except OSError:
+                print("Couldn't remove " + legacy_file)
@@ -1,15 +1,15 @@
 import os
 from PySide6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
-                               QHBoxLayout, QLineEdit, QListWidget, QStackedWidget, QListWidgetItem, QLabel)
+                               QHBoxLayout, QLineEdit, QListView, QStackedWidget)
 
-from PySide6.QtCore import Slot, QCoreApplication
+from PySide6.QtCore import Slot, QCoreApplication, QModelIndex
 import sys
 
 #Local Imports
 from model_page import ModelPage
 from styler import Styler
 from vertical_menu import VerticalMenu
-from FocalAI import RepoWidget
+from repo_list_model import RepoListModel, RepoItemDelegate
 from database import DatabaseManager
 
 module_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
@@ -19,6 +19,7 @@ if module_dir not in sys.path:
 from directories import DB_PATH
 from conda_env import CondaEnvironment
 from repo import Repository
+from repo_record import RepoRecord
 
 
 from api_caller import APIManager
@@ -61,7 +62,11 @@ class InstalledWindow(QWidget):
         layout = QHBoxLayout()
 
         # List and search
-        self.list_widget = QListWidget()
+        self.repo_model = RepoListModel(self)
+        self.list_widget = QListView()
+        self.list_widget.setModel(self.repo_model)
+        self.list_widget.setItemDelegate(RepoItemDelegate(self.list_widget))
+        self.list_widget.setUniformItemSizes(True)
         self.search_bar = QLineEdit()
         self.search_bar.setPlaceholderText("Search...")
 
@@ -79,9 +84,8 @@ class InstalledWindow(QWidget):
         layout.addLayout(list_layout)
         layout.addWidget(self.detail_view)
 
-        self.list_widget.itemClicked.connect(self.display_item)
+        self.list_widget.clicked.connect(self.display_item)
 
-        self.repos = []  # List to store repo objects
         self.centralWidget.setLayout(layout)
 
         #Initialize at full screen windowed
@@ -123,18 +127,8 @@ class InstalledWindow(QWidget):
         Args:
           text (str): The text to search for within the repository names.
         """
-        self.list_widget.clear()  # Clear current items
-        self.repos.clear()  # Clear the repository list
-        found_repos: CondaEnvironment = self.db.get_environment_by_name(text)
-
-        for repo in found_repos:
-            env: CondaEnvironment = repo
-            self.repos.append(env.repository)  # Add the repo object to the list
-            repo_widget = RepoWidget(repo)
-            item = QListWidgetItem()
-            item.setSizeHint(repo_widget.sizeHint())
-            self.list_widget.addItem(item)
-            self.list_widget.setItemWidget(item, repo_widget)
+        found_env: CondaEnvironment | None = self.db.get_environment_by_name(text)
+        self.repo_model.set_records([RepoRecord.from_repository(found_env.repository, is_installed=True)] if found_env else [])
 
     def update_style(self) -> None:
         """
@@ -142,14 +136,16 @@ class InstalledWindow(QWidget):
         """
         pass
 
-    @Slot()
-    def display_item(self):
+    @Slot(QModelIndex)
+    def display_item(self, index: QModelIndex):
         """
         Displays the detailed information of the selected repository item in the detail view when a list item is clicked.
+
+        Args:
+            index (QModelIndex): The index of the clicked entry.
         """
-        current_row = self.list_widget.currentRow()  # Get the currently selected item's row
-        if 0 <= current_row < len(self.repos):
-            repo = self.repos[current_row]
+        repo = self.repo_model.record(index.row())
+        if repo is not None:
             if self.model_page.install_page:
                 self.model_page.install_page.change_to_main_model_page() # Ensure that main model page is displayed
                 
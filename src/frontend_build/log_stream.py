@@ -0,0 +1,204 @@
+import re
+import threading
+from collections import deque
+from PySide6.QtWidgets import QPlainTextEdit
+from PySide6.QtCore import QObject, QTimer, Signal, Slot
+from PySide6.QtGui import QTextCursor
+
+# Splits a frame into segments while keeping their terminators, so '\r' progress updates can be told apart from '\n' lines
+_SEGMENT_PATTERN = re.compile(r'[^\r\n]*(?:\r\n|\n|\r)|[^\r\n]+$')
+
+def is_transient(segment: str) -> bool:
+    """
+    Checks whether a segment ends with a bare carriage return, meaning the next segment overwrites it in place.
+
+    Args:
+        segment (str): A line of subprocess output, including its terminator.
+
+    Returns:
+        bool: True if the segment is a progress-bar style update, False otherwise.
+    """
+    return segment.endswith('\r') and not segment.endswith('\r\n')
+
+def split_segments(frame: str) -> list[str]:
+    """
+    Splits a frame of output into line segments, keeping each segment's terminator.
+
+    Args:
+        frame (str): The coalesced output text.
+
+    Returns:
+        list[str]: The segments that make up the frame.
+    """
+    return _SEGMENT_PATTERN.findall(frame)
+
+class LogFrameBuffer:
+    """
+    A thread-safe buffer that coalesces subprocess output lines into frames. Carriage-return updates are collapsed
+    in place so a progress bar emitting thousands of updates only costs one line per frame.
+
+    Attributes:
+        max_lines (int): The maximum number of lines kept between drains, older lines are dropped first.
+        pending_bytes (int): The approximate number of characters currently buffered.
+    """
+    def __init__(self, max_lines: int = 5000) -> None:
+        """
+        Initializes an empty buffer.
+
+        Args:
+            max_lines (int): The maximum number of lines kept between drains. Defaults to 5000.
+        """
+        self.max_lines = max_lines
+        self._lines: deque[str] = deque(maxlen=max_lines)
+        self._transient = False
+        self._lock = threading.Lock()
+        self.pending_bytes = 0
+
+    def feed(self, line: str) -> int:
+        """
+        Adds a line to the buffer, replacing the previous line if that one was a carriage-return update.
+
+        Args:
+            line (str): The output line, including its terminator.
+
+        Returns:
+            int: The number of characters buffered after the line was added.
+        """
+        with self._lock:
+            if self._transient and self._lines:
+                self.pending_bytes -= len(self._lines[-1])
+                self._lines[-1] = line
+            else:
+                self._lines.append(line)
+            self.pending_bytes += len(line)
+            self._transient = is_transient(line)
+            return self.pending_bytes
+
+    def drain(self) -> str:
+        """
+        Empties the buffer and returns its content as a single frame.
+
+        Returns:
+            str: The buffered lines joined together, or an empty string if nothing was buffered.
+        """
+        with self._lock:
+            frame = "".join(self._lines)
+            self._lines.clear()
+            self.pending_bytes = 0
+            return frame
+
+class LogStream(QObject):
+    """
+    Rate-limits output streamed from a worker thread into the GUI. Lines are fed from any thread and delivered on the
+    GUI thread as frames, either every `interval_ms` milliseconds or as soon as `max_bytes` characters are pending.
+
+    Attributes:
+        frameReady (Signal): Emitted on the GUI thread with a frame of coalesced output.
+        interval_ms (int): The time based flush interval in milliseconds.
+        max_bytes (int): The size based flush threshold in characters.
+    """
+    frameReady = Signal(str)
+    _flushRequested = Signal()  # Queued across threads when the size threshold is crossed
+
+    def __init__(self, interval_ms: int = 50, max_bytes: int = 4096, max_lines: int = 5000, parent=None) -> None:
+        """
+        Initializes the stream. It must be created on the GUI thread so the flush timer runs there.
+
+        Args:
+            interval_ms (int): The time based flush interval in milliseconds. Defaults to 50.
+            max_bytes (int): The size based flush threshold in characters. Defaults to 4096.
+            max_lines (int): The maximum number of lines buffered between flushes. Defaults to 5000.
+            parent (QObject, optional): The parent object. Defaults to None.
+        """
+        super().__init__(parent)
+        self.interval_ms = interval_ms
+        self.max_bytes = max_bytes
+        self.buffer = LogFrameBuffer(max_lines=max_lines)
+        self._flush_pending = threading.Event()
+        self._timer = QTimer(self)
+        self._timer.setInterval(interval_ms)
+        self._timer.timeout.connect(self.flush)
+        self._flushRequested.connect(self.flush)
+
+    def start(self) -> None:
+        """Starts the periodic flush timer."""
+        self._timer.start()
+
+    def stop(self) -> None:
+        """Stops the periodic flush timer and delivers whatever output is still buffered."""
+        self._timer.stop()
+        self.flush()
+
+    def feed(self, line: str) -> None:
+        """
+        Buffers a line of output. Safe to call from any thread.
+
+        Args:
+            line (str): The output line, including its terminator.
+        """
+        if self.buffer.feed(line) >= self.max_bytes and not self._flush_pending.is_set():
+            self._flush_pending.set()
+            self._flushRequested.emit()
+
+    @Slot()
+    def flush(self) -> None:
+        """Emits the buffered output as one frame, if there is any."""
+        self._flush_pending.clear()
+        frame = self.buffer.drain()
+        if frame:
+            self.frameReady.emit(frame)
+
+class LogView(QPlainTextEdit):
+    """
+    A read-only log display backed by a bounded block count, so long installs keep a fixed memory footprint.
+    Frames are appended in a single edit block and carriage-return updates overwrite the last line in place.
+
+    Attributes:
+        max_blocks (int): The number of lines kept before the oldest ones are discarded.
+    """
+    def __init__(self, parent=None, max_blocks: int = 5000) -> None:
+        """
+        Initializes the log view.
+
+        Args:
+            parent (QWidget, optional): The parent widget. Defaults to None.
+            max_blocks (int): The number of lines kept before the oldest are discarded. Defaults to 5000.
+        """
+        super().__init__(parent)
+        self.max_blocks = max_blocks
+        self.setReadOnly(True)
+        self.setMaximumBlockCount(max_blocks)
+        self.setUndoRedoEnabled(False)
+        self._transient = False
+        self._has_lines = False
+
+    def append_frame(self, frame: str) -> None:
+        """
+        Appends a frame of output to the view, collapsing carriage-return updates into the last line.
+
+        Args:
+            frame (str): The coalesced output text.
+        """
+        scrollbar = self.verticalScrollBar()
+        at_bottom = scrollbar.value() >= scrollbar.maximum() - 4
+        cursor = QTextCursor(self.document())
+        cursor.beginEditBlock()
+        cursor.movePosition(QTextCursor.End)
+        for segment in split_segments(frame):
+            text = segment.rstrip('\r\n')
+            if self._transient:
+                cursor.movePosition(QTextCursor.StartOfBlock, QTextCursor.KeepAnchor)
+            elif self._has_lines:
+                cursor.insertBlock()
+            cursor.insertText(text)
+            self._has_lines = True
+            self._transient = is_transient(segment)
+        cursor.endEditBlock()
+        if at_bottom:
+            scrollbar.setValue(scrollbar.maximum())
+
+    def clear(self) -> None:
+        """Clears the view and resets the carriage-return state."""
+        super().clear()
+        self._transient = False
+        self._has_lines = False
@@ -7,15 +7,14 @@ import textwrap
 import os
 import subprocess
 from pathlib import Path
-import pypandoc
 #from pypandoc.pandoc_download import download_pandoc
-import pdflatex
 
 module_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
 if module_dir not in sys.path:
     sys.path.append(module_dir)
 
 from directories import DRAG_N_DROP_DIR, REPORTS_DIR
+from input_store import get_input_store
 
 class Logger:
     """
@@ -33,6 +32,8 @@ class Logger:
             RuntimeError: If the conversion fails due to an issue within Pandoc or the environment setup.
         """
        
+        import pypandoc # Imported on first conversion, it is only needed for exporting reports
+
         try:
             # Specify 'markdown' as the input format
             output = pypandoc.convert_file(input_file, 'pdf', format='markdown', outputfile=output_file)
@@ -109,21 +110,27 @@ class MenuBar(QMenuBar):
 
         # File list widget options menu
         file_menu = self.addMenu("File List Options")
-        clear_action = file_menu.addAction("Clear stored_files folder")
+        clear_action = file_menu.addAction("Clear stored inputs")
         clear_action.triggered.connect(self.clear_stored_files_folder)
 
     def clear_stored_files_folder(self):
         """
-        Clears all files in the 'stored_files' folder, which is specified by the DRAG_N_DROP_DIR directory constant.
-        This method includes a confirmation dialog and error handling for file deletions.
+        Clears the stored inputs from the input store, along with any files left in the 'stored_files' folder,
+        specified by the DRAG_N_DROP_DIR directory constant, by earlier versions. Inputs a running model is using are
+        deleted once it finishes. This method includes a confirmation dialog and error handling for file deletions.
         """
         stored_files_folder = DRAG_N_DROP_DIR
 
         # Confirm action
-        reply = QMessageBox.question(self, 'Clear Folder', 'Are you sure you want to clear all files in the stored_files folder?',
+        reply = QMessageBox.question(self, 'Clear Inputs', 'Are you sure you want to clear all stored inputs?',
                                      QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        if reply != QMessageBox.Yes:
+            return
+
+        # The FileListWidget listens to the store and removes the deleted entries itself
+        get_input_store().clear()
 
-        if reply == QMessageBox.Yes:
+        if os.path.isdir(stored_files_folder):
             for filename in os.listdir(stored_files_folder):
                 file_path = os.path.join(stored_files_folder, filename)
                 try:
@@ -135,10 +142,6 @@ class MenuBar(QMenuBar):
                     QMessageBox.critical(self, 'Error', f'Failed to delete {filename}: {e}')
                     return  # Exit if there's an error
 
-            # Update the FileListWidget if available
-            if self.file_list_widget:
-                self.file_list_widget.refresh_list()  # Refresh the list in the UI to reflect the cleared folder
-
     def clip_my_output_placeholder(self):
         """
          convert an output log file from text to PDF
@@ -1,8 +1,6 @@
 from PySide6.QtWidgets import QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QFrame, QSizePolicy, QWidget, QListWidget, QListWidgetItem, QToolTip, QTextEdit, QLineEdit, QInputDialog, QMessageBox
 from PySide6.QtCore import Qt
-from PySide6.QtGui import QFont
-from PySide6.QtWebEngineWidgets import QWebEngineView  # Import QWebEngineView
-import markdown
+from PySide6.QtGui import QFont, QColor, QTextCharFormat, QTextCursor
 import sys
 import os
 from PySide6.QtGui import QIcon
@@ -12,6 +10,9 @@ from model_player import ModelPlayer
 from styler import Styler
 from install_page import InstallPage, run_environment_command
 from GPT_caller import GPTCaller
+from readme_renderer import ReadmeRenderer, REST_ELEMENT_ID
+from readme_view import ReadmeView
+from chat_stream import ChatStream
 
 # Calculate the path to the directory containing
 module_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
@@ -23,27 +24,48 @@ from repo import Repository
 from database import DatabaseManager
 from conda_env import CondaEnvironment
 from directories import DB_PATH
+from render_cache import get_render_cache
 class GPTPlayer(QWidget):
     """
     A widget that interacts with a GPT model to perform various tasks like generating sample code, 
     finding model parameters, datasets, content, writing reports, and managing an API key.
 
+    Responses are requested on a worker thread and streamed into the chat display as they are generated. While a
+    response streams, the request buttons are disabled and the Stop button cancels it.
+
     Attributes:
         caller (object): The parent object which holds the API caller for making requests.
         GPT (GPTCaller): An instance of GPTCaller to handle specific GPT model-related operations.
+        stream (ChatStream): Runs the requests and delivers their responses.
+        stopButton (QPushButton): Cancels the response being streamed.
     """
-    def __init__(self, documentation, parent):
+    # The GPTCaller request method run by each button
+    REQUESTS = {
+        'Make Sample Code': 'make_sample_code',
+        'Find The Models Parameters': 'find_model_parameters',
+        'Find The Models Datasets': 'find_model_datasets',
+        'Find Additional Model Content': 'find_model_content',
+        'Write A Report On The Model': 'write_model_report',
+        'Run Full Analysis\n(Answers All Of The Above At Once)': 'full_analysis',
+        'Elaborate On The Output Log\n(Requires Ran Model)': 'output_log_test',
+    }
+
+    def __init__(self, documentation, parent, readme: str | None = None):
         """
         Initializes the GPTPlayer with necessary documentation and a reference to the parent widget.
 
         Args:
         documentation (str): Documentation or description of the GPT model functionalities.
         parent (QWidget): The parent widget, typically the main application window.
+        readme (str | None): The README already fetched by the repository, so it is not downloaded again.
         """
         super().__init__()
         self.caller = parent.caller
-        self.GPT = GPTCaller(documentation, self.caller)
+        self.GPT = GPTCaller(documentation, self.caller, readme=readme)
         self.check = self.GPT.check
+        self.stream = ChatStream(parent=self)
+        self.stream.deltaReady.connect(self.appendResponse)
+        self.stream.finished.connect(self.finishResponse)
         self.initUI()
     
     def initUI(self):
@@ -99,13 +121,21 @@ class GPTPlayer(QWidget):
 
         # Creating and adding buttons dynamically
         buttonLabels = ['Make Sample Code', 'Find The Models Parameters', 'Find The Models Datasets',
-                         'Find Additional Model Content', 'Write A Report On The Model','Elaborate On The Output Log\n(Requires Ran Model)', 'Delete Current API Key']
+                         'Find Additional Model Content', 'Write A Report On The Model',
+                         'Run Full Analysis\n(Answers All Of The Above At Once)','Elaborate On The Output Log\n(Requires Ran Model)', 'Delete Current API Key']
         self.buttonsLayout = QVBoxLayout()  # Layout for buttons
+        self.requestButtons: list[QPushButton] = []
 
         for label in buttonLabels:
             button = QPushButton(label)
             button.clicked.connect(self.buttonClicked)  # Connect the clicked signal to a slot
             self.buttonsLayout.addWidget(button)
+            self.requestButtons.append(button)
+
+        self.stopButton = QPushButton('Stop')
+        self.stopButton.setEnabled(False)
+        self.stopButton.clicked.connect(self.stream.cancel)
+        self.buttonsLayout.addWidget(self.stopButton)
 
         layout.addLayout(self.buttonsLayout)  # Add the buttons layout to the main layout
         
@@ -120,30 +150,68 @@ class GPTPlayer(QWidget):
         
         sender = self.sender()
         response: str
-        
-        if sender.text() == 'Make Sample Code':
-            response = self.GPT.make_sample_code()
 
-        elif sender.text() == 'Find The Models Parameters':
-            response = self.GPT.find_model_parameters()
+        method = self.REQUESTS.get(sender.text())
+        if method is not None:
+            self.startResponse(getattr(self.GPT, method))
+            return
 
-        elif sender.text() == 'Find The Models Datasets':
-            response = self.GPT.find_model_datasets()
+        if sender.text() == 'Delete Current API Key':
+            response = self.GPT.delete_api_key()
 
-        elif sender.text() == 'Find Additional Model Content':
-            response = self.GPT.find_model_content()
+        self.displayMessage(response, sender)
 
-        elif sender.text() == 'Write A Report On The Model':
-            response = self.GPT.write_model_report()
+    def startResponse(self, request):
+        """
+        Starts streaming the response to a request into the chat display.
 
-        elif sender.text() == 'Elaborate On The Output Log\n(Requires Ran Model)':
-            response = self.GPT.output_log_test()
+        Args:
+        request (Callable): The GPTCaller request method to run.
+        """
+        self.chatDisplay.moveCursor(QTextCursor.End)
+        self.chatDisplay.insertHtml("<b style='color: #CC7A00; font-family: Consolas;'>GPT:</b><br>")
+        for button in self.requestButtons:
+            button.setEnabled(False)
+        self.stopButton.setEnabled(True)
+        self.stream.start(request)
 
-        elif sender.text() == 'Delete Current API Key':
-            response = self.GPT.delete_api_key()
+    def appendResponse(self, text):
+        """
+        Appends a piece of the streamed response to the chat display.
 
-        self.displayMessage(response, sender)
+        Args:
+        text (str): The text received since the last piece.
+        """
+        scrollbar = self.chatDisplay.verticalScrollBar()
+        at_bottom = scrollbar.value() >= scrollbar.maximum() - 4
+        cursor = QTextCursor(self.chatDisplay.document())
+        cursor.movePosition(QTextCursor.End)
+        body_format = QTextCharFormat()
+        body_format.setFontFamilies(["Consolas"])
+        body_format.setForeground(QColor("#333333"))
+        cursor.insertText(text, body_format)
+        if at_bottom:
+            scrollbar.setValue(scrollbar.maximum())  # Follows the response unless the user scrolled up
+
+    def finishResponse(self, text, cancelled):
+        """
+        Ends the streamed response and enables the request buttons again.
+
+        Args:
+        text (str): The full response text.
+        cancelled (bool): True if the response was stopped.
+        """
+        if cancelled:
+            self.appendResponse(" [stopped]")
+        self.appendResponse("\n\n")
+        for button in self.requestButtons:
+            button.setEnabled(True)
+        self.stopButton.setEnabled(False)
 
+    def closeEvent(self, event):
+        """Stops the response being streamed when the window is closed."""
+        self.stream.cancel()
+        super().closeEvent(event)
 
     def displayMessage(self, message, sender):
         """
@@ -218,13 +286,17 @@ class ModelPage(QFrame):
         """
         
         self.html_text: str | None = None
+        self.markdown_source: str = "  " # The markdown currently shown, re-rendered for the new theme on style changes
+        self.render_cache = get_render_cache()
+        self.renderer = ReadmeRenderer(self.render_cache, parent=self) # Renders READMEs off the GUI thread
+        self.renderer.pageReady.connect(self.show_rendered_page)
+        self.renderer.headReady.connect(self.show_rendered_page)
+        self.renderer.restReady.connect(self.show_rendered_rest)
         self.css = self.styler.doc_css
         self.button1 = QPushButton("Model Player")
         self.button2 = QPushButton("Delete Installed Model")
         self.button3 = QPushButton("ChatGPT Window")
-        self.text_display = QWebEngineView()  # Use QWebEngineView
-        self.text_display.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
-        self.text_display.setZoomFactor(0.9)
+        self.text_display = ReadmeView(zoom_factor=0.9)  # Shares one web view per process, or a QTextBrowser in light mode
         self.thumbnail = QLabel()
         self.thumbnail.setFixedSize(100, 100)
         mainLabel = QLabel("Model Page")
@@ -288,7 +360,7 @@ class ModelPage(QFrame):
         Initiates the deletion of the currently running environment. This method handles the deletion process and updates the UI accordingly.
         """
         delete_tuple = self.running_env.delete()
-        is_deleted = run_environment_command(self, worker_name="delete", command=delete_tuple[0], error_message=delete_tuple[1])
+        is_deleted = run_environment_command(self, worker_name="delete", command=delete_tuple[0], error_message=delete_tuple[1], env_name=self.running_env.env_name)
         if is_deleted:
             QMessageBox.information(self, "Success", f"Model deleted succesfully")
         else:
@@ -318,7 +390,8 @@ class ModelPage(QFrame):
         if isinstance(self.GPT_Window, QWidget): # Already created
             return
         
-        self.GPT_Window = GPTPlayer(self.running_env.repository.repo_url, self)
+        repository = self.running_env.repository
+        self.GPT_Window = GPTPlayer(repository.repo_url, self, readme=repository.readme_content)
 
         if self.GPT_Window.check:
             self.GPT_Window.show()
@@ -389,27 +462,46 @@ class ModelPage(QFrame):
             self.install_page.set_new_environment(self.running_env)
         self.install_page.show_all()
 
-    def convert_to_markdown(self, name: str) -> str:
+    def display_markdown(self, markdown_text: str) -> None:
         """
-        Converts the provided content name to HTML formatted Markdown for display.
+        Starts rendering markdown for display, superseding any README still being rendered.
+        The first sections are shown as soon as they are ready and the rest is filled in as it renders.
 
         Args:
-            name (str): The attribute name from the repository whose content is to be converted.
+            markdown_text (str): The markdown to display.
+        """
+        self.markdown_source = markdown_text
+        if not markdown_text.strip():
+            self.renderer.cancel()
+            self.text_display.clear()  # Nothing to show, and no reason to start the web view yet
+            return
+        self.renderer.render(markdown_text, self.styler.theme, self.css)
 
-        Returns:
-            str: The HTML formatted content ready for display.
+    def show_rendered_page(self, generation: int, page: str) -> None:
         """
-        
-        content = getattr(self.running_env.repository, name, None)
-        
-        if content:
-            markdown_text = content
-            self.html_text = markdown.markdown(markdown_text, extensions=['tables', 'fenced_code', 'codehilite', 'extra'])
+        Displays a page from the renderer, unless a later render superseded it.
+
+        Args:
+            generation (int): The render the page belongs to.
+            page (str): The HTML page.
+        """
+        if self.renderer.is_cancelled(generation):
+            return
+        self.html_text = page
+        self.text_display.set_page(page)
+
+    def show_rendered_rest(self, generation: int, html: str) -> None:
+        """
+        Fills in the sections below the first screenful, keeping the scroll position.
+
+        Args:
+            generation (int): The render the sections belong to.
+            html (str): The rendered sections.
+        """
+        if self.renderer.is_cancelled(generation):
+            return
+        self.text_display.set_element_html(REST_ELEMENT_ID, html)
 
-            self.html_text = f"<style>{self.css}</style>{self.html_text}"
-            
-            return self.html_text
-            
     def update_content(self, repo_entry) -> None:
         """
         Updates the displayed content on the model page based on the provided repository entry.
@@ -424,11 +516,7 @@ class ModelPage(QFrame):
             self.progress_widget.hide()
         # Show buttons when content is updated
         if repo_entry is None:
-            if self.html_text is None:
-                self.html_text = markdown.markdown("  ", extensions=['tables', 'fenced_code', 'codehilite', 'extra'])
-            
-            self.html_text = f"<style>{self.css}</style>{self.html_text}"
-            self.text_display.setHtml(self.html_text)  # Set HTML content
+            self.display_markdown(self.markdown_source)  # Rendered off the GUI thread
             if not isinstance(self.running_env, CondaEnvironment):
                 self.button1.hide()
                 self.button2.setText("Install Model")
@@ -461,7 +549,7 @@ class ModelPage(QFrame):
         
         self.button2.show()
         self.button3.show()
-        self.text_display.setHtml(self.convert_to_markdown('readme_content'))  # Set HTML content
+        self.display_markdown(self.running_env.repository.readme_content or "  ")  # Rendered off the GUI thread
 
     def update_style(self):
         """
@@ -469,11 +557,11 @@ class ModelPage(QFrame):
         """
         if self.styler.dark_mode_enabled:
             self.setStyleSheet("background-color: #333333; color: white;")
-            # Update styles for QWebEngineView if necessary
+            # Update styles for the README view if necessary
             self.thumbnail.setStyleSheet("background-color: gray;")
         else:
             self.setStyleSheet("background-color: lightgray; color: black;")
-            # Update styles for QWebEngineView if necessary
+            # Update styles for the README view if necessary
             self.thumbnail.setStyleSheet("background-color: lightgray;")
         self.css = self.styler.doc_css
         self.update_content(repo_entry=None)
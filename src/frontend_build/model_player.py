@@ -1,5 +1,5 @@
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QApplication,
-                               QHBoxLayout, QLabel, QFrame, QSizePolicy, QTextEdit, QLineEdit)
+                               QHBoxLayout, QLabel, QFrame, QSizePolicy, QLineEdit)
 from PySide6.QtCore import QObject, Signal, QCoreApplication
 from PySide6.QtGui import QFont
 from menu_bar import MenuBar
@@ -14,6 +14,7 @@ from file_list_widget import FileListWidget
 from file_drop_widget import FileDropWidget
 from terminal_widget import TerminalWidget
 from script_builder import ScriptBuilder
+from log_stream import LogView
 
 class ModelPlayer(QWidget):
     """
@@ -125,6 +126,7 @@ class ModelPlayer(QWidget):
         # Connect the file_drop_widget to the file_list_widget
         self.file_drop_widget.filesDropped.connect(self.file_list_widget.update_file_list)
         self.file_drop_widget.filesDropped.connect(self.get_user_input)
+        self.file_list_widget.inputSelected.connect(self.get_user_input)  # Inputs from earlier sessions can be run again
 
         # left_section_layout.addWidget(self.file_drop_widget)
         # left_section_layout.addWidget(self.file_list_widget)
@@ -137,8 +139,7 @@ class ModelPlayer(QWidget):
 
 
         # Progress Widget initialization
-        self.progress_widget = QTextEdit(self)
-        self.progress_widget.setReadOnly(True)  # Make the progress widget read-only
+        self.progress_widget = LogView(self)
         self.progress_widget.setSizePolicy(QSizePolicy.Preferred, QSizePolicy.Expanding)  # Adjust size policy
 
         # Add the progress widget to the layout
@@ -161,13 +162,13 @@ class ModelPlayer(QWidget):
 
     def update_progress_widget(self, text: str):
         """
-        Updates the progress widget with new text, displaying the status or results of operations such as script execution or file handling.
+        Updates the progress widget with a new frame of text, displaying the status or results of operations such as script execution or file handling.
 
         Args:
-            text (str): The text to be displayed in the progress widget.
+            text (str): The frame to be displayed in the progress widget.
         """
-        # Append text to the progress_widget, ensuring thread safety
-        self.progress_widget.append(text)
+        # Frames arrive on the GUI thread already batched by the LogStream
+        self.progress_widget.append_frame(text)
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
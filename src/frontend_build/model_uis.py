@@ -1,16 +1,21 @@
 from PySide6.QtWidgets import QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QFrame, QWidget, QSizePolicy, QListWidget, QTextEdit, QLineEdit, QApplication
 from PySide6.QtCore import Qt, QThread, QEventLoop, QObject, Signal
-from PySide6.QtWebEngineWidgets import QWebEngineView
-from PySide6.QtGui import QPixmap, QImage
+from PySide6.QtGui import QPixmap, QImage, QColor, QTextCharFormat, QTextCursor
 import sys
 import os
 from PySide6.QtGui import QIcon
 from typing import Callable
 import subprocess
-import shutil
 
+module_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+if module_dir not in sys.path:
+    sys.path.append(module_dir)
+
+from file_intake import get_file_intake
+from input_store import PinnedInput
+from chat_stream import ChatStream
+from llm_client import LLMClient
 
-DRAG_N_DROP_DIR = os.getcwd() + "/app/temp/drag_n_drop"
 
 # Used for UI 
 global_style = """
@@ -58,15 +63,33 @@ class LLMPlayer(QWidget):
     A graphical user interface component that serves as a chat interface for interacting with a language model (LLM).
     It allows for sending prompts to the LLM and displays the model's responses.
 
+    With a client, prompts are answered by a local generation server running in the model's environment, and the reply
+    is streamed into the chat display as it is generated. The server keeps the conversation's state between turns;
+    "New Chat" starts over and "Stop" cancels a reply. Without a client, prompts are emitted through inputReceived for
+    the model script to answer with displayOutput.
+
     Attributes:
         chatDisplay (QTextEdit): Displays the chat history and responses from the LLM.
         textEntry (QLineEdit): Allows the user to type and send messages to the LLM.
+        client (LLMClient | None): The generation server client, None when the model script answers prompts.
+        stream (ChatStream): Runs the generations and delivers their replies.
+        inputReceived (Signal): Emitted with each prompt the model script has to answer, i.e. when there is no client.
     """
-    def __init__(self):
+    inputReceived = Signal(str)
+
+    def __init__(self, client: LLMClient | None = None):
         """
         Initializes the LLMPlayer by setting up the UI components and layout.
+
+        Args:
+            client (LLMClient | None): The generation server client. Defaults to the client configured by the
+                FOCALAI_LLM_BACKEND and FOCALAI_LLM_MODEL environment variables, if any.
         """
         super().__init__()
+        self.client = client if client is not None else LLMClient.from_environment()
+        self.stream = ChatStream(parent=self)
+        self.stream.deltaReady.connect(self.appendResponse)
+        self.stream.finished.connect(self.finishResponse)
         self.initUI()
 
     def initUI(self):
@@ -89,25 +112,103 @@ class LLMPlayer(QWidget):
         self.textEntry.setPlaceholderText("Type your message...")
         self.textEntry.returnPressed.connect(self.sendPrompt)
 
+        # Generation controls
+        self.stopButton = QPushButton("Stop")
+        self.stopButton.setEnabled(False)
+        self.stopButton.clicked.connect(self.stream.cancel)
+        self.newChatButton = QPushButton("New Chat")
+        self.newChatButton.clicked.connect(self.newChat)
+        controls = QHBoxLayout()
+        controls.addWidget(self.newChatButton)
+        controls.addWidget(self.stopButton)
+        self.stopButton.setVisible(self.client is not None)
+        self.newChatButton.setVisible(self.client is not None)
+
         # Layout
         layout = QVBoxLayout()
         layout.addWidget(self.chatDisplay)
         layout.addWidget(self.textEntry)
+        layout.addLayout(controls)
 
         self.setLayout(layout)
 
     def sendPrompt(self):
         """
-        Captures text from the text entry field when the user presses Enter, sends it to the LLM, and displays the response.
+        Captures text from the text entry field when the user presses Enter, sends it to the LLM, and streams the response.
         Clears the text entry field after sending the message.
         """
         userText = self.textEntry.text()
+        if not userText.strip():
+            return
         self.displayMessage(userText, "user")
         self.textEntry.clear()
+        if self.client is None:
+            self.inputReceived.emit(userText)
+            return  # The model script answers through displayOutput
+
+        # Send prompt to LLM and stream the response
+        self.chatDisplay.moveCursor(QTextCursor.End)
+        self.chatDisplay.insertHtml("<b style='color: #CC7A00; font-family: Consolas;'>LLM:</b><br>")
+        self.textEntry.setEnabled(False)
+        self.newChatButton.setEnabled(False)
+        self.stopButton.setEnabled(True)
+        client = self.client
+        self.stream.start(lambda on_delta, is_cancelled: client.generate(userText, on_delta, is_cancelled))
+
+    def appendResponse(self, text):
+        """
+        Appends a piece of the streamed response to the chat display.
+
+        Args:
+            text (str): The text generated since the last piece.
+        """
+        scrollbar = self.chatDisplay.verticalScrollBar()
+        at_bottom = scrollbar.value() >= scrollbar.maximum() - 4
+        cursor = QTextCursor(self.chatDisplay.document())
+        cursor.movePosition(QTextCursor.End)
+        body_format = QTextCharFormat()
+        body_format.setFontFamilies(["Consolas"])
+        body_format.setForeground(QColor("#333333"))
+        cursor.insertText(text, body_format)
+        if at_bottom:
+            scrollbar.setValue(scrollbar.maximum())
+
+    def finishResponse(self, text, cancelled):
+        """
+        Ends the streamed response and accepts the next prompt.
+
+        Args:
+            text (str): The full response text.
+            cancelled (bool): True if the response was stopped.
+        """
+        if cancelled:
+            self.appendResponse(" [stopped]")
+        self.appendResponse("\n\n")
+        self.textEntry.setEnabled(True)
+        self.newChatButton.setEnabled(True)
+        self.stopButton.setEnabled(False)
+        self.textEntry.setFocus()
+
+    def newChat(self):
+        """Clears the chat and the conversation state kept by the generation server."""
+        self.stream.cancel()
+        self.chatDisplay.clear()
+        if self.client is not None:
+            self.client.reset()
+
+    def displayOutput(self, output):
+        """
+        Displays a reply produced by the model script.
+
+        Args:
+            output (str): The reply.
+        """
+        self.displayMessage(str(output), "llm")
 
-        # Send prompt to LLM and get response
-        llmResponse = "Just need to connect the LLM now"
-        self.displayMessage(llmResponse, "llm")
+    def closeEvent(self, event):
+        """Stops the reply being generated when the window is closed."""
+        self.stream.cancel()
+        super().closeEvent(event)
 
     def displayMessage(self, message, sender):
         """
@@ -143,6 +244,7 @@ class FileDropWidget(QWidget):
     A widget that allows files to be dragged and dropped onto it, handling file input operations dynamically.
 
     Attributes:
+        selection (PinnedInput): The dropped input, pinned in the input store.
         filesDropped (Signal): A signal emitted when a file is successfully dropped onto the widget.
     """
     filesDropped = Signal(str)
@@ -152,9 +254,9 @@ class FileDropWidget(QWidget):
         """
         super().__init__()
         self.setAcceptDrops(True)
+        self.selection = selection = PinnedInput()
+        self.destroyed.connect(lambda: selection.release())
         self.init_ui()
-        self.stored_files_folder = DRAG_N_DROP_DIR
-        os.makedirs(self.stored_files_folder, exist_ok=True)
 
     def init_ui(self):
         """
@@ -184,13 +286,13 @@ class FileDropWidget(QWidget):
 
     def dropEvent(self, event):
         """
-        Handles the event where files are dropped onto the widget. It processes the first file dropped, copies it to a designated folder, and emits a signal with the file's destination path.
+        Handles the event where files are dropped onto the widget. It processes the first file dropped, adds it to the input store through the shared FileIntake without deleting earlier inputs, and emits a signal with the file's destination path once it is there.
 
         Args:
             event (QDropEvent): The event triggered by dropping files onto the widget.
 
         Emits:
-            filesDropped: Signal emitted with the path of the file successfully dropped and copied.
+            filesDropped: Signal emitted with the path of the file successfully dropped and added.
         """
         
         mime_data = event.mimeData()
@@ -199,17 +301,33 @@ class FileDropWidget(QWidget):
             if first_file_url.isLocalFile():
                 src_path = first_file_url.toLocalFile()
                 if os.path.isfile(src_path):
-                    file_name = os.path.basename(src_path)
-                    dest_path = os.path.join(self.stored_files_folder, file_name)
-                    try:
-                        shutil.rmtree(self.stored_files_folder)
-                        os.makedirs(self.stored_files_folder, exist_ok=True)
-                        shutil.copy(src_path, dest_path)
-                        self.label.setText(file_name)
-                        self.label.setStyleSheet("color: #000000; font-style: normal;")
-                        self.filesDropped.emit(dest_path)
-                    except Exception as e:
-                        self.error_message(f"Could not copy file: {e}")
+                    self.label.setText(f"Adding {os.path.basename(src_path)}...")
+                    get_file_intake().intake(
+                        src_path, self.on_file_ready, self.on_copy_progress,
+                        lambda message: self.error_message(f"Could not add file: {message}"))
+
+    def on_file_ready(self, dest_path: str, method: str):
+        """
+        Shows the dropped file once it is in the input store under its original name, pins it until another file is
+        dropped and emits its path.
+
+        Args:
+            dest_path (str): The path of the stored input.
+            method (str): How the file was added, see FileIntake.intake.
+        """
+        entry = self.selection.select(dest_path)
+        self.label.setText(entry["name"] if entry is not None else os.path.basename(dest_path))  # Stored objects are named by digest
+        self.label.setStyleSheet("color: #000000; font-style: normal;")
+        self.filesDropped.emit(dest_path)
+
+    def on_copy_progress(self, percent: int):
+        """
+        Shows the progress of a file that has to be copied.
+
+        Args:
+            percent (int): The percentage copied.
+        """
+        self.label.setText(f"Copying... {percent}%")
 
     def error_message(self, message):
         """
@@ -348,6 +466,7 @@ class FileDropWidget(QWidget):
     """A widget that supports dragging and dropping files into it.
     
     Attributes:
+        selection (PinnedInput): The dropped input, pinned in the input store.
         filesDropped (Signal): Custom signal that emits the path of the dropped file.
     """
     
@@ -358,6 +477,8 @@ class FileDropWidget(QWidget):
         """Initialize the FileDropWidget with drag and drop enabled."""
         super().__init__()
         self.setAcceptDrops(True)
+        self.selection = selection = PinnedInput()
+        self.destroyed.connect(lambda: selection.release())
         self.init_ui()
 
     def init_ui(self):
@@ -394,19 +515,19 @@ class FileDropWidget(QWidget):
             if first_file_url.isLocalFile():
                 src_path = first_file_url.toLocalFile()
                 if os.path.isfile(src_path):  # Check if it's a file not a directory
-                    file_name = os.path.basename(src_path)
-                    dest_path = os.path.join(DRAG_N_DROP_DIR, file_name)
-
-                    # Clear existing files in the directory
-                    for existing_file in os.listdir(DRAG_N_DROP_DIR):
-                        os.remove(os.path.join(DRAG_N_DROP_DIR, existing_file))
-
-                    # Copy the new file
-                    try:
-                        shutil.copy(src_path, dest_path)
-                        self.label.setText(file_name)  # Update label to show copied file
-                        self.label.setStyleSheet("color: #000000; font-style: normal;")
-                        self.filesDropped.emit(dest_path)  # Emit signal with path of copied file
-                    except Exception as e:
-                        print(f"Could not copy file {src_path} to {dest_path}: {e}")
+                    # Earlier inputs are kept, the file is stored next to them or reuses an identical one
+                    self.label.setText(f"Adding {os.path.basename(src_path)}...")
+                    get_file_intake().intake(src_path, self.on_file_ready, self.on_copy_progress,
+                                             lambda message: print(f"Could not take in file {src_path}: {message}"))
+
+    def on_file_ready(self, dest_path: str, method: str):
+        """Shows the dropped file once it is in the input store, pins it and emits its path."""
+        entry = self.selection.select(dest_path)
+        self.label.setText(entry["name"] if entry is not None else os.path.basename(dest_path))  # Stored objects are named by digest
+        self.label.setStyleSheet("color: #000000; font-style: normal;")
+        self.filesDropped.emit(dest_path)  # Emit signal with path of the stored input
+
+    def on_copy_progress(self, percent: int):
+        """Shows the progress of a file that has to be copied."""
+        self.label.setText(f"Copying... {percent}%")
 
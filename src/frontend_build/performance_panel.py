@@ -0,0 +1,170 @@
+from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QCheckBox, QTableWidget,
+                               QTableWidgetItem, QTreeWidget, QTreeWidgetItem, QHeaderView, QFileDialog, QLabel,
+                               QSplitter)
+from PySide6.QtCore import Qt, QTimer
+import os
+import sys
+
+module_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+if module_dir not in sys.path:
+    sys.path.append(module_dir)
+
+from tracing import Tracer, Span, get_tracer
+
+SUMMARY_COLUMNS = ("Span", "Count", "Total ms", "p50 ms", "p95 ms", "Max ms", "Errors")
+SUMMARY_KEYS = ("name", "count", "total_ms", "p50_ms", "p95_ms", "max_ms", "errors")
+RECENT_TRACES = 50 # Traces listed in the tree, the newest first
+
+class PerformancePanel(QWidget):
+    """
+    A window showing the timing spans recorded by the tracer: a summary per span name and the most recent traces,
+    each expandable into the spans it contains. Tracing can be switched on and off here, and the traces exported for
+    chrome://tracing or Perfetto.
+
+    The panel polls the tracer while it is visible, so it costs nothing while closed.
+
+    Attributes:
+        tracer (Tracer): The tracer shown.
+    """
+    def __init__(self, tracer: Tracer | None = None, refresh_ms: int = 1000, parent=None) -> None:
+        """
+        Initializes the panel.
+
+        Args:
+            tracer (Tracer | None): The tracer shown. Defaults to the shared tracer.
+            refresh_ms (int): How often the panel is refreshed while visible, in milliseconds. Defaults to 1000.
+            parent (QWidget, optional): The parent widget. Defaults to None.
+        """
+        super().__init__(parent)
+        self.tracer = tracer or get_tracer()
+        self._shown_trace: list[Span] | None = None
+        self._timer = QTimer(self)
+        self._timer.setInterval(refresh_ms)
+        self._timer.timeout.connect(self.refresh)
+        self.init_ui()
+
+    def init_ui(self) -> None:
+        """
+        Sets up the controls, the summary table and the trace tree.
+        """
+        self.setWindowTitle("Performance")
+        self.resize(900, 600)
+
+        self.enabled_box = QCheckBox("Record spans")
+        self.enabled_box.setChecked(self.tracer.enabled)
+        self.enabled_box.toggled.connect(self.set_tracing)
+        self.clear_button = QPushButton("Clear")
+        self.clear_button.clicked.connect(self.clear)
+        self.chrome_button = QPushButton("Export Chrome Trace...")
+        self.chrome_button.clicked.connect(lambda: self.export(chrome=True))
+        self.json_button = QPushButton("Export JSON...")
+        self.json_button.clicked.connect(lambda: self.export(chrome=False))
+        self.status_label = QLabel()
+
+        controls = QHBoxLayout()
+        controls.addWidget(self.enabled_box)
+        controls.addWidget(self.clear_button)
+        controls.addWidget(self.chrome_button)
+        controls.addWidget(self.json_button)
+        controls.addStretch()
+        controls.addWidget(self.status_label)
+
+        self.summary_table = QTableWidget(0, len(SUMMARY_COLUMNS))
+        self.summary_table.setHorizontalHeaderLabels(SUMMARY_COLUMNS)
+        self.summary_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.summary_table.verticalHeader().setVisible(False)
+        self.summary_table.setEditTriggers(QTableWidget.NoEditTriggers)
+
+        self.trace_tree = QTreeWidget()
+        self.trace_tree.setHeaderLabels(("Span", "ms", "Thread", "Details"))
+        self.trace_tree.header().setSectionResizeMode(0, QHeaderView.Stretch)
+
+        splitter = QSplitter(Qt.Vertical)
+        splitter.addWidget(self.summary_table)
+        splitter.addWidget(self.trace_tree)
+
+        layout = QVBoxLayout()
+        layout.addLayout(controls)
+        layout.addWidget(splitter)
+        self.setLayout(layout)
+
+    def set_tracing(self, enabled: bool) -> None:
+        """
+        Switches span recording on or off.
+
+        Args:
+            enabled (bool): Whether spans are recorded.
+        """
+        if enabled:
+            self.tracer.enable()
+        else:
+            self.tracer.disable()
+        self.refresh()
+
+    def clear(self) -> None:
+        """Drops the recorded traces."""
+        self.tracer.clear()
+        self.refresh()
+
+    def refresh(self) -> None:
+        """
+        Shows the tracer's current summary and recent traces, unless no trace was recorded since the last refresh.
+        """
+        traces = self.tracer.traces()
+        latest = traces[-1] if traces else None
+        self.status_label.setText(f"{len(traces)} traces" + ("" if self.tracer.enabled else ", recording off"))
+        if latest is self._shown_trace:
+            return
+        self._shown_trace = latest
+
+        summary = self.tracer.summary()
+        self.summary_table.setRowCount(len(summary))
+        for row, entry in enumerate(summary):
+            for column, key in enumerate(SUMMARY_KEYS):
+                item = QTableWidgetItem(str(entry[key]))
+                if column:
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.summary_table.setItem(row, column, item)
+
+        self.trace_tree.clear()
+        for trace in reversed(traces[-RECENT_TRACES:]):
+            parents: list[QTreeWidgetItem] = []
+            for span in trace:
+                item = QTreeWidgetItem((span.name, f"{span.duration * 1000:.2f}", span.thread,
+                                        ", ".join(f"{k}={v}" for k, v in span.args.items()) or (span.error or "")))
+                if span.error:
+                    item.setToolTip(0, span.error)
+                relative_depth = span.depth - trace[0].depth
+                del parents[relative_depth:]
+                if parents:
+                    parents[-1].addChild(item)
+                else:
+                    self.trace_tree.addTopLevelItem(item)
+                parents.append(item)
+
+    def export(self, chrome: bool) -> None:
+        """
+        Asks for a file and writes the recorded traces to it.
+
+        Args:
+            chrome (bool): Whether to write the Chrome trace event format instead of plain JSON.
+        """
+        file_filter = "Chrome Trace (*.json)" if chrome else "JSON (*.json)"
+        path, _ = QFileDialog.getSaveFileName(self, "Export Traces", "focalai-trace.json", file_filter)
+        if not path:
+            return
+        try:
+            self.tracer.export(path, chrome=chrome)
+            self.status_label.setText(f"Exported to {path}")
+        except OSError as e:
+            print(f"Could not export the traces: {e}")
+
+    def showEvent(self, event) -> None:
+        self._shown_trace = None
+        self.refresh()
+        self._timer.start()
+        super().showEvent(event)
+
+    def hideEvent(self, event) -> None:
+        self._timer.stop()
+        super().hideEvent(event)
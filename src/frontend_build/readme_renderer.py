@@ -0,0 +1,234 @@
+import os
+import re
+import sys
+import threading
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+module_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+if module_dir not in sys.path:
+    sys.path.append(module_dir)
+
+from render_cache import RenderCache, readme_digest
+from tracing import span
+
+MARKDOWN_EXTENSIONS = ['tables', 'fenced_code', 'codehilite', 'extra']
+REST_ELEMENT_ID = "focal-rest" # The element the sections below the first screenful are inserted into
+
+_HEADING_PATTERN = re.compile(r'^ {0,3}#{1,6}(\s|$)')
+_FENCE_PATTERN = re.compile(r'^ {0,3}(`{3,}|~{3,})')
+_REFERENCE_PATTERN = re.compile(r'^ {0,3}\[[^\]^][^\]]*\]:\s*\S') # Link definitions, not footnotes ('[^1]:')
+_FOOTNOTE_PATTERN = re.compile(r'\[\^[^\]\s]+\]')
+
+def split_sections(text: str) -> tuple[list[str], str]:
+    """
+    Splits markdown into sections that start at each heading. Headings inside fenced code blocks are ignored,
+    so code blocks are never split.
+
+    Footnotes are numbered and listed once for the whole document, so the sections from the first footnote reference
+    or definition on are kept together as the last section, which then renders the footnote list exactly once.
+
+    Args:
+        text (str): The markdown to split.
+
+    Returns:
+        tuple[list[str], str]: The sections in order, and the document's reference link definitions, which every
+        section needs appended to resolve its links when rendered on its own.
+    """
+    sections: list[str] = []
+    references: list[str] = []
+    current: list[str] = []
+    fence: str | None = None
+    first_footnote: int | None = None
+    for line in text.splitlines(keepends=True):
+        fence_match = _FENCE_PATTERN.match(line)
+        if fence is None:
+            if fence_match:
+                fence = fence_match.group(1)
+            elif _HEADING_PATTERN.match(line) and current:
+                sections.append("".join(current))
+                current = []
+            elif _REFERENCE_PATTERN.match(line):
+                references.append(line)
+            if first_footnote is None and _FOOTNOTE_PATTERN.search(line):
+                first_footnote = len(sections)
+        elif fence_match and fence_match.group(1)[0] == fence[0] and len(fence_match.group(1)) >= len(fence):
+            fence = None
+        current.append(line)
+    if current:
+        sections.append("".join(current))
+    if first_footnote is not None:
+        sections[first_footnote:] = ["".join(sections[first_footnote:])]
+    return sections, "".join(references)
+
+def render_markdown(text: str, highlight: bool = True) -> str:
+    """
+    Renders markdown into HTML with the extensions used for README pages.
+
+    Args:
+        text (str): The markdown to render.
+        highlight (bool): Whether to highlight code blocks with Pygments. Unhighlighted blocks are still marked up
+            as code and are much faster to produce. Defaults to True.
+
+    Returns:
+        str: The rendered HTML.
+    """
+    import markdown # Imported on first render, it pulls in Pygments and is not needed to show the window
+    return markdown.markdown(text, extensions=MARKDOWN_EXTENSIONS,
+                             extension_configs={'codehilite': {'use_pygments': highlight}})
+
+def compose_page(css: str, head_html: str, rest_html: str = "") -> str:
+    """
+    Assembles a README page from its first screenful and the container for the remaining sections.
+
+    Args:
+        css (str): The theme CSS.
+        head_html (str): The rendered first sections.
+        rest_html (str): The rendered remaining sections, if already available. Defaults to an empty string.
+
+    Returns:
+        str: The HTML page.
+    """
+    return f"<style>{css}</style>{head_html}<div id=\"{REST_ELEMENT_ID}\">{rest_html}</div>"
+
+class _RenderTask(QRunnable):
+    """
+    Renders one README on the thread pool: the first screenful with highlighting, then the remaining sections without
+    highlighting, then the remaining sections with highlighting. The task stops between sections once it is superseded.
+    """
+    def __init__(self, renderer: "ReadmeRenderer", generation: int, text: str, theme: str, css: str) -> None:
+        super().__init__()
+        self.renderer = renderer
+        self.generation = generation
+        self.text = text
+        self.theme = theme
+        self.css = css
+
+    def _render_sections(self, sections: list[str], references: str, highlight: bool) -> str | None:
+        """Renders sections one at a time, returning None if the task was cancelled in between."""
+        parts: list[str] = []
+        with span("readme.markdown", sections=len(sections), highlight=highlight):
+            for section in sections:
+                if self.renderer.is_cancelled(self.generation):
+                    return None
+                parts.append(render_markdown(section + "\n" + references if references else section, highlight))
+        return "".join(parts)
+
+    def run(self) -> None:
+        with span("readme.render", chars=len(self.text)):
+            self._render()
+
+    def _render(self) -> None:
+        try:
+            sections, references = split_sections(self.text)
+            head_count, size = 0, 0
+            while head_count < len(sections) and (head_count == 0 or size < self.renderer.head_chars):
+                size += len(sections[head_count])
+                head_count += 1
+            head, rest = sections[:head_count], sections[head_count:]
+
+            head_html = self._render_sections(head, references, highlight=True)
+            if head_html is None:
+                return
+            if not rest:
+                self.renderer._publish(self.generation, self.text, self.theme, compose_page(self.css, head_html))
+                return
+            self.renderer.headReady.emit(self.generation, compose_page(self.css, head_html))
+
+            # Sections below the fold are shown unhighlighted first, highlighting follows once it is ready
+            rest_plain = self._render_sections(rest, references, highlight=False)
+            if rest_plain is None:
+                return
+            self.renderer.restReady.emit(self.generation, rest_plain)
+            rest_html = self._render_sections(rest, references, highlight=True)
+            if rest_html is None:
+                return
+            self.renderer.restReady.emit(self.generation, rest_html)
+            self.renderer._publish(self.generation, self.text, self.theme, compose_page(self.css, head_html, rest_html),
+                                   notify=False)
+        except Exception as e:
+            print(f"Failed to render README: {e}")
+
+class ReadmeRenderer(QObject):
+    """
+    Renders README markdown off the GUI thread, showing the first screenful of sections as soon as it is ready.
+
+    Each call to `render` supersedes the previous one. Superseded renders stop at the next section boundary and their
+    results are never delivered, so clicking through repositories quickly does not queue up work. Finished pages are
+    stored in the render cache, and cached pages are delivered without starting a render.
+
+    Signals carry the generation of the render they belong to, and are delivered on the GUI thread.
+
+    Attributes:
+        pageReady (Signal): Emitted with (generation, page) when a complete page is available.
+        headReady (Signal): Emitted with (generation, page) when the first sections are rendered. The page contains an
+            empty element with the id REST_ELEMENT_ID for the remaining sections.
+        restReady (Signal): Emitted with (generation, html) for the remaining sections, first unhighlighted and then
+            again with highlighting.
+        head_chars (int): The approximate amount of markdown rendered for the first screenful.
+        generation (int): The generation of the most recent render.
+    """
+    pageReady = Signal(int, str)
+    headReady = Signal(int, str)
+    restReady = Signal(int, str)
+
+    def __init__(self, cache: RenderCache, head_chars: int = 6000, parent=None) -> None:
+        """
+        Initializes the renderer.
+
+        Args:
+            cache (RenderCache): The cache finished pages are stored in and served from.
+            head_chars (int): The approximate amount of markdown rendered for the first screenful. Defaults to 6000.
+            parent (QObject, optional): The parent object. Defaults to None.
+        """
+        super().__init__(parent)
+        self.cache = cache
+        self.head_chars = head_chars
+        self.generation = 0
+        self._lock = threading.Lock()
+        self._pool = QThreadPool.globalInstance()
+
+    def is_cancelled(self, generation: int) -> bool:
+        """
+        Checks whether a render was superseded by a later one.
+
+        Args:
+            generation (int): The generation of the render.
+
+        Returns:
+            bool: True if a later render was started or the render was cancelled.
+        """
+        with self._lock:
+            return generation != self.generation
+
+    def cancel(self) -> None:
+        """Cancels the current render, if any."""
+        with self._lock:
+            self.generation += 1
+
+    def render(self, text: str, theme: str, css: str) -> int:
+        """
+        Starts rendering a README, cancelling any render in progress. A cached page is emitted right away through `pageReady`.
+
+        Args:
+            text (str): The README markdown.
+            theme (str): The theme the page is rendered for, part of the cache key.
+            css (str): The theme CSS included in the page.
+
+        Returns:
+            int: The generation of the new render.
+        """
+        with self._lock:
+            self.generation += 1
+            generation = self.generation
+        page = self.cache.get_by_key((readme_digest(text), theme))
+        if page is not None:
+            self.pageReady.emit(generation, page)
+        else:
+            self._pool.start(_RenderTask(self, generation, text, theme, css))
+        return generation
+
+    def _publish(self, generation: int, text: str, theme: str, page: str, notify: bool = True) -> None:
+        """Caches a finished page and emits it unless the render was superseded."""
+        self.cache.put(text, theme, page)
+        if notify and not self.is_cancelled(generation):
+            self.pageReady.emit(generation, page)
@@ -0,0 +1,208 @@
+import os
+import sys
+import json
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QTextBrowser, QSizePolicy
+from PySide6.QtCore import Qt, QCoreApplication
+
+module_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+if module_dir not in sys.path:
+    sys.path.append(module_dir)
+
+from tracing import span
+
+README_VIEW_ENV = "FOCALAI_README_VIEW" # Set to 'text' to use the lightweight QTextBrowser display instead of QtWebEngine
+WEB_MODE = "web"
+TEXT_MODE = "text"
+
+_web_engine_available: bool | None = None
+
+def web_engine_available() -> bool:
+    """
+    Checks whether QtWebEngine can be loaded. The import is only attempted once.
+
+    Returns:
+        bool: True if QWebEngineView can be imported, False otherwise.
+    """
+    global _web_engine_available
+    if _web_engine_available is None:
+        try:
+            from PySide6.QtWebEngineWidgets import QWebEngineView  # noqa: F401
+            _web_engine_available = True
+        except ImportError as e:
+            print(f"QtWebEngine is unavailable, README pages use the lightweight view: {e}")
+            _web_engine_available = False
+    return _web_engine_available
+
+def readme_view_mode() -> str:
+    """
+    Returns the README display mode selected through the FOCALAI_README_VIEW environment variable.
+    The web mode is used by default and falls back to the text mode when QtWebEngine cannot be loaded.
+
+    Returns:
+        str: WEB_MODE or TEXT_MODE.
+    """
+    mode = os.environ.get(README_VIEW_ENV, WEB_MODE).strip().lower()
+    if mode == TEXT_MODE:
+        return TEXT_MODE
+    return WEB_MODE if web_engine_available() else TEXT_MODE
+
+def prepare_application() -> None:
+    """
+    Sets the application attributes QtWebEngine needs. Must be called before the QApplication is created.
+    """
+    QCoreApplication.setAttribute(Qt.AA_ShareOpenGLContexts)
+
+class _WebViewPool:
+    """
+    Holds the single QWebEngineView shared by every ReadmeView in the process. Each web view owns a Chromium
+    renderer, so the view is created on first use and lent to whichever ReadmeView is displaying a page.
+    """
+    view = None
+    owner = None
+
+    @classmethod
+    def acquire(cls, owner: "ReadmeView"):
+        """
+        Lends the shared view to a ReadmeView, taking it from its previous owner.
+
+        Args:
+            owner (ReadmeView): The view that will display the web view.
+
+        Returns:
+            QWebEngineView: The shared web view.
+        """
+        if cls.view is None:
+            from PySide6.QtWebEngineWidgets import QWebEngineView
+            cls.view = QWebEngineView()
+            cls.view.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+            cls.view.loadFinished.connect(cls._on_load_finished)
+        if cls.owner is not owner:
+            if cls.owner is not None:
+                cls.owner._release_web_view()
+            cls.owner = owner
+            owner.layout().addWidget(cls.view)
+            cls.view.show()
+        return cls.view
+
+    @classmethod
+    def _on_load_finished(cls, ok: bool) -> None:
+        if cls.owner is not None:
+            cls.owner._on_load_finished(ok)
+
+class ReadmeView(QWidget):
+    """
+    Displays rendered README pages, either through the process-wide pooled QWebEngineView or a lightweight QTextBrowser.
+
+    The web view is only created when the first non-empty page is shown, so starting the application does not start
+    Chromium. Pages are swapped with `setHtml` on the same view, and the sections below the first screenful can be
+    filled in later without reloading the page, which keeps the scroll position.
+
+    Attributes:
+        mode (str): WEB_MODE or TEXT_MODE.
+        zoom_factor (float): The zoom factor applied to the web view.
+    """
+    def __init__(self, parent=None, mode: str | None = None, zoom_factor: float = 0.9) -> None:
+        """
+        Initializes the view.
+
+        Args:
+            parent (QWidget, optional): The parent widget. Defaults to None.
+            mode (str | None): WEB_MODE or TEXT_MODE. Defaults to the mode chosen by `readme_view_mode`.
+            zoom_factor (float): The zoom factor applied to the web view. Defaults to 0.9.
+        """
+        super().__init__(parent)
+        self.mode = mode or readme_view_mode()
+        self.zoom_factor = zoom_factor
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self._page: str | None = None
+        self._rest: dict[str, str] = {}
+        self._loaded = False
+        self._web_view = None
+        self._browser: QTextBrowser | None = None
+        if self.mode == TEXT_MODE:
+            self._browser = QTextBrowser()
+            self._browser.setOpenExternalLinks(True)
+            self._browser.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+            layout.addWidget(self._browser)
+
+    def set_page(self, page: str) -> None:
+        """
+        Displays an HTML page, replacing the current one.
+
+        Args:
+            page (str): The HTML page.
+        """
+        self._page = page
+        self._rest = {}
+        self._loaded = False
+        with span("readme_view.setHtml", mode=self.mode, chars=len(page)):
+            if self.mode == TEXT_MODE:
+                self._browser.setHtml(page)
+                return
+            view = self._acquire_web_view()
+            view.setHtml(page)
+
+    def set_element_html(self, element_id: str, html: str) -> None:
+        """
+        Replaces the content of an element of the current page, such as the container for the remaining sections.
+        If the page is still loading the content is inserted once loading finishes.
+
+        Args:
+            element_id (str): The id of the element.
+            html (str): The new content of the element.
+        """
+        self._rest[element_id] = html
+        if self.mode == TEXT_MODE:
+            # QTextBrowser has no DOM to update, so the page is rebuilt with the element filled in
+            page = self._page or ""
+            for rest_id, rest_html in self._rest.items():
+                page = page.replace(f'<div id="{rest_id}"></div>', f'<div id="{rest_id}">{rest_html}</div>')
+            scrollbar = self._browser.verticalScrollBar()
+            position = scrollbar.value()
+            with span("readme_view.setHtml", mode=self.mode, chars=len(page)):
+                self._browser.setHtml(page)
+            scrollbar.setValue(position)
+        elif self._loaded and self._web_view is not None:
+            self._run_element_update(element_id, html)
+
+    def clear(self) -> None:
+        """Clears the displayed page without creating a web view."""
+        self._page = None
+        self._rest = {}
+        if self._browser is not None:
+            self._browser.clear()
+        elif self._web_view is not None:
+            self._web_view.setHtml("")
+
+    def _acquire_web_view(self):
+        """Borrows the pooled web view, restoring the zoom factor this view uses."""
+        if self._web_view is None:
+            self._web_view = _WebViewPool.acquire(self)
+            self._web_view.setZoomFactor(self.zoom_factor)
+        return self._web_view
+
+    def _release_web_view(self) -> None:
+        """Called by the pool when another ReadmeView takes the shared web view."""
+        self._web_view = None
+        self._loaded = False
+
+    def _run_element_update(self, element_id: str, html: str) -> None:
+        self._web_view.page().runJavaScript(
+            f"var element = document.getElementById({json.dumps(element_id)}); "
+            f"if (element) {{ element.innerHTML = {json.dumps(html)}; }}")
+
+    def _on_load_finished(self, ok: bool) -> None:
+        """Applies element updates that arrived while the page was loading."""
+        self._loaded = True
+        for element_id, html in self._rest.items():
+            self._run_element_update(element_id, html)
+
+    def showEvent(self, event) -> None:
+        """Takes the shared web view back when this view is shown again after another view borrowed it."""
+        super().showEvent(event)
+        if self.mode == WEB_MODE and self._web_view is None and self._page is not None:
+            page, rest = self._page, dict(self._rest)
+            self.set_page(page)
+            self._rest = rest
@@ -0,0 +1,279 @@
+from typing import Callable
+from PySide6.QtWidgets import QStyledItemDelegate, QStyle, QApplication, QStyleOptionViewItem
+from PySide6.QtCore import Qt, QAbstractListModel, QModelIndex, QSize, QRect, QRunnable, QThreadPool, Signal
+from PySide6.QtGui import QFont, QFontMetrics, QColor
+
+class _FetchTask(QRunnable):
+    """
+    Runs a fetcher on the thread pool and hands its batch back to the model, which appends it on the GUI thread.
+    """
+    def __init__(self, model: "RepoListModel", generation: int, fetcher: Callable[[], list | None]) -> None:
+        super().__init__()
+        self.model = model
+        self.generation = generation
+        self.fetcher = fetcher
+
+    def run(self) -> None:
+        try:
+            batch = self.fetcher()
+        except Exception as e:
+            print(f"Failed to fetch more results: {e}")
+            batch = None
+        self.model._batchReady.emit(self.generation, batch)
+
+class RepoListModel(QAbstractListModel):
+    """
+    A list model over repository entries, used with a QListView and RepoItemDelegate instead of a widget per row.
+    Only the rows currently visible are ever painted, so the cost of showing results no longer grows with their count.
+
+    Entries are RepoRecord objects, or any objects exposing `name`, `owner`, `description`, `url` and optionally `is_installed`.
+    Rows can be appended incrementally as results arrive, and a fetcher can be installed to load further pages
+    when the view scrolls to the end of the list. The fetcher runs on the thread pool, so a page loaded over the
+    network does not block the GUI, and its rows are appended once it returns.
+
+    Attributes:
+        RecordRole (int): The item data role returning the entry object itself.
+        records (list): The entries currently in the model.
+    """
+    RecordRole = Qt.UserRole + 1
+    _batchReady = Signal(int, object)  # Emitted by a _FetchTask on a pool thread, delivered on the GUI thread
+
+    def __init__(self, parent=None) -> None:
+        """
+        Initializes an empty model.
+
+        Args:
+            parent (QObject, optional): The parent object. Defaults to None.
+        """
+        super().__init__(parent)
+        self.records: list = []
+        self._fetcher: Callable[[], list] | None = None
+        self._can_fetch = False
+        self._generation = 0  # Advanced whenever the entries or the fetcher are replaced, so stale batches are dropped
+        self._batchReady.connect(self._append_batch)
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        """Returns the number of entries, the model is flat so children never have rows."""
+        return 0 if parent.isValid() else len(self.records)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        """
+        Returns the data for an entry.
+
+        Args:
+            index (QModelIndex): The index of the entry.
+            role (int): The requested item data role.
+
+        Returns:
+            The entry name for display, its URL and description as a tooltip, the entry itself for RecordRole, or None.
+        """
+        if not index.isValid() or not 0 <= index.row() < len(self.records):
+            return None
+        record = self.records[index.row()]
+        if role == Qt.DisplayRole:
+            return record.name
+        if role == Qt.ToolTipRole:
+            return f"{record.url}\n{record.description or ''}"
+        if role == self.RecordRole:
+            return record
+        return None
+
+    def record(self, row: int):
+        """
+        Returns the entry at a row.
+
+        Args:
+            row (int): The row of the entry.
+
+        Returns:
+            The entry, or None if the row is out of range.
+        """
+        return self.records[row] if 0 <= row < len(self.records) else None
+
+    def set_records(self, records: list) -> None:
+        """
+        Replaces all entries in the model.
+
+        Args:
+            records (list): The new entries.
+        """
+        self.beginResetModel()
+        self.records = list(records)
+        self._fetcher = None
+        self._can_fetch = False
+        self._generation += 1
+        self.endResetModel()
+
+    def append_records(self, records: list) -> None:
+        """
+        Appends entries to the end of the model, notifying views of only the inserted rows.
+
+        Args:
+            records (list): The entries to append.
+        """
+        if not records:
+            return
+        start = len(self.records)
+        self.beginInsertRows(QModelIndex(), start, start + len(records) - 1)
+        self.records.extend(records)
+        self.endInsertRows()
+
+    def find_row(self, url: str) -> int:
+        """
+        Finds the row of the entry with a given URL.
+
+        Args:
+            url (str): The repository URL to look for.
+
+        Returns:
+            int: The row of the entry, or -1 if no entry has that URL.
+        """
+        url = url.rstrip('/')
+        for row, record in enumerate(self.records):
+            if record.url.rstrip('/') == url:
+                return row
+        return -1
+
+    def replace_record(self, row: int, record) -> None:
+        """
+        Replaces the entry at a row, repainting only that row.
+
+        Args:
+            row (int): The row of the entry to replace.
+            record: The new entry.
+        """
+        if 0 <= row < len(self.records):
+            self.records[row] = record
+            index = self.index(row)
+            self.dataChanged.emit(index, index)
+
+    def remove_record(self, row: int) -> None:
+        """
+        Removes the entry at a row.
+
+        Args:
+            row (int): The row of the entry to remove.
+        """
+        if 0 <= row < len(self.records):
+            self.beginRemoveRows(QModelIndex(), row, row)
+            del self.records[row]
+            self.endRemoveRows()
+
+    def clear(self) -> None:
+        """Removes all entries."""
+        self.set_records([])
+
+    def set_fetcher(self, fetcher: Callable[[], list] | None) -> None:
+        """
+        Installs a callable that returns the next batch of entries, or None once there are no more.
+        It is run on the thread pool through `fetchMore` when the view is scrolled to the end of the list.
+
+        Args:
+            fetcher (Callable[[], list] | None): The batch loader, or None to stop fetching. It must not touch widgets.
+        """
+        self._fetcher = fetcher
+        self._can_fetch = fetcher is not None
+        self._generation += 1
+
+    def canFetchMore(self, parent: QModelIndex = QModelIndex()) -> bool:
+        """Returns True while a fetcher is installed and has not run out of entries."""
+        return not parent.isValid() and self._can_fetch
+
+    def fetchMore(self, parent: QModelIndex = QModelIndex()) -> None:
+        """Starts loading the next batch of entries from the fetcher on the thread pool."""
+        if parent.isValid() or self._fetcher is None or not self._can_fetch:
+            return
+        self._can_fetch = False  # No further fetch starts while the batch loads
+        QThreadPool.globalInstance().start(_FetchTask(self, self._generation, self._fetcher))
+
+    def _append_batch(self, generation: int, batch: list | None) -> None:
+        """Appends a fetched batch, unless the entries or the fetcher were replaced while it loaded."""
+        if generation != self._generation:
+            return
+        if batch is None:
+            self._fetcher = None
+            return
+        self._can_fetch = True
+        self.append_records(batch)
+
+class RepoItemDelegate(QStyledItemDelegate):
+    """
+    Paints a repository entry's name, owner, description, URL and installed status directly, replacing the
+    per-row RepoWidget. Fonts and metrics are created once and every row has the same height, so the view can
+    lay out rows without measuring them.
+
+    Attributes:
+        padding (int): The margin around the painted text, in pixels.
+    """
+    installed_color = QColor("green")
+    not_installed_color = QColor("red")
+
+    def __init__(self, parent=None) -> None:
+        """
+        Initializes the delegate and its fonts.
+
+        Args:
+            parent (QObject, optional): The parent object. Defaults to None.
+        """
+        super().__init__(parent)
+        self.padding = 8
+        self.text_font = QApplication.font()
+        self.name_font = QFont(self.text_font)
+        self.name_font.setBold(True)
+        self.status_font = QFont("Arial", 12)
+        self.installed_font = QFont(self.status_font)
+        self.installed_font.setItalic(True)
+        self.name_metrics = QFontMetrics(self.name_font)
+        self.text_metrics = QFontMetrics(self.text_font)
+        self.line_height = max(self.name_metrics.lineSpacing(), self.text_metrics.lineSpacing())
+        self.status_height = QFontMetrics(self.installed_font).lineSpacing()
+
+    def sizeHint(self, option: QStyleOptionViewItem, index: QModelIndex) -> QSize:
+        """Returns the fixed size shared by all rows."""
+        return QSize(option.rect.width(), 4 * self.line_height + self.status_height + 2 * self.padding)
+
+    def paint(self, painter, option: QStyleOptionViewItem, index: QModelIndex) -> None:
+        """
+        Paints one repository entry.
+
+        Args:
+            painter (QPainter): The painter to draw with.
+            option (QStyleOptionViewItem): The style options of the row, including its rectangle and state.
+            index (QModelIndex): The index of the entry.
+        """
+        record = index.data(RepoListModel.RecordRole)
+        if record is None:
+            return
+        painter.save()
+        style = option.widget.style() if option.widget else QApplication.style()
+        style.drawPrimitive(QStyle.PE_PanelItemViewItem, option, painter, option.widget)
+
+        selected = bool(option.state & QStyle.State_Selected)
+        text_color = option.palette.highlightedText().color() if selected else option.palette.text().color()
+        rect = option.rect.adjusted(self.padding, self.padding, -self.padding, -self.padding)
+        width = rect.width()
+
+        lines = [
+            (self.name_font, self.name_metrics, f"Name: {record.name}"),
+            (self.text_font, self.text_metrics, f"Owner: {record.owner}"),
+            (self.text_font, self.text_metrics, f"Description: {record.description or ''}"),
+            (self.text_font, self.text_metrics, f"URL: {record.url}"),
+        ]
+        painter.setPen(text_color)
+        top = rect.top()
+        for font, metrics, text in lines:
+            painter.setFont(font)
+            elided = metrics.elidedText(" ".join(text.split()), Qt.ElideRight, width)
+            painter.drawText(QRect(rect.left(), top, width, self.line_height), Qt.AlignLeft | Qt.AlignVCenter, elided)
+            top += self.line_height
+
+        if getattr(record, "is_installed", False):
+            painter.setFont(self.installed_font)
+            painter.setPen(self.installed_color)
+            status = "Locally Available"
+        else:
+            painter.setFont(self.status_font)
+            painter.setPen(self.not_installed_color)
+            status = "Not Locally Available"
+        painter.drawText(QRect(rect.left(), top, width, self.status_height), Qt.AlignLeft | Qt.AlignVCenter, status)
+        painter.restore()
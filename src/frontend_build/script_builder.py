@@ -257,7 +257,7 @@ if __name__ == "__main__":
 
             command = f"python {fileName}"
             call_tuple = self.running_env(command)
-            script_run_successful = run_environment_command(self.parent(), worker_name="call" ,command=call_tuple[0], error_message=call_tuple[1])
+            script_run_successful = run_environment_command(self.parent(), worker_name="call" ,command=call_tuple[0], error_message=call_tuple[1], env_name=self.running_env.env_name)
 
             if script_run_successful:
                 QMessageBox.information(self, "Success", "Script ran successfully, check log for details.")
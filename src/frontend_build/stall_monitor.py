@@ -0,0 +1,242 @@
+import os
+import sys
+import time
+import logging
+import threading
+import traceback
+from collections import Counter, deque
+from PySide6.QtCore import QObject, QTimer
+
+module_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+if module_dir not in sys.path:
+    sys.path.append(module_dir)
+
+from directories import STALL_LOG, ensure_parent_dir
+from tracing import get_tracer
+
+STALL_THRESHOLD_ENV = "FOCALAI_STALL_MS" # The stall threshold in milliseconds, 0 switches the monitor off
+DEFAULT_THRESHOLD_MS = 250
+MAX_STACK_FRAMES = 30
+MAX_SAMPLES_PER_STALL = 200
+
+logger = logging.getLogger(__name__)
+
+class Stall:
+    """
+    A period in which the GUI event loop did not run.
+
+    Attributes:
+        started (float): The `time.perf_counter` time of the last heartbeat before the stall.
+        duration (float): Seconds between that heartbeat and the next one, beyond the heartbeat interval.
+        site (str): Where the main thread was most often found while stalled, e.g. 'FocalAI.py:221 in search_items'.
+        stack (list[str]): The main thread's stack, innermost last, as first captured at that site.
+        samples (int): The number of stacks captured during the stall.
+    """
+    __slots__ = ("started", "duration", "site", "stack", "samples", "_sites", "_stacks")
+
+    def __init__(self, started: float) -> None:
+        self.started = started
+        self.duration = 0.0
+        self.site = "unknown"
+        self.stack: list[str] = []
+        self.samples = 0
+        self._sites: Counter[str] = Counter()
+        self._stacks: dict[str, list[str]] = {}
+
+    def add_sample(self, site: str, stack: list[str]) -> None:
+        """Counts one captured stack of the main thread."""
+        self.samples += 1
+        self._sites[site] += 1
+        self._stacks.setdefault(site, stack)
+        self.site = self._sites.most_common(1)[0][0]
+        self.stack = self._stacks[self.site]
+
+class StallMonitor(QObject):
+    """
+    Measures the latency of the GUI event loop and records where the main thread was when the loop stalled.
+
+    A heartbeat QTimer on the GUI thread notes each time it runs, and its lateness is the event loop latency. A
+    sampling thread checks the heartbeat: once it is more than `threshold_ms` milliseconds old, the loop is stalled and
+    the main thread's Python stack is captured with `sys._current_frames` on every sample until the heartbeat resumes.
+    The stall is then attributed to the application frame the main thread was found in most often, logged with its
+    stack to STALL_LOG, and counted per site. Stalls are also recorded as 'ui.stall' spans while tracing is on.
+
+    Attributes:
+        threshold_ms (float): How long the loop may go without a heartbeat before it counts as stalled.
+        interval_ms (int): The heartbeat interval.
+        sample_ms (int): How often the sampling thread checks the heartbeat.
+        log_path (str | None): The file stalls are appended to, None to only keep them in memory.
+        site_counts (Counter[str]): The number of stalls per site.
+        stalls (deque[Stall]): The most recent stalls.
+    """
+    def __init__(self, threshold_ms: float = DEFAULT_THRESHOLD_MS, interval_ms: int = 50, sample_ms: int = 25,
+                 log_path: str | None = STALL_LOG, max_stalls: int = 200, parent=None) -> None:
+        """
+        Initializes the monitor. It must be created on the GUI thread, and does nothing until started.
+
+        Args:
+            threshold_ms (float): The stall threshold in milliseconds. Defaults to DEFAULT_THRESHOLD_MS.
+            interval_ms (int): The heartbeat interval in milliseconds. Defaults to 50.
+            sample_ms (int): How often the heartbeat is checked, in milliseconds. Defaults to 25.
+            log_path (str | None): The file stalls are appended to. Defaults to STALL_LOG.
+            max_stalls (int): The number of recent stalls kept. Defaults to 200.
+            parent (QObject, optional): The parent object. Defaults to None.
+        """
+        super().__init__(parent)
+        self.threshold_ms = threshold_ms
+        self.interval_ms = interval_ms
+        self.sample_ms = sample_ms
+        self.log_path = log_path
+        self.site_counts: Counter[str] = Counter()
+        self.stalls: deque[Stall] = deque(maxlen=max_stalls)
+        self._latencies: deque[float] = deque(maxlen=2048)
+        self._lock = threading.Lock()
+        self._main_thread_id = threading.get_ident()
+        self._last_beat = time.perf_counter()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._timer = QTimer(self)
+        self._timer.setInterval(interval_ms)
+        self._timer.timeout.connect(self._beat)
+
+    @classmethod
+    def from_environment(cls, parent=None) -> "StallMonitor | None":
+        """
+        Creates a monitor with the threshold from the FOCALAI_STALL_MS environment variable.
+
+        Args:
+            parent (QObject, optional): The parent object. Defaults to None.
+
+        Returns:
+            StallMonitor | None: The monitor, or None if the variable is 0.
+        """
+        try:
+            threshold_ms = float(os.environ.get(STALL_THRESHOLD_ENV, DEFAULT_THRESHOLD_MS))
+        except ValueError:
+            print(f"Ignoring {STALL_THRESHOLD_ENV}, it is not a number of milliseconds")
+            threshold_ms = DEFAULT_THRESHOLD_MS
+        if threshold_ms <= 0:
+            return None
+        return cls(threshold_ms=threshold_ms, parent=parent)
+
+    def start(self) -> None:
+        """Starts the heartbeat and the sampling thread."""
+        if self._thread is not None:
+            return
+        self._last_beat = time.perf_counter()
+        self._stop.clear()
+        self._timer.start()
+        self._thread = threading.Thread(target=self._sample, name="stall-monitor", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stops monitoring. A stall in progress is recorded as it is."""
+        if self._thread is None:
+            return
+        self._timer.stop()
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def _beat(self) -> None:
+        now = time.perf_counter()
+        late = (now - self._last_beat) * 1000 - self.interval_ms
+        with self._lock:
+            self._latencies.append(max(late, 0.0))
+        self._last_beat = now
+
+    def _site(self, frames: traceback.StackSummary) -> str:
+        """Returns the innermost application frame of a stack, outside this module, as 'file:line in function'."""
+        for frame in reversed(frames):
+            filename = os.path.abspath(frame.filename)
+            if filename.startswith(module_dir + os.sep) and filename != os.path.abspath(__file__):
+                return f"{os.path.basename(filename)}:{frame.lineno} in {frame.name}"
+        if frames:
+            frame = frames[-1]
+            return f"{os.path.basename(frame.filename)}:{frame.lineno} in {frame.name}"
+        return "unknown"
+
+    def _capture(self, stall: Stall) -> None:
+        """Captures the main thread's stack into a stall."""
+        frame = sys._current_frames().get(self._main_thread_id)
+        if frame is None:
+            return
+        frames = traceback.extract_stack(frame, limit=MAX_STACK_FRAMES)
+        stall.add_sample(self._site(frames), traceback.format_list(frames))
+
+    def _sample(self) -> None:
+        """Runs on the sampling thread, capturing stacks while the heartbeat is late."""
+        interval = self.sample_ms / 1000
+        stall: Stall | None = None
+        while not self._stop.wait(interval):
+            beat = self._last_beat
+            if stall is not None and beat != stall.started:
+                self._record(stall, beat)
+                stall = None
+            if (time.perf_counter() - beat) * 1000 > self.threshold_ms:
+                if stall is None:
+                    stall = Stall(beat)
+                if stall.samples < MAX_SAMPLES_PER_STALL:
+                    self._capture(stall)
+        if stall is not None:
+            self._record(stall, time.perf_counter())
+
+    def _record(self, stall: Stall, resumed: float) -> None:
+        """Counts a stall that ended, logs it and records it as a span."""
+        stall.duration = max(resumed - stall.started - self.interval_ms / 1000, 0.0)
+        with self._lock:
+            self.site_counts[stall.site] += 1
+            self.stalls.append(stall)
+            count = self.site_counts[stall.site]
+        logger.warning(f"GUI event loop stalled for {stall.duration * 1000:.0f} ms at {stall.site} ({count} so far)")
+        get_tracer().record("ui.stall", stall.started, stall.duration, site=stall.site, samples=stall.samples)
+        if self.log_path is None:
+            return
+        try:
+            with open(ensure_parent_dir(self.log_path), 'a', encoding='utf-8') as file:
+                file.write(f"{time.strftime('%Y-%m-%d %H:%M:%S')} stalled {stall.duration * 1000:.0f} ms at "
+                           f"{stall.site} ({stall.samples} samples, stall #{count} at this site)\n")
+                file.writelines(stall.stack)
+                file.write("\n")
+        except OSError as e:
+            print(f"Could not write the stall log {self.log_path}: {e}")
+
+    def stats(self) -> dict:
+        """
+        Reports the event loop latency and the stalls recorded so far.
+
+        Returns:
+            dict: 'latency_p50_ms' and 'latency_p99_ms' (how late heartbeats ran, None before the first one), 'stalls'
+            (the number of stalls), 'max_stall_ms', and 'sites' (stall counts per site, most frequent first).
+        """
+        with self._lock:
+            latencies = sorted(self._latencies)
+            sites = self.site_counts.most_common()
+            stalls = list(self.stalls)
+
+        def percentile(fraction: float) -> float | None:
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(fraction * len(latencies)))], 2)
+        return {"latency_p50_ms": percentile(0.50),
+                "latency_p99_ms": percentile(0.99),
+                "stalls": sum(count for _, count in sites),
+                "max_stall_ms": round(max((stall.duration for stall in stalls), default=0.0) * 1000, 1),
+                "sites": dict(sites)}
+
+    def report(self, top: int = 10) -> str:
+        """
+        Summarises the stalls per site.
+
+        Args:
+            top (int): The number of sites listed. Defaults to 10.
+
+        Returns:
+            str: The summary, one line per site.
+        """
+        stats = self.stats()
+        lines = [f"Event loop latency p50 {stats['latency_p50_ms']} ms, p99 {stats['latency_p99_ms']} ms, "
+                 f"{stats['stalls']} stalls over {self.threshold_ms:.0f} ms, longest {stats['max_stall_ms']} ms"]
+        for site, count in list(stats["sites"].items())[:top]:
+            lines.append(f"{count:>6}  {site}")
+        return "\n".join(lines)
@@ -0,0 +1,143 @@
+import os
+import re
+import sys
+import json
+import time
+import tempfile
+import subprocess
+from PySide6.QtCore import QObject, QEvent, QTimer, QCoreApplication
+
+PROFILE_FLAG = "--profile-startup"
+PROFILE_RESULT_ENV = "FOCALAI_STARTUP_PROFILE" # Set in the profiled child process to the path it writes its timings to
+
+_IMPORTTIME_PATTERN = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+def parse_importtime(lines) -> list[dict]:
+    """
+    Parses the output of `python -X importtime`.
+
+    Args:
+        lines (Iterable[str]): The lines written to stderr by the profiled process.
+
+    Returns:
+        list[dict]: One record per imported module with its 'module' name, 'self_us' and 'cumulative_us' import times
+        in microseconds, and its nesting 'depth', where 0 means it was imported directly by the application.
+    """
+    records = []
+    for line in lines:
+        match = _IMPORTTIME_PATTERN.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            records.append({
+                "module": module,
+                "self_us": int(self_us),
+                "cumulative_us": int(cumulative_us),
+                "depth": max(len(indent) - 1, 0) // 2
+            })
+    return records
+
+def is_profiling_child() -> bool:
+    """
+    Checks whether this process is the child started by `profile_startup`.
+
+    Returns:
+        bool: True if the process should report its first paint.
+    """
+    return PROFILE_RESULT_ENV in os.environ
+
+def profile_startup(script: str, args: list[str], top: int = 15, timeout: float = 120.0) -> int:
+    """
+    Starts the application in a child process with `-X importtime`, waits for it to paint its first window, and prints
+    the wall time to that paint along with the most expensive imports.
+
+    Args:
+        script (str): The path of the application script.
+        args (list[str]): The command line arguments, PROFILE_FLAG is removed before they are passed on.
+        top (int): The number of modules listed in each table. Defaults to 15.
+        timeout (float): The number of seconds to wait for the first paint. Defaults to 120.
+
+    Returns:
+        int: The exit code, 0 if the first paint was measured and 1 otherwise.
+    """
+    child_args = [arg for arg in args if arg != PROFILE_FLAG]
+    with tempfile.TemporaryDirectory(prefix="focalai-profile-") as temp_dir:
+        result_path = os.path.join(temp_dir, "result.json")
+        importtime_path = os.path.join(temp_dir, "importtime.log")
+        env = dict(os.environ, **{PROFILE_RESULT_ENV: result_path})
+        started = time.time()
+        with open(importtime_path, 'w', encoding='utf-8') as importtime_log:
+            try:
+                subprocess.run([sys.executable, "-X", "importtime", script, *child_args], env=env,
+                               stderr=importtime_log, timeout=timeout)
+            except subprocess.TimeoutExpired:
+                print(f"The application did not paint a window within {timeout:.0f} seconds")
+        try:
+            with open(result_path, 'r', encoding='utf-8') as file:
+                result = json.load(file)
+        except (OSError, ValueError):
+            print("No first paint was recorded, the application may have exited or failed to start")
+            return 1
+        with open(importtime_path, 'r', encoding='utf-8', errors='replace') as file:
+            records = parse_importtime(file)
+
+    print(f"Wall time to first paint: {(result['first_paint'] - started) * 1000:.0f} ms")
+    print(f"Wall time to window construction: {(result['window_shown'] - started) * 1000:.0f} ms")
+    print(f"Total import time: {sum(r['self_us'] for r in records) / 1000:.0f} ms across {len(records)} modules")
+
+    print(f"\nTop {top} imports by cumulative time (imported directly):")
+    direct = sorted((r for r in records if r['depth'] == 0), key=lambda r: r['cumulative_us'], reverse=True)
+    for record in direct[:top]:
+        print(f"  {record['cumulative_us'] / 1000:9.1f} ms  {record['module']}")
+
+    print(f"\nTop {top} modules by self time:")
+    for record in sorted(records, key=lambda r: r['self_us'], reverse=True)[:top]:
+        print(f"  {record['self_us'] / 1000:9.1f} ms  {record['module']}")
+    return 0
+
+class FirstPaintProbe(QObject):
+    """
+    Records the time a window is first painted, writes it to the profiling result file and quits the application.
+
+    Attributes:
+        result_path (str): The path the timings are written to.
+        window_shown (float): The time the window was shown, as seconds since the epoch.
+    """
+    def __init__(self, window, result_path: str) -> None:
+        """
+        Initializes the probe and starts watching the window's events.
+
+        Args:
+            window (QWidget): The window whose first paint is measured.
+            result_path (str): The path the timings are written to.
+        """
+        super().__init__(window)
+        self.result_path = result_path
+        self.window_shown = time.time()
+        self._done = False
+        window.installEventFilter(self)
+
+    def eventFilter(self, watched, event) -> bool:
+        if event.type() == QEvent.Paint and not self._done:
+            self._done = True
+            # Record after the paint event has been handled, so the time covers the window actually drawing
+            QTimer.singleShot(0, self._finish)
+        return False
+
+    def _finish(self) -> None:
+        with open(self.result_path, 'w', encoding='utf-8') as file:
+            json.dump({"window_shown": self.window_shown, "first_paint": time.time()}, file)
+        QCoreApplication.quit()
+
+def install_first_paint_probe(window) -> FirstPaintProbe | None:
+    """
+    Measures the window's first paint when running as the profiled child process.
+
+    Args:
+        window (QWidget): The main window, before it is shown.
+
+    Returns:
+        FirstPaintProbe | None: The probe, or None when startup is not being profiled.
+    """
+    if not is_profiling_child():
+        return None
+    return FirstPaintProbe(window, os.environ[PROFILE_RESULT_ENV])
@@ -1,7 +1,6 @@
 from PySide6.QtWidgets import (QApplication)
 from PySide6.QtGui import QPalette, QColor
 from PySide6.QtCore import Qt
-from pygments.formatters import HtmlFormatter
 import os
 import sys
 
@@ -18,6 +17,7 @@ class Styler:
     Attributes:
         dark_mode_enabled (bool): Flag to determine if the dark mode is currently enabled.
         components (list): A list of UI components that require styling updates when the theme changes.
+        theme (str): The name of the current theme, 'dark' or 'light'.
     """
     def __init__(self):
         """
@@ -25,6 +25,7 @@ class Styler:
         """
         self.dark_mode_enabled = False
         self.components = []
+        self._doc_css: dict[bool, str] = {} # Theme CSS memoized per mode, Pygments style generation is slow
 
     def style_me(self) -> None:
         """
@@ -94,13 +95,42 @@ class Styler:
     
 
     @property
-    def doc_css(self) -> HtmlFormatter:
+    def theme(self) -> str:
+        """
+        The name of the current theme, used to key theme dependent caches such as rendered README pages.
+
+        Returns:
+            str: 'dark' if dark mode is enabled, 'light' otherwise.
+        """
+        return "dark" if self.dark_mode_enabled else "light"
+
+    @property
+    def doc_css(self) -> str:
         """
         Generates CSS for HTML content, adjusted for either dark or light mode. This is particularly useful for styling HTML views within the application.
+        The CSS is generated once per mode and reused afterwards.
 
         Returns:
             str: A string containing CSS rules formatted for HTML content, tailored to the current theme (dark or light).
         """
+        css = self._doc_css.get(self.dark_mode_enabled)
+        if css is None:
+            css = self._doc_css[self.dark_mode_enabled] = self._build_doc_css(self.dark_mode_enabled)
+        return css
+
+    @staticmethod
+    def _build_doc_css(dark_mode: bool) -> str:
+        """
+        Builds the CSS for HTML content in one mode.
+
+        Args:
+            dark_mode (bool): Whether to build the dark mode CSS.
+
+        Returns:
+            str: The CSS rules for the mode.
+        """
+        from pygments.formatters import HtmlFormatter # Imported on first use, Pygments is slow to import
+
         # Common CSS for both dark and light modes
         css = HtmlFormatter().get_style_defs('.codehilite')
         css += """
@@ -120,7 +150,7 @@ class Styler:
         """
         
         # Conditional CSS for dark and light modes
-        if self.dark_mode_enabled:  # Dark mode settings
+        if dark_mode:  # Dark mode settings
             css += """
         body {
             background-color: #1e1e1e;
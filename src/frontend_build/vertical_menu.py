@@ -31,6 +31,7 @@ class VerticalMenu:
         """
         self.parent = parent
         self.styler = styler
+        self.performance_panel = None
         self.styler.register_component(self)
         # self.styler.style_me()
         self.create_menus()
@@ -38,7 +39,8 @@ class VerticalMenu:
     def create_menus(self):
         """
         Sets up the menus within the parent's menu bar. This method adds an 'Edit' menu with a 'Preferences' submenu 
-        for toggling dark mode, and a 'My Models' menu with actions related to model management.
+        for toggling dark mode, a 'My Models' menu with actions related to model management, and a 'View' menu that
+        opens the performance panel.
         """
         editMenu = self.parent.menuBar().addMenu("&Edit")
         preferencesMenu = QMenu("Preferences", self.parent)
@@ -52,6 +54,20 @@ class VerticalMenu:
         menu.addAction(action)
         # action.toggled.connect(self.open_model_list)
 
+        viewMenu = self.parent.menuBar().addMenu("&View")
+        performanceAction = viewMenu.addAction("Performance")
+        performanceAction.triggered.connect(self.open_performance_panel)
+
+    def open_performance_panel(self) -> None:
+        """
+        Opens the performance panel, which shows the recorded timing spans. It is created on first use.
+        """
+        if self.performance_panel is None:
+            from performance_panel import PerformancePanel
+            self.performance_panel = PerformancePanel()
+        self.performance_panel.show()
+        self.performance_panel.raise_()
+
 
     def update_style(self) -> None:
         """
@@ -7,26 +7,30 @@ module_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
 if module_dir not in sys.path:
     sys.path.append(module_dir)
 
-from directories import LOG_DIR
 from conda_env import run_subprocess_with_logging
+from log_stream import LogStream
+from tracing import span
 
 class Worker(QObject):
     """
-    A specialized QObject that runs a given command in a subprocess, emitting real-time output and completion status. 
+    A specialized QObject that runs a given command in a subprocess, streaming real-time output and completion status. 
     Designed to handle asynchronous command execution with signals for integrating into Qt event loops.
 
+    Output lines are fed into a LogStream instead of being emitted one signal per line, so the GUI thread only
+    receives rate-limited frames no matter how chatty the subprocess is.
+
     Attributes:
-        output (Signal): Emitted with a string payload containing output from the subprocess.
         finished (Signal): Emitted when the subprocess completes, with a boolean indicating success or failure.
         name (str): A unique identifier for the worker, used for logging purposes.
         command (str): The command line to be executed in the subprocess.
         error_message (str): The message to log or emit in case of an error during subprocess execution.
+        stream (LogStream): The stream that batches output lines into frames for the GUI thread.
+        env_name (str | None): The conda environment the command runs in, recorded in the run log index.
         success (bool): Indicates whether the command execution was successful.
     """
-    output = Signal(str)  # Signal to emit output lines
     finished = Signal(bool)  # Signal to emit on process completion, with success status
 
-    def __init__(self, name: str, command: str, error_message: str):
+    def __init__(self, name: str, command: str, error_message: str, stream: LogStream, env_name: str | None = None):
         """
         Initializes the Worker with necessary parameters for subprocess execution and logging.
 
@@ -34,28 +38,35 @@ class Worker(QObject):
             name (str): The name of the worker, used as a label in logs.
             command (str): The complete shell command to be executed.
             error_message (str): A predefined error message to use if the command fails.
+            stream (LogStream): The stream receiving output lines, owned by the GUI thread.
+            env_name (str | None): The conda environment the command runs in. Optional.
         """
         super().__init__()
         self.name = name
         self.command = command
         self.error_message = error_message
+        self.stream = stream
+        self.env_name = env_name
         self.success = False  # Track the success of the command execution
 
     @Slot()
     def run_command(self):
         """
-        Executes the stored command in a subprocess, emitting output line by line, and then emits a finished signal 
+        Executes the stored command in a subprocess, feeding output into the stream line by line, and then emits a finished signal 
         upon completion. This method is designed to be run in a separate thread to avoid blocking the GUI.
 
-        Uses the `run_subprocess_with_logging` utility to execute the command with stdout and stderr redirected to both a log file and emitted via signals.
+        Uses the `run_subprocess_with_logging` utility to execute the command with stdout and stderr redirected to both a log file and the stream.
         """
-        log_path = os.path.join(LOG_DIR, f"{self.name}.log") 
         try:
-            for line in run_subprocess_with_logging(self.command, self.error_message, log_file_dir=log_path):
-                self.output.emit(line)  # Emit each line of the subprocess output
+            with span("worker.subprocess", run=self.name, env=self.env_name) as trace:
+                lines = 0
+                for line in run_subprocess_with_logging(self.command, self.error_message, run_name=self.name, env_name=self.env_name):
+                    self.stream.feed(line)  # Buffered, the stream delivers frames to the GUI thread
+                    lines += 1
+                trace.set(lines=lines)
             self.success = True  # If execution reaches here, no exceptions were raised
         except Exception as e:
-            self.output.emit(str(e))  # Optionally emit the error
+            self.stream.feed(f"{e}\n")  # Surface the error in the progress display
             self.success = False
         finally:
             self.finished.emit(self.success)  # Emit the finished signal with the success flag
@@ -0,0 +1,520 @@
+import os
+import sys
+import json
+import mmap
+import time
+import shutil
+import hashlib
+import tempfile
+import threading
+import mimetypes
+from typing import Callable
+from directories import INPUT_STORE_DIR, ensure_dir
+
+INPUT_STORE_VERSION = 1
+HASH_CHUNK_BYTES = 8 * 1024 * 1024
+COPY_CHUNK_BYTES = 4 * 1024 * 1024
+DEFAULT_QUOTA_BYTES = 10 * 1024 ** 3
+MAX_SOURCES = 1024 # Source files remembered so that adding the same unchanged file again skips hashing
+FICLONE = 0x40049409 # Linux ioctl that shares the source's extents with the destination (btrfs, XFS, bcachefs)
+
+def hash_file(path: str, progress: Callable[[int, int], None] | None = None) -> str:
+    """
+    Computes the SHA-256 of a file through a read-only memory map, in chunks so progress can be reported.
+
+    Args:
+        path (str): The path of the file.
+        progress (Callable[[int, int], None] | None): Called with (bytes hashed, total bytes) after each chunk. Optional.
+
+    Returns:
+        str: The hex digest.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        size = os.fstat(file.fileno()).st_size
+        if size == 0:
+            return digest.hexdigest() # Empty files cannot be mapped
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            try:
+                for offset in range(0, size, HASH_CHUNK_BYTES):
+                    digest.update(view[offset:offset + HASH_CHUNK_BYTES])
+                    if progress is not None:
+                        progress(min(offset + HASH_CHUNK_BYTES, size), size)
+            finally:
+                view.release()
+    return digest.hexdigest()
+
+def _reflink(src_path: str, dest_path: str) -> None:
+    """
+    Creates dest_path as a copy-on-write clone of src_path.
+
+    Raises:
+        OSError: If the platform or file system does not support cloning.
+    """
+    if not sys.platform.startswith('linux'):
+        raise OSError("Reflinks are only supported on Linux")
+    import fcntl
+    with open(src_path, 'rb') as source, open(dest_path, 'xb') as target:
+        try:
+            fcntl.ioctl(target.fileno(), FICLONE, source.fileno())
+        except OSError:
+            target.close()
+            os.remove(dest_path)
+            raise
+
+# Tried in order, each either creates the destination without copying any data or raises OSError. A reflink is
+# preferred because it is an independent copy, a hard linked object changes if its source is edited in place.
+LINK_METHODS: list[tuple[str, Callable[[str, str], None]]] = [
+    ("reflink", _reflink),
+    ("hardlink", os.link),
+]
+
+class InputStore:
+    """
+    Stores model inputs by the SHA-256 of their content, so a file is kept once however often it is dropped, and
+    inputs from earlier sessions stay available to run models on again.
+
+    Objects are brought in with a reflink or a hard link when possible and copied otherwise. A JSON index records each
+    object's original name, size, MIME type, when it was first seen and last used, so listing the store never touches
+    the objects. Inputs that are in use are pinned and never deleted; removing a pinned input deletes it once its last
+    pin is released. When the objects exceed the quota, the least recently used unpinned inputs are evicted.
+
+    Index entries are dictionaries with the keys 'digest', 'name', 'size', 'mime', 'first_seen', 'last_used', 'path'
+    and 'mtime_ns', the object's modification time, which detects a hard linked object whose source was edited.
+
+    Attributes:
+        root (str): The directory holding the index and the objects.
+        quota_bytes (int): The total object size above which inputs are evicted.
+    """
+    def __init__(self, root: str | None = None, quota_bytes: int = DEFAULT_QUOTA_BYTES) -> None:
+        """
+        Initializes the store. Nothing is read or created until the store is first used.
+
+        Args:
+            root (str | None): The directory of the store. Defaults to INPUT_STORE_DIR.
+            quota_bytes (int): The total object size above which inputs are evicted. Defaults to 10 GiB.
+        """
+        self.root = root or INPUT_STORE_DIR
+        self.quota_bytes = quota_bytes
+        self.index_path = os.path.join(self.root, 'index.json')
+        self._objects: dict[str, dict] | None = None
+        self._sources: dict[str, list] = {}
+        self._stamp: tuple[int, int] | None = None
+        self._published: dict[str, dict] | None = None  # The entries as last reported to listeners, diffed by refresh
+        self._pins: dict[str, int] = {}
+        self._doomed: set[str] = set()  # Removed while pinned, deleted when the last pin is released
+        self._lock = threading.RLock()
+        self._listeners: list[Callable[[str, dict], None]] = []
+
+    def _index_stamp(self) -> tuple[int, int] | None:
+        try:
+            stat = os.stat(self.index_path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _load(self) -> dict[str, dict]:
+        """Returns the cached index, re-reading it only if another process changed it."""
+        stamp = self._index_stamp()
+        if self._objects is not None and stamp == self._stamp:
+            return self._objects
+        objects, sources = {}, {}
+        if stamp is not None:
+            try:
+                with open(self.index_path, 'r', encoding='utf-8') as file:
+                    data = json.load(file)
+                objects = {entry["digest"]: entry for entry in data.get("objects", [])}
+                sources = data.get("sources", {})
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                print(f"Could not read input store index {self.index_path}: {e}")
+        self._objects, self._sources, self._stamp = objects, sources, stamp
+        if self._published is None:
+            self._published = dict(objects)
+        return objects
+
+    def _save(self) -> None:
+        """Atomically writes the index."""
+        ensure_dir(self.root)
+        data = {"version": INPUT_STORE_VERSION, "objects": list(self._objects.values()), "sources": self._sources}
+        fd, temp_path = tempfile.mkstemp(prefix=".index-", suffix=".tmp", dir=self.root)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as file:
+                json.dump(data, file)
+            os.replace(temp_path, self.index_path)
+        except OSError:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        self._stamp = self._index_stamp()
+        self._published = dict(self._objects)
+
+    def _object_path(self, digest: str, name: str) -> str:
+        """Objects keep the extension of the name they were first seen with, models pick their decoder by it."""
+        extension = os.path.splitext(name)[1].lower()
+        return os.path.join(self.root, 'objects', digest[:2], digest + extension)
+
+    def _is_intact(self, entry: dict) -> bool:
+        """Checks an object without hashing it: it must exist with the recorded size and modification time."""
+        try:
+            stat = os.stat(entry["path"])
+        except OSError:
+            return False
+        return stat.st_size == entry["size"] and stat.st_mtime_ns == entry["mtime_ns"]
+
+    def _lookup_source(self, src_path: str, stat: os.stat_result) -> str | None:
+        """Returns the digest recorded for a source file, if the file is unchanged since it was hashed."""
+        record = self._sources.get(src_path)
+        if record and record[:3] == [stat.st_size, stat.st_mtime_ns, stat.st_ino] and record[3] in self._objects:
+            return record[3]
+        return None
+
+    def _remember_source(self, src_path: str, stat: os.stat_result, digest: str) -> None:
+        self._sources.pop(src_path, None)
+        self._sources[src_path] = [stat.st_size, stat.st_mtime_ns, stat.st_ino, digest]
+        while len(self._sources) > MAX_SOURCES:
+            self._sources.pop(next(iter(self._sources)))
+
+    def _place(self, src_path: str, dest_path: str, progress: Callable[[int, int], None] | None) -> str:
+        """Creates an object from a source file, returning the method used."""
+        ensure_dir(os.path.dirname(dest_path))
+        temp_path = os.path.join(os.path.dirname(dest_path), f".{os.path.basename(dest_path)}.{threading.get_ident()}.part")
+        try:
+            for method, create in LINK_METHODS:
+                try:
+                    create(src_path, temp_path)
+                    os.replace(temp_path, dest_path)
+                    return method
+                except (OSError, NotImplementedError):
+                    if os.path.lexists(temp_path):
+                        os.remove(temp_path)
+            total = os.path.getsize(src_path)
+            copied = 0
+            with open(src_path, 'rb') as source, open(temp_path, 'wb') as target:
+                while chunk := source.read(COPY_CHUNK_BYTES):
+                    target.write(chunk)
+                    copied += len(chunk)
+                    if progress is not None:
+                        progress(copied, total)
+            shutil.copystat(src_path, temp_path)
+            os.replace(temp_path, dest_path)
+            return "copy"
+        except BaseException:
+            if os.path.lexists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def add(self, src_path: str, progress: Callable[[str, int, int], None] | None = None) -> tuple[dict, str]:
+        """
+        Adds a file to the store, or finds the stored input with the same content. Hashing and copying happen on the
+        calling thread, so this is meant to run in the background.
+
+        Args:
+            src_path (str): The file to add.
+            progress (Callable[[str, int, int], None] | None): Called with ('hash' | 'copy', bytes done, total bytes). Optional.
+
+        Returns:
+            tuple[dict, str]: The index entry, and how the object was stored: 'reflink', 'hardlink', 'copy', or
+            'duplicate' if the content was already in the store.
+        """
+        src_path = os.path.abspath(src_path)
+        stat = os.stat(src_path)
+        with self._lock:
+            self._load()
+            digest = self._lookup_source(src_path, stat)
+        if digest is None:
+            digest = hash_file(src_path, (lambda done, total: progress('hash', done, total)) if progress else None)
+
+        with self._lock:
+            objects = self._load()
+            entry = objects.get(digest)
+            if entry is not None and not self._is_intact(entry):
+                objects.pop(digest)
+                entry = None
+            self._doomed.discard(digest)
+            if entry is not None:
+                entry["last_used"] = time.time()
+                self._remember_source(src_path, stat, digest)
+                self._save()
+                return dict(entry), "duplicate"
+
+        name = os.path.basename(src_path)
+        dest_path = self._object_path(digest, name)
+        method = self._place(src_path, dest_path, (lambda done, total: progress('copy', done, total)) if progress else None)
+        object_stat = os.stat(dest_path)
+        now = time.time()
+        entry = {
+            "digest": digest,
+            "name": name,
+            "size": object_stat.st_size,
+            "mime": mimetypes.guess_type(name)[0] or "application/octet-stream",
+            "first_seen": now,
+            "last_used": now,
+            "path": dest_path,
+            "mtime_ns": object_stat.st_mtime_ns,
+        }
+        with self._lock:
+            self._load()[digest] = entry
+            self._remember_source(src_path, stat, digest)
+            evicted = self._evict_locked(keep=digest)
+            self._save()
+        self._notify("add", dict(entry))
+        for old_entry in evicted:
+            self._notify("remove", old_entry)
+        return dict(entry), method
+
+    def entries(self) -> list[dict]:
+        """
+        Returns the stored inputs from the index, without reading the objects.
+
+        Returns:
+            list[dict]: Copies of the entries, most recently used first.
+        """
+        with self._lock:
+            return sorted((dict(entry) for entry in self._load().values()), key=lambda e: e["last_used"], reverse=True)
+
+    def get(self, digest: str) -> dict | None:
+        """
+        Looks up a stored input.
+
+        Args:
+            digest (str): The SHA-256 of the input.
+
+        Returns:
+            dict | None: A copy of the entry, or None if it is not stored.
+        """
+        with self._lock:
+            entry = self._load().get(digest)
+            return dict(entry) if entry is not None else None
+
+    def find_by_path(self, path: str) -> dict | None:
+        """
+        Looks up the stored input an object path belongs to.
+
+        Args:
+            path (str): A path inside the store.
+
+        Returns:
+            dict | None: A copy of the entry, or None if the path is not a stored object.
+        """
+        path = os.path.abspath(path)
+        with self._lock:
+            for entry in self._load().values():
+                if entry["path"] == path:
+                    return dict(entry)
+        return None
+
+    def touch(self, digest: str) -> None:
+        """
+        Marks an input as just used, moving it to the back of the eviction order.
+
+        Args:
+            digest (str): The SHA-256 of the input.
+        """
+        with self._lock:
+            entry = self._load().get(digest)
+            if entry is not None:
+                entry["last_used"] = time.time()
+                self._save()
+
+    def pin(self, digest: str) -> None:
+        """
+        Protects an input from removal and eviction while it is in use, e.g. by a running model.
+
+        Args:
+            digest (str): The SHA-256 of the input.
+        """
+        with self._lock:
+            self._pins[digest] = self._pins.get(digest, 0) + 1
+
+    def unpin(self, digest: str) -> None:
+        """
+        Releases a pin taken with `pin`. An input removed while pinned is deleted when its last pin is released.
+
+        Args:
+            digest (str): The SHA-256 of the input.
+        """
+        removed = None
+        with self._lock:
+            count = self._pins.get(digest, 0) - 1
+            if count > 0:
+                self._pins[digest] = count
+                return
+            self._pins.pop(digest, None)
+            if digest in self._doomed:
+                self._doomed.discard(digest)
+                removed = self._delete_locked(digest)
+                self._save()
+        if removed is not None:
+            self._notify("remove", removed)
+
+    def remove(self, digest: str) -> bool:
+        """
+        Removes an input from the store. A pinned input is deleted once it is no longer in use.
+
+        Args:
+            digest (str): The SHA-256 of the input.
+
+        Returns:
+            bool: True if the input was deleted now, False if it is pinned or not stored.
+        """
+        with self._lock:
+            if digest not in self._load():
+                return False
+            if self._pins.get(digest):
+                self._doomed.add(digest)
+                return False
+            removed = self._delete_locked(digest)
+            self._save()
+        self._notify("remove", removed)
+        return True
+
+    def clear(self) -> int:
+        """
+        Removes every input that is not in use. Inputs in use are deleted once they are released.
+
+        Returns:
+            int: The number of inputs deleted now.
+        """
+        with self._lock:
+            digests = list(self._load())
+        return sum(self.remove(digest) for digest in digests)
+
+    def total_size(self) -> int:
+        """
+        Returns the size of all stored objects.
+
+        Returns:
+            int: The size in bytes.
+        """
+        with self._lock:
+            return sum(entry["size"] for entry in self._load().values())
+
+    def _delete_locked(self, digest: str) -> dict:
+        """Deletes an object and its index entry. The lock must be held and the index saved afterwards."""
+        entry = self._objects.pop(digest)
+        try:
+            os.remove(entry["path"])
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"Could not delete stored input {entry['path']}: {e}")
+        try:
+            os.rmdir(os.path.dirname(entry["path"]))  # Only succeeds once the shard directory is empty
+        except OSError:
+            pass
+        return entry
+
+    def _evict_locked(self, keep: str | None = None) -> list[dict]:
+        """Evicts the least recently used unpinned inputs until the objects fit the quota. The lock must be held."""
+        objects = self._objects
+        total = sum(entry["size"] for entry in objects.values())
+        evicted = []
+        for entry in sorted(objects.values(), key=lambda e: e["last_used"]):
+            if total <= self.quota_bytes:
+                break
+            if entry["digest"] == keep or self._pins.get(entry["digest"]):
+                continue
+            evicted.append(self._delete_locked(entry["digest"]))
+            total -= entry["size"]
+        return evicted
+
+    def refresh(self) -> int:
+        """
+        Re-reads the index if another process changed it and notifies listeners of each input that was added or removed.
+
+        Returns:
+            int: The number of inputs that were added or removed.
+        """
+        with self._lock:
+            after = dict(self._load())
+            before = self._published
+            self._published = dict(after)
+        changes = [("remove", entry) for digest, entry in before.items() if digest not in after]
+        changes += [("add", entry) for digest, entry in after.items() if digest not in before]
+        for action, entry in changes:
+            self._notify(action, dict(entry))
+        return len(changes)
+
+    def add_listener(self, callback: Callable[[str, dict], None]) -> None:
+        """
+        Registers a callback invoked with ('add' | 'remove', entry) whenever an input is stored or deleted. Inputs are
+        usually stored on a worker thread, so the callback may not run on the GUI thread.
+
+        Args:
+            callback (Callable[[str, dict], None]): The callback to register.
+        """
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback: Callable[[str, dict], None]) -> None:
+        """
+        Unregisters a callback previously added with `add_listener`.
+
+        Args:
+            callback (Callable[[str, dict], None]): The callback to unregister.
+        """
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _notify(self, action: str, entry: dict) -> None:
+        """Invokes all listeners for a stored or deleted input."""
+        for callback in list(self._listeners):
+            try:
+                callback(action, entry)
+            except Exception as e:
+                print(f"Input store listener failed: {e}")
+
+_store: InputStore | None = None
+
+def get_input_store() -> InputStore:
+    """
+    Returns the input store shared by the whole process.
+
+    Returns:
+        InputStore: The shared store.
+    """
+    global _store
+    if _store is None:
+        _store = InputStore()
+    return _store
+
+class PinnedInput:
+    """
+    Keeps the input a widget has selected pinned, so that eviction or clearing the store cannot delete it while it
+    is shown or about to be run. Selecting another input releases the previous one.
+
+    Attributes:
+        store (InputStore): The store the input belongs to.
+        entry (dict | None): The index entry of the selected input, None if nothing is selected.
+    """
+    def __init__(self, store: InputStore | None = None) -> None:
+        """
+        Initializes the selection with nothing selected.
+
+        Args:
+            store (InputStore | None): The store the inputs belong to. Defaults to the shared store.
+        """
+        self.store = store or get_input_store()
+        self.entry: dict | None = None
+
+    def select(self, path: str | None) -> dict | None:
+        """
+        Pins the stored input at a path and releases the one selected before.
+
+        Args:
+            path (str | None): The path of a stored input, None to only release the current one.
+
+        Returns:
+            dict | None: The input's index entry, or None if the path is not a stored object.
+        """
+        entry = self.store.find_by_path(path) if path else None
+        if entry is not None:
+            self.store.pin(entry["digest"])
+        previous, self.entry = self.entry, entry
+        if previous is not None:
+            self.store.unpin(previous["digest"])
+        return entry
+
+    def release(self) -> None:
+        """Releases the selected input, e.g. when the widget showing it is closed."""
+        self.select(None)
@@ -0,0 +1,217 @@
+import os
+import sys
+import json
+import time
+import socket
+import hashlib
+import tempfile
+import threading
+import subprocess
+from typing import Callable
+from directories import LLM_SOCKET_DIR, LLM_SERVER_LOG, ensure_dir, ensure_parent_dir
+
+LLM_SERVER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "llm_server.py")
+BACKEND_ENV = "FOCALAI_LLM_BACKEND" # The backend LLMPlayer uses, 'echo', 'transformers' or 'module:factory'
+MODEL_ENV = "FOCALAI_LLM_MODEL" # The model name or path passed to the backend
+MAX_SOCKET_PATH = 100 # Unix socket paths are limited to about 104 bytes
+
+class LLMError(Exception):
+    """Raised when the generation server cannot be reached or answers with an error."""
+
+def socket_path_for(name: str) -> str:
+    """
+    Returns the socket path of the server with a given name, in LLM_SOCKET_DIR unless that path would be too long
+    for a Unix socket.
+
+    Args:
+        name (str): The server's name, e.g. the environment and backend.
+
+    Returns:
+        str: The socket path.
+    """
+    digest = hashlib.sha256(name.encode('utf-8')).hexdigest()[:16]
+    path = os.path.join(LLM_SOCKET_DIR, f"{digest}.sock")
+    if len(path) > MAX_SOCKET_PATH:
+        path = os.path.join(tempfile.gettempdir(), f"focalai-llm-{digest}.sock")
+    return path
+
+class LLMClient:
+    """
+    Talks to a generation server (llm_server.py) over its Unix socket, starting the server when it is not running.
+
+    The server keeps the model loaded and each session's state between turns, and exits after `idle_timeout` seconds
+    without requests. The next request then starts it again. By default the server is started with this process's
+    Python, which is the model's environment when the client runs inside a model script. `command` starts it through
+    another interpreter, e.g. `conda run`.
+
+    Attributes:
+        backend (str): The backend the server loads.
+        model (str | None): The model name or path passed to the backend.
+        socket_path (str): The server's Unix socket.
+        idle_timeout (float): Seconds without requests before the server unloads.
+        session (str): The session prompts are sent to.
+    """
+    def __init__(self, backend: str = "echo", model: str | None = None, socket_path: str | None = None,
+                 idle_timeout: float = 600, command: list[str] | None = None, start_timeout: float = 300,
+                 session: str = "default") -> None:
+        """
+        Initializes the client. Nothing is started until the first request.
+
+        Args:
+            backend (str): The backend the server loads. Defaults to the 'echo' stand-in.
+            model (str | None): The model name or path passed to the backend.
+            socket_path (str | None): The server's Unix socket. Defaults to a path derived from the backend and model.
+            idle_timeout (float): Seconds without requests before the server unloads. Defaults to 600.
+            command (list[str] | None): The interpreter command that runs llm_server.py. Defaults to this Python.
+            start_timeout (float): Seconds to wait for a started server to listen, including loading the model.
+            session (str): The session prompts are sent to. Defaults to 'default'.
+        """
+        self.backend = backend
+        self.model = model
+        self.socket_path = socket_path or socket_path_for(f"{sys.prefix}|{backend}|{model}")
+        self.idle_timeout = idle_timeout
+        self.command = command or [sys.executable]
+        self.start_timeout = start_timeout
+        self.session = session
+        self._start_lock = threading.Lock()
+        self._process: subprocess.Popen | None = None
+
+    @classmethod
+    def from_environment(cls) -> "LLMClient | None":
+        """
+        Creates a client from the FOCALAI_LLM_BACKEND and FOCALAI_LLM_MODEL environment variables.
+
+        Returns:
+            LLMClient | None: The client, or None if neither variable is set.
+        """
+        backend, model = os.environ.get(BACKEND_ENV), os.environ.get(MODEL_ENV)
+        if not backend and not model:
+            return None
+        return cls(backend or "transformers", model)
+
+    def _connect(self, timeout: float | None = None) -> socket.socket:
+        conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        conn.settimeout(timeout)
+        try:
+            conn.connect(self.socket_path)
+        except OSError:
+            conn.close()
+            raise
+        return conn
+
+    def _request(self, request: dict, timeout: float | None = 5) -> dict:
+        """Sends a request with a single reply."""
+        with self._connect(timeout) as conn, conn.makefile('r', encoding='utf-8') as reader:
+            conn.sendall((json.dumps(request) + "\n").encode('utf-8'))
+            reply = json.loads(reader.readline() or "{}")
+        if "error" in reply:
+            raise LLMError(reply["error"])
+        return reply
+
+    def is_running(self) -> bool:
+        """
+        Checks whether the server answers.
+
+        Returns:
+            bool: True if the server is listening.
+        """
+        try:
+            self._request({"op": "ping"}, timeout=2)
+            return True
+        except (OSError, ValueError, LLMError):
+            return False
+
+    def ensure_server(self) -> None:
+        """
+        Starts the server if it is not running and waits until it listens.
+
+        Raises:
+            LLMError: If the server exits or does not listen within `start_timeout` seconds.
+        """
+        with self._start_lock:
+            if self.is_running():
+                return
+            ensure_dir(os.path.dirname(self.socket_path))
+            log = open(ensure_parent_dir(LLM_SERVER_LOG), 'a', encoding='utf-8')
+            try:
+                self._process = subprocess.Popen(
+                    self.command + [LLM_SERVER_SCRIPT, "--socket", self.socket_path, "--backend", self.backend,
+                                    "--idle-timeout", str(self.idle_timeout)] + (["--model", self.model] if self.model else []),
+                    stdout=log, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL,
+                    start_new_session=True)  # Outlives a crash of the GUI until its idle timeout
+            finally:
+                log.close()
+            deadline = time.monotonic() + self.start_timeout
+            while time.monotonic() < deadline:
+                if self.is_running():
+                    return  # Either the started server, or one another client started first
+                if self._process.poll() is not None:
+                    raise LLMError(f"The LLM server exited with code {self._process.returncode}, see {LLM_SERVER_LOG}")
+                time.sleep(0.1)
+            raise LLMError(f"The LLM server did not start within {self.start_timeout:.0f} seconds, see {LLM_SERVER_LOG}")
+
+    def generate(self, prompt: str, on_token: Callable[[str], None] | None = None,
+                 is_cancelled: Callable[[], bool] | None = None, max_tokens: int = 512) -> str:
+        """
+        Generates a reply to a prompt in the client's session, streaming it piece by piece.
+
+        Args:
+            prompt (str): The prompt.
+            on_token (Callable[[str], None] | None): Called with each piece of the reply as it is generated.
+            is_cancelled (Callable[[], bool] | None): Polled between pieces. Returning True closes the connection,
+                which stops the generation and drops the session's state.
+            max_tokens (int): The maximum number of tokens generated. Defaults to 512.
+
+        Returns:
+            str: The reply, or the part generated before it was cancelled.
+
+        Raises:
+            LLMError: If the server cannot be started or reports an error.
+        """
+        self.ensure_server()
+        pieces: list[str] = []
+        request = {"op": "generate", "session": self.session, "prompt": prompt, "max_tokens": max_tokens}
+        with self._connect() as conn, conn.makefile('r', encoding='utf-8') as reader:
+            conn.sendall((json.dumps(request) + "\n").encode('utf-8'))
+            for line in reader:
+                if is_cancelled is not None and is_cancelled():
+                    break
+                reply = json.loads(line)
+                if "error" in reply:
+                    raise LLMError(reply["error"])
+                if reply.get("done"):
+                    break
+                piece = reply.get("token", "")
+                pieces.append(piece)
+                if on_token is not None:
+                    on_token(piece)
+        return "".join(pieces)
+
+    def reset(self) -> None:
+        """Forgets the session's state, starting a new conversation. Does nothing if the server is not running."""
+        try:
+            self._request({"op": "reset", "session": self.session})
+        except (OSError, ValueError, LLMError):
+            pass
+
+    def stats(self) -> dict | None:
+        """
+        Reports the server's request scheduler load: queue depth, completed requests, the batch size histogram and
+        the p50/p99 latency in milliseconds.
+
+        Returns:
+            dict | None: The statistics, or None if the server is not running.
+        """
+        try:
+            reply = self._request({"op": "stats"})
+        except (OSError, ValueError, LLMError):
+            return None
+        reply.pop("done", None)
+        return reply
+
+    def shutdown(self) -> None:
+        """Stops the server, unloading the model. Does nothing if the server is not running."""
+        try:
+            self._request({"op": "shutdown"})
+        except (OSError, ValueError, LLMError):
+            pass
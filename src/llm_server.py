@@ -0,0 +1,330 @@
+"""
+A long-lived text generation server for LLM models, run with the Python of the model's conda environment.
+
+The server loads a backend once and answers requests over a Unix socket with a JSON-lines protocol: each request is
+one JSON object on a line, and each reply is a stream of JSON objects, one per line.
+
+    {"op": "generate", "session": "default", "prompt": "...", "max_tokens": 256}
+        -> {"token": "..."} for each piece of text, then {"done": true, "tokens": n}
+    {"op": "reset", "session": "default"}  -> {"done": true}
+    {"op": "ping"}                         -> {"done": true, "backend": "...", "sessions": n}
+    {"op": "stats"}                        -> {"done": true, "queue_depth": n, "batch_sizes": {...}, "p50_ms": ...}
+    {"op": "shutdown"}                     -> {"done": true}
+
+Errors are replied as {"error": "..."}. Each session keeps the backend's state between turns, e.g. the KV cache of a
+transformers model, so a follow-up prompt only processes the new tokens. Closing the connection during a generation
+cancels it. The server exits, unloading the model, once no request arrived for `--idle-timeout` seconds.
+
+Generations from every connection go through a MicroBatchScheduler. A backend that declares batch support with a
+`generate_batch(sessions, prompts, max_tokens)` method, yielding (index, piece) pairs, answers concurrent prompts in
+one batched call; other backends answer them one at a time.
+
+The module only uses the standard library, so it runs in any environment. Backends are chosen with `--backend`:
+'echo' is a tiny CPU-only stand-in that streams a deterministic reply, 'transformers' runs a causal language model
+with Hugging Face transformers, and 'module:factory' loads any other backend.
+"""
+from __future__ import annotations
+
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import importlib
+import threading
+from collections import OrderedDict
+
+from batch_scheduler import MicroBatchScheduler # Found next to this script, which is on sys.path when it is run
+
+DEFAULT_IDLE_TIMEOUT = 600
+DEFAULT_MAX_SESSIONS = 8
+DEFAULT_MAX_BATCH_SIZE = 8
+DEFAULT_MAX_WAIT_MS = 10
+
+class EchoBackend:
+    """
+    A stand-in model for tests. It streams back the prompt word by word, numbering the turns of each session to show
+    that session state is kept.
+    """
+    name = "echo"
+
+    def __init__(self, model: str | None = None, delay: float = 0.0) -> None:
+        self.delay = float(os.environ.get("FOCALAI_ECHO_DELAY", delay))
+
+    def new_session(self) -> dict:
+        return {"turns": 0}
+
+    def generate(self, session: dict, prompt: str, max_tokens: int):
+        session["turns"] += 1
+        words = f"[turn {session['turns']}] {prompt}".split()
+        for i, word in enumerate(words[:max_tokens]):
+            if self.delay:
+                time.sleep(self.delay)
+            yield word if i == 0 else " " + word
+
+    def generate_batch(self, sessions: list[dict], prompts: list[str], max_tokens: list[int]):
+        """Streams the replies to several prompts, one word of each per step, like a batched forward pass."""
+        replies = []
+        for session, prompt, limit in zip(sessions, prompts, max_tokens):
+            session["turns"] += 1
+            replies.append(f"[turn {session['turns']}] {prompt}".split()[:limit])
+        for step in range(max((len(words) for words in replies), default=0)):
+            if self.delay:
+                time.sleep(self.delay)
+            for i, words in enumerate(replies):
+                if step < len(words):
+                    yield i, words[step] if step == 0 else " " + words[step]
+
+class TransformersBackend:
+    """
+    Runs a causal language model with Hugging Face transformers. Each session keeps the model's past key values, so
+    a turn only runs the model over the new prompt and the tokens it generates.
+    """
+    name = "transformers"
+
+    def __init__(self, model: str | None = None) -> None:
+        if not model:
+            raise ValueError("the transformers backend needs a model name or path, set FOCALAI_LLM_MODEL")
+        import torch
+        from transformers import AutoModelForCausalLM, AutoTokenizer
+        self.torch = torch
+        self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.tokenizer = AutoTokenizer.from_pretrained(model)
+        self.model = AutoModelForCausalLM.from_pretrained(model).to(self.device)
+        self.model.eval()
+
+    def new_session(self) -> dict:
+        return {"past": None, "next_token": None}
+
+    def generate(self, session: dict, prompt: str, max_tokens: int):
+        torch = self.torch
+        text = ("\n" if session["past"] is not None else "") + f"User: {prompt}\nAssistant:"
+        input_ids = self.tokenizer(text, return_tensors="pt").input_ids.to(self.device)
+        if session["next_token"] is not None:
+            input_ids = torch.cat([session["next_token"], input_ids], dim=-1)  # The last token of the previous reply was never fed
+        past = session["past"]
+        generated: list[int] = []
+        sent = ""
+        with torch.no_grad():
+            for _ in range(max_tokens):
+                output = self.model(input_ids=input_ids, past_key_values=past, use_cache=True)
+                past = output.past_key_values
+                next_token = output.logits[:, -1, :].argmax(dim=-1, keepdim=True)
+                input_ids = next_token
+                if next_token.item() == self.tokenizer.eos_token_id:
+                    break
+                generated.append(next_token.item())
+                decoded = self.tokenizer.decode(generated, skip_special_tokens=True)
+                if "\nUser:" in decoded:
+                    break
+                if len(decoded) > len(sent) and not decoded.endswith("�"):  # Waits for multi-byte characters to complete
+                    yield decoded[len(sent):]
+                    sent = decoded
+        session["past"] = past
+        session["next_token"] = input_ids
+
+BACKENDS = {"echo": EchoBackend, "transformers": TransformersBackend}
+
+def load_backend(name: str, model: str | None = None):
+    """
+    Creates a backend.
+
+    Args:
+        name (str): 'echo', 'transformers', or 'module:factory' for a backend defined elsewhere.
+        model (str | None): The model name or path, passed to the backend.
+
+    Returns:
+        object: The backend, with `new_session()` and `generate(session, prompt, max_tokens)` methods.
+    """
+    if name in BACKENDS:
+        return BACKENDS[name](model)
+    module_name, _, factory = name.partition(':')
+    if not factory:
+        raise ValueError(f"unknown backend {name!r}, expected one of {sorted(BACKENDS)} or 'module:factory'")
+    return getattr(importlib.import_module(module_name), factory)(model)
+
+class LLMServer:
+    """
+    Serves a backend over a Unix socket. Connections are handled on their own threads, and generations are queued on
+    a scheduler that runs them in micro-batches, or one at a time for backends without batch support.
+
+    Attributes:
+        socket_path (str): The path of the Unix socket.
+        backend (object): The loaded backend.
+        idle_timeout (float): The number of seconds without requests after which the server exits.
+        max_sessions (int): The number of sessions kept, the least recently used is dropped first.
+        scheduler (MicroBatchScheduler): Queues and batches the generations.
+    """
+    def __init__(self, socket_path: str, backend, idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+                 max_sessions: int = DEFAULT_MAX_SESSIONS, max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+                 max_wait_ms: float = DEFAULT_MAX_WAIT_MS) -> None:
+        self.socket_path = socket_path
+        self.backend = backend
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self._sessions: OrderedDict[str, dict] = OrderedDict()
+        self._state_lock = threading.Lock()
+        self.scheduler = MicroBatchScheduler(
+            self._generate, self._generate_batch if hasattr(backend, "generate_batch") else None,
+            max_batch_size=max_batch_size, max_wait=max_wait_ms / 1000,
+            conflict_key=lambda job: job["session"], name="llm-generate")
+        self._active = 0
+        self._last_activity = time.monotonic()
+        self._stopping = threading.Event()
+
+    def _session(self, session_id: str) -> dict:
+        with self._state_lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._sessions[session_id] = self.backend.new_session()
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+            return session
+
+    def _drop_session(self, session_id: str) -> None:
+        with self._state_lock:
+            self._sessions.pop(session_id, None)
+
+    def _generate(self, job: dict) -> int:
+        """Answers one generation, sending each piece to its connection. Returns the number of pieces."""
+        session = self._session(job["session"])
+        count = 0
+        try:
+            for piece in self.backend.generate(session, job["prompt"], job["max_tokens"]):
+                job["send"](piece)
+                count += 1
+        except (BrokenPipeError, ConnectionResetError):
+            self._drop_session(job["session"])  # The state of a cancelled turn is incomplete
+            raise
+        return count
+
+    def _generate_batch(self, jobs: list[dict]) -> list:
+        """Answers several generations with one batched call, fanning the pieces out to their connections."""
+        sessions = [self._session(job["session"]) for job in jobs]
+        results: list = [0] * len(jobs)
+        for i, piece in self.backend.generate_batch(sessions, [job["prompt"] for job in jobs], [job["max_tokens"] for job in jobs]):
+            if isinstance(results[i], BaseException):
+                continue  # The client went away, the rest of its reply is dropped
+            try:
+                jobs[i]["send"](piece)
+                results[i] += 1
+            except (BrokenPipeError, ConnectionResetError) as e:
+                self._drop_session(jobs[i]["session"])
+                results[i] = e
+        return results
+
+    def _touch(self, delta: int) -> None:
+        with self._state_lock:
+            self._active += delta
+            self._last_activity = time.monotonic()
+
+    def serve_forever(self) -> None:
+        """Accepts connections until the server is shut down or stays idle for `idle_timeout` seconds."""
+        if os.path.exists(self.socket_path):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.socket_path)
+                print(f"Another LLM server is listening on {self.socket_path}", flush=True)
+                return
+            except OSError:
+                os.remove(self.socket_path)  # Left behind by a server that did not exit cleanly
+            finally:
+                probe.close()
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(self.socket_path)
+        os.chmod(self.socket_path, 0o600)
+        server.listen(64)
+        server.settimeout(1.0)
+        print(f"LLM server ({getattr(self.backend, 'name', type(self.backend).__name__)}) listening on {self.socket_path}", flush=True)
+        try:
+            while not self._stopping.is_set():
+                try:
+                    conn, _ = server.accept()
+                except socket.timeout:
+                    with self._state_lock:
+                        idle = self._active == 0 and time.monotonic() - self._last_activity > self.idle_timeout
+                    if idle:
+                        print("LLM server idle, unloading", flush=True)
+                        break
+                    continue
+                threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+        finally:
+            server.close()
+            try:
+                os.remove(self.socket_path)
+            except OSError:
+                pass
+
+    def _handle(self, conn: socket.socket) -> None:
+        with conn, conn.makefile('r', encoding='utf-8') as reader:
+            for line in reader:
+                if not line.strip():
+                    continue
+                self._touch(1)
+                try:
+                    request = json.loads(line)
+                    if not self._dispatch(conn, request):
+                        return
+                except (BrokenPipeError, ConnectionResetError):
+                    return  # The client went away, which cancels its generation
+                except Exception as e:
+                    try:
+                        self._send(conn, {"error": f"{type(e).__name__}: {e}"})
+                    except OSError:
+                        return
+                finally:
+                    self._touch(-1)
+
+    @staticmethod
+    def _send(conn: socket.socket, message: dict) -> None:
+        conn.sendall((json.dumps(message) + "\n").encode('utf-8'))
+
+    def _dispatch(self, conn: socket.socket, request: dict) -> bool:
+        """Answers one request. Returns False when the connection should be closed."""
+        op = request.get("op")
+        session_id = str(request.get("session", "default"))
+        if op == "generate":
+            job = {"session": session_id, "prompt": str(request.get("prompt", "")),
+                   "max_tokens": int(request.get("max_tokens", 256)), "send": lambda piece: self._send(conn, {"token": piece})}
+            count = self.scheduler.submit(job).wait()
+            self._send(conn, {"done": True, "tokens": count})
+        elif op == "reset":
+            with self._state_lock:
+                self._sessions.pop(session_id, None)
+            self._send(conn, {"done": True})
+        elif op == "ping":
+            with self._state_lock:
+                sessions = len(self._sessions)
+            self._send(conn, {"done": True, "backend": getattr(self.backend, 'name', type(self.backend).__name__), "sessions": sessions})
+        elif op == "stats":
+            self._send(conn, {"done": True, **self.scheduler.stats()})
+        elif op == "shutdown":
+            self._stopping.set()
+            self._send(conn, {"done": True})
+            return False
+        else:
+            self._send(conn, {"error": f"unknown op {op!r}"})
+        return True
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Serves a language model over a Unix socket.")
+    parser.add_argument("--socket", required=True, help="The path of the Unix socket to listen on")
+    parser.add_argument("--backend", default="echo", help="'echo', 'transformers' or 'module:factory'")
+    parser.add_argument("--model", default=None, help="The model name or path passed to the backend")
+    parser.add_argument("--idle-timeout", type=float, default=DEFAULT_IDLE_TIMEOUT, help="Seconds without requests before exiting")
+    parser.add_argument("--max-sessions", type=int, default=DEFAULT_MAX_SESSIONS, help="The number of sessions kept")
+    parser.add_argument("--max-batch-size", type=int, default=DEFAULT_MAX_BATCH_SIZE, help="The largest number of prompts in one batch")
+    parser.add_argument("--max-wait-ms", type=float, default=DEFAULT_MAX_WAIT_MS, help="Milliseconds a prompt waits for others to batch with")
+    args = parser.parse_args(argv)
+    try:
+        backend = load_backend(args.backend, args.model)
+    except Exception as e:
+        print(f"Could not load the {args.backend} backend: {e}", file=sys.stderr, flush=True)
+        return 1
+    LLMServer(args.socket, backend, args.idle_timeout, args.max_sessions, args.max_batch_size, args.max_wait_ms).serve_forever()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
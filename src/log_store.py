@@ -0,0 +1,373 @@
+import os
+import re
+import json
+import gzip
+import sqlite3
+from collections import deque
+from itertools import islice
+from directories import RUN_LOG_DIR, LOG_INDEX_DB
+from run_log import RUN_INDEX_NAME
+
+# Line level severity detection, checked in order
+ERROR_PATTERN = re.compile(r'Traceback \(most recent call last\)|\b\w*(Error|Exception)\b:|\bERROR\b|\bFAILED\b|\bfatal\b|CalledProcessError')
+WARNING_PATTERN = re.compile(r'\bWARNING\b|\bWarning:|\bDeprecat', re.IGNORECASE)
+TRACEBACK_HEADER = "Traceback (most recent call last)"
+
+def classify_lines(lines: list[str]) -> list[str]:
+    """
+    Assigns a severity to every line of a log. Lines inside a Python traceback, including the final exception line,
+    are marked as errors even when they do not match an error pattern themselves.
+
+    Args:
+        lines (list[str]): The log lines to classify.
+
+    Returns:
+        list[str]: One of 'error', 'warning' or 'info' per line.
+    """
+    severities = []
+    in_traceback = False
+    for line in lines:
+        if TRACEBACK_HEADER in line:
+            in_traceback = True
+            severities.append("error")
+        elif in_traceback:
+            severities.append("error")
+            # The traceback ends with the first non-indented line, which is the exception itself
+            in_traceback = line[:1] in (" ", "\t")
+        elif ERROR_PATTERN.search(line):
+            severities.append("error")
+        elif WARNING_PATTERN.search(line):
+            severities.append("warning")
+        else:
+            severities.append("info")
+    return severities
+
+def resolve_log_path(path: str) -> str | None:
+    """
+    Finds a run log on disk, accounting for logs that were gzip-compressed after being indexed.
+
+    Args:
+        path (str): The log path recorded in the run index.
+
+    Returns:
+        str | None: The existing plain or compressed path, or None if the log is gone.
+    """
+    for candidate in (path, f"{path}.gz"):
+        if os.path.isfile(candidate):
+            return candidate
+    return None
+
+def open_log(path: str):
+    """
+    Opens a plain or gzip-compressed log for reading text.
+
+    Args:
+        path (str): The path of the log file.
+
+    Returns:
+        TextIO: The opened file object.
+    """
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', errors='replace')
+    return open(path, 'r', encoding='utf-8', errors='replace')
+
+def tail_file(path: str, n: int, block_size: int = 8192) -> list[str]:
+    """
+    Returns the last lines of a file. Plain files are read backwards from the end in blocks, so the cost depends on
+    the size of the tail rather than the size of the log. Compressed files have to be streamed.
+
+    Args:
+        path (str): The path of the log file.
+        n (int): The number of lines to return.
+        block_size (int): The number of bytes read per step when seeking backwards. Defaults to 8192.
+
+    Returns:
+        list[str]: Up to `n` lines without their terminators.
+    """
+    if n <= 0:
+        return []
+    if path.endswith('.gz'):
+        with open_log(path) as log_file:
+            return [line.rstrip('\r\n') for line in deque(log_file, maxlen=n)]
+
+    with open(path, 'rb') as log_file:
+        log_file.seek(0, os.SEEK_END)
+        position = log_file.tell()
+        data = b""
+        # One extra newline is needed to be sure the first returned line is complete
+        while position > 0 and data.count(b"\n") <= n:
+            step = min(block_size, position)
+            position -= step
+            log_file.seek(position)
+            data = log_file.read(step) + data
+    lines = data.decode('utf-8', errors='replace').splitlines()
+    return lines[-n:]
+
+class LogStore:
+    """
+    Indexes run logs written by RunLogWriter into an SQLite database, so failed installs and model runs can be found
+    by environment, run id, time and severity, and their lines searched through a full text index.
+
+    The store is synced incrementally from the run index file: only records appended since the last sync are read.
+
+    Attributes:
+        db_path (str): Path to the SQLite database holding the index.
+        log_dir (str): The directory holding the run logs and their index file.
+        has_fts (bool): Whether the SQLite build supports FTS5. Without it, searches fall back to LIKE queries.
+    """
+    def __init__(self, db_path: str | None = None, log_dir: str | None = None) -> None:
+        """
+        Opens the index database, creating its tables if needed.
+
+        Args:
+            db_path (str | None): Path to the SQLite database. Defaults to LOG_INDEX_DB.
+            log_dir (str | None): The directory holding run logs. Defaults to RUN_LOG_DIR.
+        """
+        self.db_path = db_path or LOG_INDEX_DB
+        self.log_dir = log_dir or RUN_LOG_DIR
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self.connection = sqlite3.connect(self.db_path)
+        self.connection.row_factory = sqlite3.Row
+        self.has_fts = True
+        self.create_tables()
+
+    def create_tables(self) -> None:
+        """Creates the run, line and metadata tables if they do not already exist."""
+        self.connection.execute('''
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id TEXT PRIMARY KEY,
+                name TEXT,
+                env TEXT,
+                command TEXT,
+                started TEXT,
+                duration REAL,
+                exit_code INTEGER,
+                path TEXT,
+                severity TEXT,
+                error_count INTEGER,
+                first_error_line INTEGER
+            )
+        ''')
+        self.connection.execute("CREATE INDEX IF NOT EXISTS runs_env ON runs (env, started)")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        try:
+            self.connection.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS log_lines USING fts5(text, run_id UNINDEXED, line_no UNINDEXED, severity UNINDEXED)")
+        except sqlite3.OperationalError:
+            self.has_fts = False
+            self.connection.execute("CREATE TABLE IF NOT EXISTS log_lines (text TEXT, run_id TEXT, line_no INTEGER, severity TEXT)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS log_lines_run ON log_lines (run_id, line_no)")
+        self.connection.commit()
+
+    def _get_meta(self, key: str, default: str) -> str:
+        row = self.connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else default
+
+    def _set_meta(self, key: str, value: str) -> None:
+        self.connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def sync(self) -> int:
+        """
+        Ingests runs appended to the run index since the last sync.
+
+        Returns:
+            int: The number of runs ingested.
+        """
+        index_path = os.path.join(self.log_dir, RUN_INDEX_NAME)
+        if not os.path.isfile(index_path):
+            return 0
+        offset = int(self._get_meta("index_offset", "0"))
+        if offset > os.path.getsize(index_path):
+            offset = 0  # The index was recreated, start over
+        ingested = 0
+        with open(index_path, 'r', encoding='utf-8') as index_file:
+            index_file.seek(offset)
+            while True:
+                line = index_file.readline()
+                if not line.endswith("\n"):
+                    break  # Partially written record, picked up on the next sync
+                offset = index_file.tell()
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as e:
+                    print(f"Skipping malformed run index record: {e}")
+                    continue
+                self.ingest_run(record)
+                ingested += 1
+        self._set_meta("index_offset", str(offset))
+        self.connection.commit()
+        return ingested
+
+    def ingest_run(self, record: dict) -> None:
+        """
+        Indexes a single run and all of its log lines.
+
+        Args:
+            record (dict): A run record as written to the run index by RunLogWriter.
+        """
+        run_id = record["run_id"]
+        log_path = resolve_log_path(record.get("path", ""))
+        lines: list[str] = []
+        if log_path:
+            with open_log(log_path) as log_file:
+                lines = [line.rstrip('\r\n') for line in log_file]
+        severities = classify_lines(lines)
+        error_lines = [line_no for line_no, severity in enumerate(severities) if severity == "error"]
+
+        if record.get("exit_code") not in (0, None) or error_lines:
+            run_severity = "error"
+        elif "warning" in severities:
+            run_severity = "warning"
+        else:
+            run_severity = "info"
+
+        self.connection.execute("DELETE FROM log_lines WHERE run_id = ?", (run_id,))
+        self.connection.executemany(
+            "INSERT INTO log_lines (text, run_id, line_no, severity) VALUES (?, ?, ?, ?)",
+            ((text, run_id, line_no, severity) for line_no, (text, severity) in enumerate(zip(lines, severities))))
+        self.connection.execute('''
+            INSERT OR REPLACE INTO runs (run_id, name, env, command, started, duration, exit_code, path, severity, error_count, first_error_line)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (run_id, record.get("name"), record.get("env"), record.get("command"), record.get("started"),
+              record.get("duration"), record.get("exit_code"), record.get("path"), run_severity,
+              len(error_lines), error_lines[0] if error_lines else None))
+
+    def runs(self, env: str | None = None, name: str | None = None, severity: str | None = None,
+             since: str | None = None, limit: int = 50) -> list[dict]:
+        """
+        Lists indexed runs, newest first.
+
+        Args:
+            env (str | None): Only include runs in this conda environment. Optional.
+            name (str | None): Only include runs with this worker name, e.g. 'call'. Optional.
+            severity (str | None): Only include runs with this severity ('error', 'warning' or 'info'). Optional.
+            since (str | None): Only include runs started at or after this ISO timestamp. Optional.
+            limit (int): The maximum number of runs returned. Defaults to 50.
+
+        Returns:
+            list[dict]: The matching run records.
+        """
+        clauses, params = [], []
+        for column, value in (("env", env), ("name", name), ("severity", severity)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            clauses.append("started >= ?")
+            params.append(since)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self.connection.execute(f"SELECT * FROM runs {where} ORDER BY started DESC, rowid DESC LIMIT ?", (*params, limit))
+        return [dict(row) for row in rows]
+
+    def latest_run(self, env: str | None = None, name: str | None = None) -> dict | None:
+        """
+        Returns the most recent indexed run matching the filters.
+
+        Args:
+            env (str | None): Only consider runs in this conda environment. Optional.
+            name (str | None): Only consider runs with this worker name. Optional.
+
+        Returns:
+            dict | None: The run record, or None if no run matches.
+        """
+        runs = self.runs(env=env, name=name, limit=1)
+        return runs[0] if runs else None
+
+    def get_run(self, run_id: str) -> dict | None:
+        """
+        Retrieves an indexed run by its id.
+
+        Args:
+            run_id (str): The run id.
+
+        Returns:
+            dict | None: The run record, or None if the run is not indexed.
+        """
+        row = self.connection.execute("SELECT * FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        return dict(row) if row else None
+
+    def search(self, query: str, env: str | None = None, run_id: str | None = None,
+               severity: str | None = None, limit: int = 100) -> list[dict]:
+        """
+        Searches log lines across all indexed runs.
+
+        Args:
+            query (str): An FTS5 match expression, or a plain substring when FTS5 is unavailable.
+            env (str | None): Only search runs in this conda environment. Optional.
+            run_id (str | None): Only search this run. Optional.
+            severity (str | None): Only return lines with this severity. Optional.
+            limit (int): The maximum number of lines returned. Defaults to 100.
+
+        Returns:
+            list[dict]: Matching lines with their run id, line number, severity and text.
+        """
+        if self.has_fts:
+            clauses, params = ["log_lines MATCH ?"], [query]
+        else:
+            clauses, params = ["log_lines.text LIKE ?"], [f"%{query}%"]
+        if env is not None:
+            clauses.append("runs.env = ?")
+            params.append(env)
+        if run_id is not None:
+            clauses.append("log_lines.run_id = ?")
+            params.append(run_id)
+        if severity is not None:
+            clauses.append("log_lines.severity = ?")
+            params.append(severity)
+        rows = self.connection.execute(f'''
+            SELECT log_lines.run_id, log_lines.line_no, log_lines.severity, log_lines.text
+            FROM log_lines JOIN runs ON runs.run_id = log_lines.run_id
+            WHERE {' AND '.join(clauses)}
+            ORDER BY runs.started DESC, log_lines.line_no
+            LIMIT ?
+        ''', (*params, limit))
+        return [dict(row) for row in rows]
+
+    def tail(self, run_id: str, n: int = 50) -> list[str]:
+        """
+        Returns the last lines of a run's log, reading from the end of the file rather than the whole log.
+
+        Args:
+            run_id (str): The run id.
+            n (int): The number of lines to return. Defaults to 50.
+
+        Returns:
+            list[str]: Up to `n` lines, or an empty list if the run or its log cannot be found.
+        """
+        run = self.get_run(run_id)
+        if run is None:
+            return []
+        log_path = resolve_log_path(run["path"])
+        return tail_file(log_path, n) if log_path else []
+
+    def error_slice(self, run_id: str, before: int = 10, after: int = 40, tail_lines: int = 60) -> str:
+        """
+        Returns the part of a run's log that explains a failure: the lines around the first detected error,
+        or the end of the log when no error line was found.
+
+        Args:
+            run_id (str): The run id.
+            before (int): The number of lines of context before the first error. Defaults to 10.
+            after (int): The number of lines included after the first error. Defaults to 40.
+            tail_lines (int): The number of trailing lines used when no error was detected. Defaults to 60.
+
+        Returns:
+            str: The selected lines joined by newlines, or an empty string if the run is unknown.
+        """
+        run = self.get_run(run_id)
+        if run is None:
+            return ""
+        first_error = run["first_error_line"]
+        if first_error is None:
+            return "\n".join(self.tail(run_id, tail_lines))
+        log_path = resolve_log_path(run["path"])
+        if log_path is None:
+            return ""
+        # Read only up to the end of the slice, the rest of the log is never touched
+        with open_log(log_path) as log_file:
+            lines = islice(log_file, max(0, first_error - before), first_error + after + 1)
+            return "\n".join(line.rstrip('\r\n') for line in lines)
+
+    def close(self) -> None:
+        """Closes the database connection."""
+        self.connection.close()
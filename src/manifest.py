@@ -0,0 +1,257 @@
+import os
+import json
+import tempfile
+import threading
+from typing import Callable
+from directories import INSTALLED_MANIFEST, REPO_JSONS_DIR
+
+MANIFEST_VERSION = 1
+
+class InstalledManifest:
+    """
+    A single JSON file recording every installed model, replacing the directory of one JSON file per model.
+
+    The manifest is read once and kept in memory. Every access checks the file's modification time and size, and
+    only re-reads it when another process changed it. Writes go to a temporary file that is atomically moved into
+    place, so readers never see a partial manifest. Listeners are notified of each changed entry, which lets views
+    update a single row instead of re-reading everything.
+
+    Entries are dictionaries with the keys 'name', 'url', 'model_type', 'description' and 'owner', keyed by URL. Entries
+    may also hold an 'analysis', the structured answers of a full GPT analysis of the model's README.
+
+    Attributes:
+        path (str): The path of the manifest file.
+        legacy_dir (str | None): A directory of per-model JSON files imported when the manifest does not exist yet.
+    """
+    def __init__(self, path: str | None = None, legacy_dir: str | None = REPO_JSONS_DIR) -> None:
+        """
+        Initializes the manifest. Nothing is read until the entries are first accessed.
+
+        Args:
+            path (str | None): The path of the manifest file. Defaults to INSTALLED_MANIFEST.
+            legacy_dir (str | None): The directory of per-model JSON files to migrate. Defaults to REPO_JSONS_DIR.
+        """
+        self.path = path or INSTALLED_MANIFEST
+        self.legacy_dir = legacy_dir
+        self._entries: dict[str, dict] | None = None
+        self._stamp: tuple[int, int] | None = None
+        self._published: dict[str, dict] | None = None  # The entries as last reported to listeners, diffed by refresh
+        self._lock = threading.RLock()
+        self._listeners: list[Callable[[str, dict], None]] = []
+
+    @staticmethod
+    def key(url: str) -> str:
+        """
+        Normalizes a repository URL into the key used by the manifest.
+
+        Args:
+            url (str): The repository URL.
+
+        Returns:
+            str: The URL without a trailing slash.
+        """
+        return url.rstrip('/')
+
+    def _file_stamp(self) -> tuple[int, int] | None:
+        """Returns the manifest file's modification time and size, or None if it does not exist."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _load(self) -> dict[str, dict]:
+        """
+        Returns the cached entries, re-reading the manifest only if the file changed since it was last read.
+        A missing manifest is created from the legacy per-model JSON files, if there are any.
+        """
+        stamp = self._file_stamp()
+        if self._entries is not None and stamp == self._stamp:
+            return self._entries
+        if stamp is None:
+            self._entries = self._migrate_legacy()
+            if self._entries:
+                self._save()
+            else:
+                self._stamp = None
+        else:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as file:
+                    data = json.load(file)
+                self._entries = {self.key(entry["url"]): entry for entry in data.get("models", [])}
+            except (OSError, ValueError, KeyError, AttributeError) as e:
+                print(f"Could not read installed models manifest {self.path}: {e}")
+                self._entries = {}
+            self._stamp = stamp
+        if self._published is None:
+            self._published = dict(self._entries)
+        return self._entries
+
+    def _migrate_legacy(self) -> dict[str, dict]:
+        """
+        Reads the per-model JSON files written by earlier versions. The files are left in place.
+
+        Returns:
+            dict[str, dict]: The migrated entries keyed by URL.
+        """
+        entries: dict[str, dict] = {}
+        if not self.legacy_dir or not os.path.isdir(self.legacy_dir):
+            return entries
+        for filename in sorted(os.listdir(self.legacy_dir)):
+            if not filename.endswith('.json'):
+                continue
+            filepath = os.path.join(self.legacy_dir, filename)
+            try:
+                with open(filepath, 'r', encoding='utf-8') as file:
+                    entry = json.load(file)
+                entries[self.key(entry["url"])] = entry
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                print(f"Skipping unreadable model file {filepath}: {e}")
+        return entries
+
+    def _save(self) -> None:
+        """Atomically writes the cached entries to the manifest file."""
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        data = {"version": MANIFEST_VERSION, "models": list(self._entries.values())}
+        fd, temp_path = tempfile.mkstemp(prefix=".manifest-", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as file:
+                json.dump(data, file, indent=2)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temp_path, self.path)
+        except OSError:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        self._stamp = self._file_stamp()
+
+    def refresh(self) -> int:
+        """
+        Re-reads the manifest if another process changed it and notifies listeners of each entry that differs from
+        what they were last told. Changes made through this object were already reported and produce no notifications.
+
+        Returns:
+            int: The number of entries that were added, changed or removed.
+        """
+        with self._lock:
+            after = dict(self._load())
+            before = self._published
+            self._published = dict(after)
+        changes = [("remove", entry) for key, entry in before.items() if key not in after]
+        changes += [("upsert", entry) for key, entry in after.items() if before.get(key) != entry]
+        for action, entry in changes:
+            self._notify(action, dict(entry))
+        return len(changes)
+
+    def entries(self) -> list[dict]:
+        """
+        Returns the installed model entries.
+
+        Returns:
+            list[dict]: A copy of the entries, in installation order.
+        """
+        with self._lock:
+            return [dict(entry) for entry in self._load().values()]
+
+    def urls(self) -> set[str]:
+        """
+        Returns the URLs of all installed models.
+
+        Returns:
+            set[str]: The normalized repository URLs.
+        """
+        with self._lock:
+            return set(self._load())
+
+    def get(self, url: str) -> dict | None:
+        """
+        Looks up an installed model by URL.
+
+        Args:
+            url (str): The repository URL.
+
+        Returns:
+            dict | None: A copy of the entry, or None if the model is not installed.
+        """
+        with self._lock:
+            entry = self._load().get(self.key(url))
+            return dict(entry) if entry is not None else None
+
+    def upsert(self, entry: dict, notify: bool = True) -> None:
+        """
+        Adds or replaces an installed model entry and writes the manifest.
+
+        Args:
+            entry (dict): The entry, which must contain a 'url' key.
+            notify (bool): Whether listeners are notified. Pass False for changes no view shows, such as a stored GPT
+                analysis, which may then be written from any thread. Defaults to True.
+        """
+        with self._lock:
+            entries = self._load()
+            entries[self.key(entry["url"])] = dict(entry)
+            self._save()
+            self._published = dict(entries)
+        if notify:
+            self._notify("upsert", dict(entry))
+
+    def remove(self, url: str) -> bool:
+        """
+        Removes an installed model entry and writes the manifest.
+
+        Args:
+            url (str): The repository URL of the model.
+
+        Returns:
+            bool: True if an entry was removed, False if the model was not in the manifest.
+        """
+        with self._lock:
+            entry = self._load().pop(self.key(url), None)
+            if entry is None:
+                return False
+            self._save()
+            self._published = dict(self._entries)
+        self._notify("remove", entry)
+        return True
+
+    def add_listener(self, callback: Callable[[str, dict], None]) -> None:
+        """
+        Registers a callback invoked with ('upsert' | 'remove', entry) whenever an entry changes through this object.
+
+        Args:
+            callback (Callable[[str, dict], None]): The callback to register.
+        """
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback: Callable[[str, dict], None]) -> None:
+        """
+        Unregisters a callback previously added with `add_listener`.
+
+        Args:
+            callback (Callable[[str, dict], None]): The callback to unregister.
+        """
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _notify(self, action: str, entry: dict) -> None:
+        """Invokes all listeners for a changed entry."""
+        for callback in list(self._listeners):
+            try:
+                callback(action, entry)
+            except Exception as e:
+                print(f"Manifest listener failed: {e}")
+
+_shared_manifest: InstalledManifest | None = None
+
+def get_manifest() -> InstalledManifest:
+    """
+    Returns the process-wide manifest, so that writers and views share one cache and one set of listeners.
+
+    Returns:
+        InstalledManifest: The shared manifest.
+    """
+    global _shared_manifest
+    if _shared_manifest is None:
+        _shared_manifest = InstalledManifest()
+    return _shared_manifest
@@ -0,0 +1,248 @@
+import re
+import math
+from collections import Counter
+
+DEFAULT_TOKEN_BUDGET = 3000
+MAX_CHUNK_TOKENS = 600 # Sections longer than this are split at paragraph boundaries, so one long section cannot fill the budget
+BM25_K1 = 1.5
+BM25_B = 0.75
+HEADING_WEIGHT = 3 # Heading words count this many times, a section titled "Datasets" is about datasets
+BOILERPLATE_WEIGHT = 0.3 # Score multiplier for sections that rarely answer questions about using the model
+
+_HEADING_PATTERN = re.compile(r'^ {0,3}(#{1,6})\s+(.*?)\s*#*\s*$')
+_FENCE_PATTERN = re.compile(r'^ {0,3}(`{3,}|~{3,})')
+_WORD_PATTERN = re.compile(r'[a-z0-9]+')
+_BOILERPLATE_PATTERN = re.compile(r'change ?log|release notes|news|updates|licen[cs]e|acknowledge?ments?|contributors?|'
+                                  r'contributing|star history|sponsors?|code of conduct', re.IGNORECASE)
+
+# Words of the prompt templates that say nothing about what is being asked
+_STOPWORDS = frozenset("""
+a an and are be can do does for from give given how i in is it just me model models of on or that the this these to
+use used uses what where which with documentation about basic needed find more this
+""".split())
+
+# Words READMEs use for the things the questions ask about
+_EXPANSIONS = {
+    "code": ["usage", "example", "import", "python", "quickstart", "demo", "inference"],
+    "run": ["usage", "inference", "install", "installation", "demo", "python", "command"],
+    "parameters": ["arguments", "args", "options", "config", "configuration", "flags", "hyperparameters", "weights", "checkpoint"],
+    "datasets": ["dataset", "data", "training", "train", "benchmark", "corpus", "evaluation"],
+    "information": ["paper", "citation", "website", "docs", "link", "project", "arxiv", "blog"],
+    "report": ["overview", "introduction", "results", "performance", "architecture", "abstract"],
+}
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimates the number of tokens a text costs. English prose and code average about four characters per token for
+    the GPT tokenizers, which is close enough to budget a prompt without loading a tokenizer.
+
+    Args:
+        text (str): The text.
+
+    Returns:
+        int: The estimated number of tokens.
+    """
+    return (len(text) + 3) // 4
+
+def _terms(text: str) -> list[str]:
+    """Lowercases and splits text into words, folding plurals so 'dataset' matches 'datasets'."""
+    terms = []
+    for word in _WORD_PATTERN.findall(text.lower()):
+        if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+            word = word[:-1]
+        terms.append(word)
+    return terms
+
+class Chunk:
+    """
+    A piece of a README: a section under a heading, or part of one.
+
+    Attributes:
+        index (int): The position of the chunk in the README.
+        heading (str): The heading path of the section, e.g. 'Usage > Training'.
+        text (str): The markdown of the chunk, including its heading line.
+        tokens (int): The estimated number of tokens of the text.
+        boilerplate (bool): True for sections such as changelogs, licenses and acknowledgements.
+    """
+    __slots__ = ("index", "heading", "text", "tokens", "boilerplate")
+
+    def __init__(self, index: int, heading: str, text: str) -> None:
+        self.index = index
+        self.heading = heading
+        self.text = text
+        self.tokens = estimate_tokens(text)
+        self.boilerplate = bool(_BOILERPLATE_PATTERN.search(heading))
+
+    def __repr__(self) -> str:
+        return f"Chunk({self.index}, {self.heading!r}, {self.tokens} tokens)"
+
+def _split_long(text: str, max_tokens: int) -> list[str]:
+    """Splits a section at blank lines outside code blocks into parts of at most about `max_tokens` tokens."""
+    blocks, current, in_fence = [], [], False
+    for line in text.splitlines(keepends=True):
+        if _FENCE_PATTERN.match(line):
+            in_fence = not in_fence
+        current.append(line)
+        if not in_fence and not line.strip():
+            blocks.append("".join(current))
+            current = []
+    if current:
+        blocks.append("".join(current))
+
+    parts, part = [], ""
+    for block in blocks:
+        if part and estimate_tokens(part + block) > max_tokens:
+            parts.append(part)
+            part = ""
+        part += block
+    if part:
+        parts.append(part)
+    return parts
+
+def split_chunks(text: str, max_chunk_tokens: int = MAX_CHUNK_TOKENS) -> list[Chunk]:
+    """
+    Splits a README into chunks at its headings. Headings inside fenced code blocks are ignored, code blocks are never
+    split, and sections longer than `max_chunk_tokens` are split at blank lines.
+
+    Args:
+        text (str): The README markdown.
+        max_chunk_tokens (int): The approximate size above which a section is split. Defaults to MAX_CHUNK_TOKENS.
+
+    Returns:
+        list[Chunk]: The chunks in README order.
+    """
+    sections: list[tuple[str, list[str]]] = [("", [])]
+    path: list[tuple[int, str]] = []
+    in_fence = False
+    for line in text.splitlines(keepends=True):
+        if _FENCE_PATTERN.match(line):
+            in_fence = not in_fence
+        match = None if in_fence else _HEADING_PATTERN.match(line)
+        if match:
+            level = len(match.group(1))
+            path = [(lvl, title) for lvl, title in path if lvl < level] + [(level, match.group(2))]
+            sections.append((" > ".join(title for _, title in path), [line]))
+        else:
+            sections[-1][1].append(line)
+
+    chunks: list[Chunk] = []
+    for heading, lines in sections:
+        section = "".join(lines)
+        if not section.strip():
+            continue
+        parts = [section] if estimate_tokens(section) <= max_chunk_tokens else _split_long(section, max_chunk_tokens)
+        for part in parts:
+            chunks.append(Chunk(len(chunks), heading, part))
+    return chunks
+
+_EXPANSION_TERMS = {_terms(word)[0]: _terms(" ".join(words)) for word, words in _EXPANSIONS.items()}
+
+def query_terms(question: str) -> list[str]:
+    """
+    Turns a question into search terms: its words without the prompt template's filler, plus the words READMEs
+    commonly use for what it asks about.
+
+    Args:
+        question (str): The question asked about the README.
+
+    Returns:
+        list[str]: The search terms, possibly repeated.
+    """
+    terms = [term for term in _terms(question) if term not in _STOPWORDS]
+    expanded = list(terms)
+    for term in terms:
+        expanded.extend(_EXPANSION_TERMS.get(term, []))
+    return expanded
+
+def score_chunks(chunks: list[Chunk], question: str) -> list[float]:
+    """
+    Scores chunks against a question with Okapi BM25, treating each chunk as a document. Heading words are weighted
+    up, and boilerplate sections are weighted down.
+
+    Args:
+        chunks (list[Chunk]): The chunks of a README.
+        question (str): The question asked about the README.
+
+    Returns:
+        list[float]: The score of each chunk, in the order of `chunks`.
+    """
+    documents = [Counter(_terms(chunk.text) + _terms(chunk.heading) * HEADING_WEIGHT) for chunk in chunks]
+    if not documents:
+        return []
+    lengths = [sum(document.values()) for document in documents]
+    average_length = (sum(lengths) / len(lengths)) or 1
+    frequency = Counter(term for document in documents for term in document)
+    query = Counter(query_terms(question))
+
+    scores = []
+    for chunk, document, length in zip(chunks, documents, lengths):
+        score = 0.0
+        for term, weight in query.items():
+            count = document.get(term)
+            if not count:
+                continue
+            idf = math.log(1 + (len(documents) - frequency[term] + 0.5) / (frequency[term] + 0.5))
+            score += weight * idf * count * (BM25_K1 + 1) / (count + BM25_K1 * (1 - BM25_B + BM25_B * length / average_length))
+        scores.append(score * BOILERPLATE_WEIGHT if chunk.boilerplate else score)
+    return scores
+
+class ReadmeSelection:
+    """
+    The part of a README selected for a question.
+
+    Attributes:
+        text (str): The selected chunks joined in README order.
+        chunks (list[Chunk]): The selected chunks.
+        total_tokens (int): The estimated tokens of the whole README.
+        used_tokens (int): The estimated tokens of the selection.
+    """
+    __slots__ = ("text", "chunks", "total_tokens", "used_tokens")
+
+    def __init__(self, text: str, chunks: list[Chunk], total_tokens: int, used_tokens: int) -> None:
+        self.text = text
+        self.chunks = chunks
+        self.total_tokens = total_tokens
+        self.used_tokens = used_tokens
+
+    @property
+    def saved_tokens(self) -> int:
+        """The estimated tokens not sent because of the selection."""
+        return self.total_tokens - self.used_tokens
+
+def select_context(text: str, question: str, budget: int = DEFAULT_TOKEN_BUDGET) -> ReadmeSelection:
+    """
+    Selects the chunks of a README most relevant to a question that fit a token budget. The introduction is kept
+    when it fits, since it names the model and what it does, and the rest of the budget goes to the best scoring
+    chunks. Chunks unrelated to the question are left out even when the whole README would fit.
+
+    Args:
+        text (str): The README markdown.
+        question (str): The question asked about the README.
+        budget (int): The number of tokens the selection may use. Defaults to DEFAULT_TOKEN_BUDGET.
+
+    Returns:
+        ReadmeSelection: The selected part of the README.
+    """
+    chunks = split_chunks(text)
+    total_tokens = estimate_tokens(text)
+    scores = score_chunks(chunks, question)
+
+    chosen: list[Chunk] = []
+    used = 0
+    if chunks and not chunks[0].boilerplate and chunks[0].tokens <= budget // 3:
+        chosen.append(chunks[0])
+        used += chunks[0].tokens
+    # Chunks that share no term with the question are only sent when nothing matches at all
+    ranked = sorted((i for i in range(len(chunks)) if scores[i] > 0), key=lambda i: (-scores[i], i))
+    if not ranked:
+        ranked = [i for i in range(len(chunks)) if not chunks[i].boilerplate]
+    for i in ranked:
+        chunk = chunks[i]
+        if chunk in chosen:
+            continue
+        if used + chunk.tokens <= budget:
+            chosen.append(chunk)
+            used += chunk.tokens
+    chosen.sort(key=lambda chunk: chunk.index)
+    selected = "\n".join(chunk.text.rstrip("\n") for chunk in chosen)
+    return ReadmeSelection(selected, chosen, total_tokens, estimate_tokens(selected))
@@ -0,0 +1,206 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable
+from directories import RENDER_CACHE_DIR
+
+RENDER_VERSION = "1" # Bump when the markdown extensions or page layout change, so stale pages on disk are ignored
+
+def readme_digest(text: str) -> str:
+    """
+    Hashes README content for use as a cache key.
+
+    Args:
+        text (str): The README content.
+
+    Returns:
+        str: The hex SHA-256 digest of the content.
+    """
+    return hashlib.sha256(text.encode('utf-8', errors='replace')).hexdigest()
+
+class RenderCache:
+    """
+    An LRU cache of rendered README pages keyed by (README hash, theme), kept in memory and persisted to disk.
+
+    Rendering a README with codehilite runs Pygments over every code block, which is by far the slowest part of showing a
+    model page. With this cache each README is rendered once per theme; switching between models or toggling dark mode
+    only reuses pages that were already rendered, including ones rendered in an earlier session.
+
+    Attributes:
+        max_entries (int): The number of pages kept in memory.
+        max_disk_entries (int): The number of pages kept on disk, least recently used pages are removed first.
+        cache_dir (str | None): The directory pages are persisted to, None to keep the cache in memory only.
+        hits (int): The number of lookups served from memory or disk.
+        misses (int): The number of lookups that had to render.
+    """
+    def __init__(self, max_entries: int = 32, max_disk_entries: int = 256, cache_dir: str | None = RENDER_CACHE_DIR) -> None:
+        """
+        Initializes the cache.
+
+        Args:
+            max_entries (int): The number of pages kept in memory. Defaults to 32.
+            max_disk_entries (int): The number of pages kept on disk. Defaults to 256.
+            cache_dir (str | None): The directory pages are persisted to. Defaults to RENDER_CACHE_DIR.
+        """
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+        self._pages: OrderedDict[tuple[str, str], str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _disk_path(self, key: tuple[str, str]) -> str:
+        digest, theme = key
+        return os.path.join(self.cache_dir, f"{digest}-{theme}-v{RENDER_VERSION}.html")
+
+    def _remember(self, key: tuple[str, str], page: str) -> None:
+        """Stores a page in memory, evicting the least recently used page if the cache is full."""
+        self._pages[key] = page
+        self._pages.move_to_end(key)
+        while len(self._pages) > self.max_entries:
+            self._pages.popitem(last=False)
+
+    def get(self, text: str, theme: str) -> str | None:
+        """
+        Looks up the rendered page for a README.
+
+        Args:
+            text (str): The README content.
+            theme (str): The theme the page was rendered for, e.g. 'light' or 'dark'.
+
+        Returns:
+            str | None: The rendered page, or None if it was never rendered for this theme.
+        """
+        return self.get_by_key((readme_digest(text), theme))
+
+    def get_by_key(self, key: tuple[str, str]) -> str | None:
+        """
+        Looks up a rendered page by its (README hash, theme) key.
+
+        Args:
+            key (tuple[str, str]): The README digest and theme.
+
+        Returns:
+            str | None: The rendered page, or None if it is not cached.
+        """
+        with self._lock:
+            page = self._pages.get(key)
+            if page is not None:
+                self._pages.move_to_end(key)
+                self.hits += 1
+                return page
+        page = self._read_disk(key)
+        with self._lock:
+            if page is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(key, page)
+        return page
+
+    def put(self, text: str, theme: str, page: str) -> None:
+        """
+        Stores the rendered page for a README.
+
+        Args:
+            text (str): The README content.
+            theme (str): The theme the page was rendered for.
+            page (str): The rendered page.
+        """
+        self.put_by_key((readme_digest(text), theme), page)
+
+    def put_by_key(self, key: tuple[str, str], page: str) -> None:
+        """
+        Stores a rendered page under its (README hash, theme) key, in memory and on disk.
+
+        Args:
+            key (tuple[str, str]): The README digest and theme.
+            page (str): The rendered page.
+        """
+        with self._lock:
+            self._remember(key, page)
+        self._write_disk(key, page)
+
+    def get_or_render(self, text: str, theme: str, render: Callable[[str], str]) -> str:
+        """
+        Returns the cached page for a README, rendering and caching it first if needed.
+
+        Args:
+            text (str): The README content.
+            theme (str): The theme to render for.
+            render (Callable[[str], str]): Renders README content into a page for the theme.
+
+        Returns:
+            str: The rendered page.
+        """
+        key = (readme_digest(text), theme)
+        page = self.get_by_key(key)
+        if page is None:
+            page = render(text)
+            self.put_by_key(key, page)
+        return page
+
+    def _read_disk(self, key: tuple[str, str]) -> str | None:
+        """Reads a persisted page, marking it as recently used. Returns None if it is not on disk."""
+        if not self.cache_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                page = file.read()
+            os.utime(path)
+            return page
+        except OSError:
+            return None
+
+    def _write_disk(self, key: tuple[str, str], page: str) -> None:
+        """Persists a page atomically and prunes the least recently used pages beyond `max_disk_entries`."""
+        if not self.cache_dir:
+            return
+        path = self._disk_path(key)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                file.write(page)
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"Could not persist rendered page {path}: {e}")
+            return
+        self._prune_disk()
+
+    def _prune_disk(self) -> None:
+        """Removes the least recently used persisted pages once there are more than `max_disk_entries`."""
+        try:
+            pages = [entry for entry in os.scandir(self.cache_dir) if entry.name.endswith('.html')]
+        except OSError:
+            return
+        if len(pages) <= self.max_disk_entries:
+            return
+        pages.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in pages[:len(pages) - self.max_disk_entries]:
+            try:
+                os.remove(entry.path)
+            except OSError as e:
+                print(f"Could not remove cached page {entry.path}: {e}")
+
+    def clear(self) -> None:
+        """Empties the in-memory cache. Persisted pages are kept."""
+        with self._lock:
+            self._pages.clear()
+
+_shared_cache: RenderCache | None = None
+
+def get_render_cache() -> RenderCache:
+    """
+    Returns the process-wide render cache.
+
+    Returns:
+        RenderCache: The shared cache.
+    """
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = RenderCache()
+    return _shared_cache
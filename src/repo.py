@@ -1,5 +1,6 @@
 import re
 from api_caller import APIManager
+from tracing import span
 import json
 
 class Repository:
@@ -63,11 +64,13 @@ class Repository:
 
     def fetch_features(self) -> None:
         """Fetch repository features from its README and update object attributes."""
-        self.readme_content = APIManager.get_readme_contents(repo_url=self.repo_url)
-        if self.readme_content:
-            self.install_commands = self.parse_readme_contents()
-            self.tables = self.get_tables()
-            self.model_type = self.get_model_type()
+        with span("repository.fetch_features", repo=f"{self.owner}/{self.repo_name}"):
+            self.readme_content = APIManager.get_readme_contents(repo_url=self.repo_url)
+            if self.readme_content:
+                with span("repository.parse", chars=len(self.readme_content)):
+                    self.install_commands = self.parse_readme_contents()
+                    self.tables = self.get_tables()
+                    self.model_type = self.get_model_type()
 
     def get_model_type(self) -> str | None:
         """
@@ -0,0 +1,157 @@
+import sys
+
+def _intern(value: str | None) -> str | None:
+    """Interns a short, frequently repeated string so equal values share one object."""
+    return sys.intern(value) if isinstance(value, str) else value
+
+class RepoRecord:
+    """
+    A compact, immutable summary of a repository shared by the search results and the installed models views.
+
+    Records use `__slots__` and keep no README content. Owner and model type strings are interned, since the same
+    few owners and types repeat across thousands of results, and the name is derived from the URL instead of being stored.
+
+    Attributes:
+        url (str): The URL of the repository.
+        owner (str): The owner of the repository.
+        description (str): A description of the repository.
+        model_type (str | None): The type of model ('ASR', 'OBJ', 'LLM' or 'N/A'), None if unknown.
+        is_installed (bool): Indicates whether the repository is locally installed.
+    """
+    __slots__ = ("url", "owner", "description", "model_type", "is_installed")
+
+    def __init__(self, url: str, owner: str, description: str | None = "", model_type: str | None = None,
+                 is_installed: bool = False) -> None:
+        """
+        Initializes the record.
+
+        Args:
+            url (str): The URL of the repository.
+            owner (str): The owner of the repository.
+            description (str | None): A description of the repository. Defaults to an empty string.
+            model_type (str | None): The type of model, if known. Optional.
+            is_installed (bool): Whether the repository is locally installed. Defaults to False.
+        """
+        object.__setattr__(self, "url", url.rstrip('/'))
+        object.__setattr__(self, "owner", _intern(owner))
+        object.__setattr__(self, "description", description or "")
+        object.__setattr__(self, "model_type", _intern(model_type))
+        object.__setattr__(self, "is_installed", bool(is_installed))
+
+    def __setattr__(self, name, value) -> None:
+        raise AttributeError("RepoRecord is immutable")
+
+    def __delattr__(self, name) -> None:
+        raise AttributeError("RepoRecord is immutable")
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, RepoRecord):
+            return NotImplemented
+        return all(getattr(self, slot) == getattr(other, slot) for slot in self.__slots__)
+
+    def __hash__(self) -> int:
+        return hash(self.url)
+
+    def __reduce__(self):
+        return (RepoRecord, (self.url, self.owner, self.description, self.model_type, self.is_installed))
+
+    @property
+    def name(self) -> str:
+        """
+        The name of the repository, parsed from its URL.
+
+        Returns:
+            str: The repository name.
+        """
+        return self.url.rsplit('/', 1)[-1]
+
+    def with_installed(self, is_installed: bool) -> "RepoRecord":
+        """
+        Returns a copy of the record with a different installed status.
+
+        Args:
+            is_installed (bool): The new installed status.
+
+        Returns:
+            RepoRecord: The updated record, or this record if the status is unchanged.
+        """
+        if is_installed == self.is_installed:
+            return self
+        return RepoRecord(self.url, self.owner, self.description, self.model_type, is_installed)
+
+    @classmethod
+    def from_dict(cls, entry_dict: dict, is_installed: bool = True) -> "RepoRecord":
+        """
+        Creates a record from an installed model entry, as written by InstallPage.install_store.
+
+        Args:
+            entry_dict (dict): A dictionary containing 'url', 'owner' and 'description', and optionally 'model_type'.
+            is_installed (bool): The installed status of the record. Defaults to True.
+
+        Returns:
+            RepoRecord: The new record.
+        """
+        return cls(entry_dict["url"], entry_dict["owner"], entry_dict.get("description"),
+                   entry_dict.get("model_type"), is_installed)
+
+    @classmethod
+    def from_pwc(cls, repository, is_installed: bool = False) -> "RepoRecord":
+        """
+        Creates a record from a PapersWithCode search result.
+
+        Args:
+            repository (paperswithcode.models.repository.Repository): The search result.
+            is_installed (bool): The installed status of the record. Defaults to False.
+
+        Returns:
+            RepoRecord: The new record.
+        """
+        return cls(repository.url, repository.owner, repository.description, None, is_installed)
+
+    @classmethod
+    def from_repository(cls, repository, is_installed: bool = False) -> "RepoRecord":
+        """
+        Creates a record from a fully fetched repository, dropping its README and parsed content.
+
+        Args:
+            repository (repo.Repository): The repository.
+            is_installed (bool): The installed status of the record. Defaults to False.
+
+        Returns:
+            RepoRecord: The new record.
+        """
+        return cls(repository.repo_url, repository.owner, repository.description, repository.model_type, is_installed)
+
+    def to_dict(self) -> dict:
+        """
+        Converts the record into the dictionary format used for installed model entries.
+
+        Returns:
+            dict: The record's name, URL, model type, description and owner.
+        """
+        return {
+            "name": self.name,
+            "url": self.url,
+            "model_type": self.model_type,
+            "description": self.description,
+            "owner": self.owner
+        }
+
+    def __repr__(self) -> str:
+        return f"RepoRecord(url={self.url!r}, owner={self.owner!r}, model_type={self.model_type!r}, is_installed={self.is_installed})"
+
+    def __str__(self) -> str:
+        """
+        Provides a string representation of the repository data.
+
+        Returns:
+            str: A formatted string displaying the attributes of the repository.
+        """
+        res = [
+        f"name: {self.name}",
+        f"owner: {self.owner}",
+        f"url: {self.url}",
+        f"description: {self.description}"
+        ]
+
+        return "\n".join(res)
@@ -0,0 +1,230 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from typing import Callable
+from directories import RESPONSE_CACHE_DIR, ensure_dir
+
+RESPONSE_CACHE_VERSION = "1" # Bump when the stored layout changes, so responses written by older versions are ignored
+DEFAULT_TTL = 7 * 24 * 60 * 60
+DEFAULT_MAX_ENTRIES = 512
+
+def hash_text(text: str) -> str:
+    """
+    Hashes text for use in a response key.
+
+    Args:
+        text (str): The text.
+
+    Returns:
+        str: The hex SHA-256 digest of the text.
+    """
+    return hashlib.sha256(text.encode('utf-8', errors='replace')).hexdigest()
+
+def response_key(model: str, system_prompt: str, request: str, document_hash: str) -> str:
+    """
+    Builds the key a chat response is stored under.
+
+    Args:
+        model (str): The model identifier the request is sent to.
+        system_prompt (str): The system prompt of the request.
+        request (str): The prompt template, e.g. the question asked about the README.
+        document_hash (str): The hash of the document the question is about.
+
+    Returns:
+        str: The hex digest identifying the response.
+    """
+    return hash_text(json.dumps([RESPONSE_CACHE_VERSION, model, system_prompt, request, document_hash]))
+
+class _InFlight:
+    """A request being answered, which identical requests wait on instead of sending their own."""
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.response: str | None = None
+
+class ResponseCache:
+    """
+    Stores chat responses on disk for `ttl` seconds, so asking the same question about the same document is answered
+    without another API call. Identical requests made while one is being answered wait for its response instead of
+    sending their own.
+
+    Each response is a JSON file named by its key holding 'response', 'created' and the parts of the key. Files are
+    written to a temporary file and renamed into place. Expired responses are ignored on lookup, and the oldest files
+    are removed once more than `max_entries` are stored.
+
+    Attributes:
+        cache_dir (str): The directory responses are stored in.
+        ttl (float): The number of seconds a response is reused for.
+        max_entries (int): The number of responses kept on disk.
+        hits (int): The number of lookups answered from the cache or by a request already in flight.
+        misses (int): The number of lookups that had to call the API.
+    """
+    def __init__(self, cache_dir: str | None = None, ttl: float = DEFAULT_TTL, max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        """
+        Initializes the cache.
+
+        Args:
+            cache_dir (str | None): The directory responses are stored in. Defaults to RESPONSE_CACHE_DIR.
+            ttl (float): The number of seconds a response is reused for. Defaults to 7 days.
+            max_entries (int): The number of responses kept on disk. Defaults to 512.
+        """
+        self.cache_dir = cache_dir or RESPONSE_CACHE_DIR
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._in_flight: dict[str, _InFlight] = {}
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str) -> str | None:
+        """
+        Looks up a stored response that has not expired.
+
+        Args:
+            key (str): The key built by `response_key`.
+
+        Returns:
+            str | None: The response, or None if none is stored under the key or it expired.
+        """
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as file:
+                entry = json.load(file)
+        except (OSError, ValueError):
+            return None
+        if time.time() - entry.get("created", 0) > self.ttl:
+            return None
+        return entry.get("response")
+
+    def put(self, key: str, response: str, parts: dict | None = None) -> None:
+        """
+        Stores a response, replacing any response stored under the same key.
+
+        Args:
+            key (str): The key built by `response_key`.
+            response (str): The response text.
+            parts (dict | None): The values the key was built from, kept for inspection.
+        """
+        ensure_dir(self.cache_dir)
+        path = self._path(key)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                json.dump({"key": key, "parts": parts or {}, "response": response, "created": time.time()}, file)
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"Could not cache the chat response: {e}")
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            return
+        self._prune()
+
+    def get_or_fetch(self, key: str, fetch: Callable[[], tuple[str, bool]], parts: dict | None = None) -> str:
+        """
+        Returns the stored response for a key, or fetches it. While a key is being fetched, other callers asking for
+        the same key wait for that fetch and share its response.
+
+        Args:
+            key (str): The key built by `response_key`.
+            fetch (Callable[[], tuple[str, bool]]): Calls the API and returns the response text and whether it is a
+                successful answer. Only successful answers are stored, so errors are retried on the next request.
+            parts (dict | None): The values the key was built from, stored with the response.
+
+        Returns:
+            str: The response text.
+        """
+        response = self.get(key)
+        if response is not None:
+            with self._lock:
+                self.hits += 1
+            return response
+
+        with self._lock:
+            in_flight = self._in_flight.get(key)
+            leader = in_flight is None
+            if leader:
+                in_flight = self._in_flight[key] = _InFlight()
+                self.misses += 1
+
+        if not leader:
+            in_flight.done.wait()
+            if in_flight.response is not None:
+                with self._lock:
+                    self.hits += 1
+                return in_flight.response
+            return self.get_or_fetch(key, fetch, parts) # The request we waited on failed or was cancelled, send our own
+
+        try:
+            response, ok = fetch()
+            if ok:
+                self.put(key, response, parts)
+                in_flight.response = response # Errors and cancelled partial answers are never shared
+            return response
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            in_flight.done.set()
+
+    def _prune(self) -> None:
+        """Removes the oldest responses once more than `max_entries` are stored."""
+        entries = []
+        try:
+            with os.scandir(self.cache_dir) as scan:
+                for entry in scan:
+                    if entry.name.endswith('.json'):
+                        try:
+                            entries.append((entry.stat().st_mtime, entry.path))
+                        except OSError:
+                            continue
+        except OSError:
+            return
+        entries.sort()
+        for _, path in entries[:max(0, len(entries) - self.max_entries)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def remove(self, key: str) -> None:
+        """
+        Removes a stored response.
+
+        Args:
+            key (str): The key of the response.
+        """
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def clear(self) -> None:
+        """Removes every stored response."""
+        try:
+            with os.scandir(self.cache_dir) as scan:
+                paths = [entry.path for entry in scan if entry.is_file()]
+        except OSError:
+            return
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+_shared_cache: ResponseCache | None = None
+
+def get_response_cache() -> ResponseCache:
+    """
+    Returns the process-wide response cache.
+
+    Returns:
+        ResponseCache: The shared cache.
+    """
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = ResponseCache()
+    return _shared_cache
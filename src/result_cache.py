@@ -0,0 +1,220 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+from typing import Callable
+from directories import RESULT_CACHE_DIR, ensure_dir
+
+RESULT_CACHE_VERSION = "1" # Bump when the stored layout changes, so results written by older versions are ignored
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+META_NAME = "meta.json"
+FILES_DIR = "files"
+
+def hash_text(text: str) -> str:
+    """
+    Hashes text for use in a result key.
+
+    Args:
+        text (str): The text.
+
+    Returns:
+        str: The hex SHA-256 digest of the text.
+    """
+    return hashlib.sha256(text.encode('utf-8', errors='replace')).hexdigest()
+
+def result_key(env_name: str, python_version: str, script_hash: str, input_hash: str) -> str:
+    """
+    Builds the key a model result is stored under.
+
+    Args:
+        env_name (str): The conda environment the script runs in.
+        python_version (str): The Python version of the environment.
+        script_hash (str): The hash of the script's content.
+        input_hash (str): The hash of the input's content.
+
+    Returns:
+        str: The hex digest identifying the result.
+    """
+    return hash_text(json.dumps([RESULT_CACHE_VERSION, env_name, python_version, script_hash, input_hash]))
+
+class ResultCache:
+    """
+    Stores model results on disk, so running the same script in the same environment on the same input is answered
+    without running the model again.
+
+    Each result is a directory named by its key holding 'meta.json', the output and the files the run produced. A
+    result is written to a temporary directory and renamed into place, so readers never see a partial result. Looking
+    a result up refreshes its modification time, and the least recently used results are removed once the cache
+    exceeds `max_bytes`.
+
+    The metadata is a dictionary with the keys 'key', 'parts' (the values the key was built from), 'output_type'
+    ('text' or 'image'), 'text', 'stdout', 'files' (names of produced files), 'exit_code', 'size' and 'created'. Lookups add
+    'output_path' for image outputs and 'file_paths' for the stored copies of the produced files.
+
+    Attributes:
+        cache_dir (str): The directory results are stored in.
+        max_bytes (int): The total size of stored results above which the least recently used ones are removed.
+        hits (int): The number of lookups that found a result.
+        misses (int): The number of lookups that did not.
+    """
+    def __init__(self, cache_dir: str | None = None, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        """
+        Initializes the cache.
+
+        Args:
+            cache_dir (str | None): The directory results are stored in. Defaults to RESULT_CACHE_DIR.
+            max_bytes (int): The total size of stored results above which results are removed. Defaults to 2 GiB.
+        """
+        self.cache_dir = cache_dir or RESULT_CACHE_DIR
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key)
+
+    def get(self, key: str) -> dict | None:
+        """
+        Looks up a stored result.
+
+        Args:
+            key (str): The key built by `result_key`.
+
+        Returns:
+            dict | None: The result's metadata, or None if no result is stored under the key.
+        """
+        entry_dir = self._entry_dir(key)
+        meta_path = os.path.join(entry_dir, META_NAME)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as file:
+                meta = json.load(file)
+            os.utime(meta_path)  # Marks the result as recently used
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        if meta.get("output_type") == "image":
+            meta["output_path"] = os.path.join(entry_dir, "output.png")
+        meta["file_paths"] = [os.path.join(entry_dir, FILES_DIR, name) for name in meta.get("files", [])]
+        with self._lock:
+            self.hits += 1
+        return meta
+
+    def put(self, key: str, parts: dict, output_type: str, text: str | None = None,
+            write_image: Callable[[str], bool] | None = None, stdout: str = "", files: list[str] | None = None,
+            exit_code: int = 0) -> bool:
+        """
+        Stores a result, replacing any result stored under the same key.
+
+        Args:
+            key (str): The key built by `result_key`.
+            parts (dict): The values the key was built from, kept for inspection.
+            output_type (str): 'text' or 'image'.
+            text (str | None): The text output, for text results.
+            write_image (Callable[[str], bool] | None): Writes the image output as PNG to the given path, for image results.
+            stdout (str): What the run printed.
+            files (list[str] | None): Paths of the files the run produced, copied into the result.
+            exit_code (int): The run's exit status, 0 when the model's slot returned normally. Defaults to 0.
+
+        Returns:
+            bool: True if the result was stored.
+        """
+        ensure_dir(self.cache_dir)
+        temp_dir = os.path.join(self.cache_dir, f".{key}.{threading.get_ident()}.tmp")
+        try:
+            os.makedirs(os.path.join(temp_dir, FILES_DIR))
+            if output_type == "image" and (write_image is None or not write_image(os.path.join(temp_dir, "output.png"))):
+                raise OSError("the image output could not be written")
+            names = []
+            for path in files or []:
+                name = os.path.basename(path)
+                shutil.copy2(path, os.path.join(temp_dir, FILES_DIR, name))
+                names.append(name)
+            meta = {
+                "key": key,
+                "parts": parts,
+                "output_type": output_type,
+                "text": text,
+                "stdout": stdout,
+                "files": names,
+                "exit_code": exit_code,
+                "size": self._dir_size(temp_dir) + len(text or "") + len(stdout),
+                "created": time.time(),
+            }
+            with open(os.path.join(temp_dir, META_NAME), 'w', encoding='utf-8') as file:
+                json.dump(meta, file)
+            entry_dir = self._entry_dir(key)
+            if os.path.isdir(entry_dir):
+                shutil.rmtree(entry_dir, ignore_errors=True)
+            os.replace(temp_dir, entry_dir)
+        except OSError as e:
+            print(f"Could not cache the model result: {e}")
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            return False
+        self._prune()
+        return True
+
+    @staticmethod
+    def _dir_size(path: str) -> int:
+        total = 0
+        for root, _, names in os.walk(path):
+            for name in names:
+                try:
+                    total += os.path.getsize(os.path.join(root, name))
+                except OSError:
+                    pass
+        return total
+
+    def _prune(self) -> None:
+        """Removes the least recently used results once the stored results exceed `max_bytes`."""
+        entries = []
+        try:
+            with os.scandir(self.cache_dir) as scan:
+                for entry in scan:
+                    if entry.name.startswith('.') or not entry.is_dir():
+                        continue
+                    meta_path = os.path.join(entry.path, META_NAME)
+                    try:
+                        with open(meta_path, 'r', encoding='utf-8') as file:
+                            size = json.load(file).get("size", 0)
+                        entries.append((os.stat(meta_path).st_mtime, size, entry.path))
+                    except (OSError, ValueError):
+                        continue
+        except OSError:
+            return
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+    def remove(self, key: str) -> None:
+        """
+        Removes a stored result.
+
+        Args:
+            key (str): The key of the result.
+        """
+        shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+
+    def clear(self) -> None:
+        """Removes every stored result."""
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+_shared_cache: ResultCache | None = None
+
+def get_result_cache() -> ResultCache:
+    """
+    Returns the process-wide result cache.
+
+    Returns:
+        ResultCache: The shared cache.
+    """
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = ResultCache()
+    return _shared_cache
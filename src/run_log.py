@@ -0,0 +1,200 @@
+import os
+import json
+import gzip
+import time
+import uuid
+import shutil
+import threading
+import datetime
+from directories import RUN_LOG_DIR
+
+RUN_INDEX_NAME = "index.jsonl" # One JSON record per finished run, appended by RunLogWriter.close
+
+def compress_file(path: str) -> str:
+    """
+    Gzip-compresses a file next to itself and removes the original.
+
+    Args:
+        path (str): The path of the file to compress.
+
+    Returns:
+        str: The path of the compressed file.
+    """
+    gz_path = f"{path}.gz"
+    with open(path, 'rb') as source, gzip.open(gz_path, 'wb') as target:
+        shutil.copyfileobj(source, target)
+    os.remove(path)
+    return gz_path
+
+class RunLogWriter:
+    """
+    A buffered, rotating log sink for a single subprocess run. Every run gets its own file under the run log directory,
+    so repeated runs of the same worker no longer truncate each other, and a record of the run is appended to an index file on close.
+
+    Writes go through a large userspace buffer and are only flushed to the OS when `flush_bytes` characters are pending,
+    or by a timer `flush_interval` seconds after the first unflushed write, so output of a quiet subprocess still reaches disk. When a run's log grows past `max_bytes` it is rotated into gzip-compressed
+    segments, and plain logs of older runs are compressed once more than `keep_uncompressed` of them exist.
+
+    Attributes:
+        run_id (str): A unique identifier for the run, also used as the log file name.
+        name (str): The worker name the run belongs to, e.g. 'create' or 'call'.
+        command (str): The command being run.
+        env_name (str | None): The conda environment the command runs in, if known.
+        path (str): The path of the current (uncompressed) log segment.
+        exit_code (int | None): The exit code of the run once closed, None if it never completed.
+    """
+    def __init__(self, name: str, command: str, env_name: str | None = None, log_dir: str | None = None,
+                 flush_interval: float = 1.0, flush_bytes: int = 64 * 1024, max_bytes: int = 16 * 1024 * 1024,
+                 backup_count: int = 4, keep_uncompressed: int = 5) -> None:
+        """
+        Initializes the writer and opens the log file for the run.
+
+        Args:
+            name (str): The worker name the run belongs to.
+            command (str): The command being run, recorded in the index.
+            env_name (str | None): The conda environment the command runs in. Optional.
+            log_dir (str | None): The directory to store run logs in. Defaults to RUN_LOG_DIR.
+            flush_interval (float): The maximum number of seconds output stays buffered. Defaults to 1.0.
+            flush_bytes (int): The number of pending characters that triggers a flush. Defaults to 64 KiB.
+            max_bytes (int): The size at which the run's log is rotated. Defaults to 16 MiB.
+            backup_count (int): The number of rotated segments kept per run. Defaults to 4.
+            keep_uncompressed (int): The number of most recent run logs left uncompressed. Defaults to 5.
+        """
+        self.name = name
+        self.command = command
+        self.env_name = env_name
+        self.log_dir = log_dir or RUN_LOG_DIR
+        self.flush_interval = flush_interval
+        self.flush_bytes = flush_bytes
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.keep_uncompressed = keep_uncompressed
+        self.exit_code: int | None = None
+
+        now = datetime.datetime.now()
+        self.run_id = f"{name}_{now.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+        self.started = now.isoformat(timespec='seconds')
+        self.path = os.path.join(self.log_dir, f"{self.run_id}.log")
+        os.makedirs(self.log_dir, exist_ok=True)
+
+        self._start_time = time.monotonic()
+        self._pending = 0
+        self._segment_size = 0
+        self._total_size = 0
+        self._lock = threading.Lock() # The flush timer runs on its own thread
+        self._timer: threading.Timer | None = None
+        self._file = open(self.path, 'w', encoding='utf-8', buffering=flush_bytes)
+
+    def __enter__(self) -> "RunLogWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close(self.exit_code)
+
+    def write(self, text: str) -> None:
+        """
+        Buffers text for the log, flushing or rotating when the policy requires it.
+
+        Args:
+            text (str): The text to write, typically one line of subprocess output.
+        """
+        with self._lock:
+            self._file.write(text)
+            size = len(text)
+            self._pending += size
+            self._segment_size += size
+            self._total_size += size
+            if self._segment_size >= self.max_bytes:
+                self._rotate()
+            elif self._pending >= self.flush_bytes:
+                self._flush()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self._timed_flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self) -> None:
+        """Flushes buffered output to the OS."""
+        with self._lock:
+            self._flush()
+
+    def _flush(self) -> None:
+        """Flushes buffered output to the OS and disarms the flush timer. The caller must hold the lock."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._file.closed:
+            return
+        self._file.flush()
+        self._pending = 0
+
+    def _timed_flush(self) -> None:
+        """Flushes output that has been buffered for `flush_interval` seconds, called on the timer's thread."""
+        with self._lock:
+            self._timer = None
+            if self._pending:
+                self._flush()
+
+    def _rotate(self) -> None:
+        """
+        Moves the current segment into a compressed backup, shifting older backups up by one and dropping the oldest,
+        then starts a new segment at the original path.
+        """
+        self._flush()
+        self._file.close()
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{index}.gz"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}.gz")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+            compress_file(f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._file = open(self.path, 'w', encoding='utf-8', buffering=self.flush_bytes)
+        self._segment_size = 0
+
+    def close(self, exit_code: int | None = None) -> None:
+        """
+        Flushes and closes the log, appends the run's record to the index file, and compresses older run logs.
+
+        Args:
+            exit_code (int | None): The exit code of the subprocess, None if it did not complete.
+        """
+        with self._lock:
+            if self._file.closed:
+                return
+            self._flush()
+            self._file.close()
+        self.exit_code = exit_code
+        record = {
+            "run_id": self.run_id,
+            "name": self.name,
+            "env": self.env_name,
+            "command": self.command,
+            "started": self.started,
+            "duration": round(time.monotonic() - self._start_time, 3),
+            "exit_code": exit_code,
+            "bytes": self._total_size,
+            "path": self.path
+        }
+        with open(os.path.join(self.log_dir, RUN_INDEX_NAME), 'a', encoding='utf-8') as index_file:
+            index_file.write(json.dumps(record) + "\n")
+        self._compress_old_runs()
+
+    def _compress_old_runs(self) -> None:
+        """
+        Gzip-compresses the plain logs of all but the `keep_uncompressed` most recent runs. Readers of the index
+        should look for `<path>.gz` when a recorded path no longer exists.
+        """
+        try:
+            plain_logs = [entry for entry in os.scandir(self.log_dir) if entry.is_file() and entry.name.endswith('.log')]
+        except OSError as e:
+            print(f"Could not list run logs in {self.log_dir}: {e}")
+            return
+        plain_logs.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+        for entry in plain_logs[self.keep_uncompressed:]:
+            try:
+                compress_file(entry.path)
+            except OSError as e:
+                print(f"Could not compress run log {entry.path}: {e}")
@@ -0,0 +1,313 @@
+"""
+Lightweight timing spans for the hot paths: API calls, README parsing, database lookups and rendering.
+
+Spans nest per thread, and each outermost span with the spans inside it forms a trace. The most recent traces are
+kept in a ring buffer and can be summarised per span name or exported as JSON or in the Chrome trace event format,
+which chrome://tracing and Perfetto open. Tracing is off unless FOCALAI_TRACE is set or `Tracer.enable` is called,
+and while it is off a span costs one attribute check.
+"""
+import os
+import json
+import time
+import threading
+from collections import deque
+from functools import wraps
+from typing import Any, Callable
+
+TRACE_ENV = "FOCALAI_TRACE" # Set to 1 to trace from startup, e.g. to find what a slow click is waiting on
+DEFAULT_MAX_TRACES = 500
+
+class Span:
+    """
+    A timed operation.
+
+    Attributes:
+        name (str): What was timed, e.g. 'github.readme'.
+        start (float): The `time.perf_counter` time the span started.
+        duration (float): The span's length in seconds, 0 until it ends.
+        thread (str): The name of the thread the span ran on.
+        thread_id (int): The identifier of that thread.
+        depth (int): The number of spans the span is nested in.
+        args (dict): Details recorded with the span, such as a URL.
+        error (str | None): The exception that ended the span, if any.
+    """
+    __slots__ = ("name", "start", "duration", "thread", "thread_id", "depth", "args", "error")
+
+    def __init__(self, name: str, start: float, depth: int, args: dict) -> None:
+        thread = threading.current_thread()
+        self.name = name
+        self.start = start
+        self.duration = 0.0
+        self.thread = thread.name
+        self.thread_id = thread.ident or 0
+        self.depth = depth
+        self.args = args
+        self.error: str | None = None
+
+    def to_dict(self) -> dict:
+        """Returns the span as JSON-serializable data, with times in milliseconds."""
+        return {"name": self.name, "start_ms": round(self.start * 1000, 3), "duration_ms": round(self.duration * 1000, 3),
+                "thread": self.thread, "depth": self.depth, "args": {k: str(v) for k, v in self.args.items()},
+                "error": self.error}
+
+class _NullSpan:
+    """The span returned while tracing is off, it does nothing."""
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *exc_info) -> bool:
+        return False
+
+    def set(self, **args) -> None:
+        pass
+
+_NULL_SPAN = _NullSpan()
+
+class _ActiveSpan:
+    """A span being timed, pushed on its thread's stack while it runs."""
+    __slots__ = ("tracer", "span")
+
+    def __init__(self, tracer: "Tracer", name: str, args: dict) -> None:
+        self.tracer = tracer
+        self.span = Span(name, 0.0, 0, args)
+
+    def __enter__(self) -> "_ActiveSpan":
+        stack = self.tracer._stack()
+        self.span.depth = len(stack)
+        stack.append(self.span)
+        self.span.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> bool:
+        self.span.duration = time.perf_counter() - self.span.start
+        if exc_type is not None:
+            self.span.error = f"{exc_type.__name__}: {exc}"
+        self.tracer._finish(self.span)
+        return False
+
+    def set(self, **args) -> None:
+        """Adds details to the span, e.g. the size of a response once it arrived."""
+        self.span.args.update(args)
+
+class Tracer:
+    """
+    Records spans and keeps the most recent traces.
+
+    Attributes:
+        enabled (bool): Whether spans are recorded.
+        max_traces (int): The number of traces kept.
+    """
+    def __init__(self, max_traces: int = DEFAULT_MAX_TRACES, enabled: bool = False) -> None:
+        """
+        Initializes the tracer.
+
+        Args:
+            max_traces (int): The number of traces kept, older ones are dropped. Defaults to DEFAULT_MAX_TRACES.
+            enabled (bool): Whether spans are recorded from the start. Defaults to False.
+        """
+        self.enabled = enabled
+        self.max_traces = max_traces
+        self._traces: deque[list[Span]] = deque(maxlen=max_traces)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._epoch = time.perf_counter()
+
+    def enable(self) -> None:
+        """Starts recording spans."""
+        self.enabled = True
+
+    def disable(self) -> None:
+        """Stops recording spans. Traces already recorded are kept."""
+        self.enabled = False
+
+    def clear(self) -> None:
+        """Drops the recorded traces."""
+        with self._lock:
+            self._traces.clear()
+
+    def _stack(self) -> list[Span]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+            self._local.finished = []
+        return stack
+
+    def _finish(self, span: Span) -> None:
+        """Pops a finished span, and stores its trace once the outermost span of the thread ends."""
+        stack = self._stack()
+        if span in stack:
+            del stack[stack.index(span):]
+        finished = self._local.finished
+        finished.append(span)
+        if not stack:
+            trace = sorted(finished, key=lambda s: s.start)
+            self._local.finished = []
+            with self._lock:
+                self._traces.append(trace)
+
+    def span(self, name: str, **args) -> Any:
+        """
+        Times the code in a with block.
+
+        Args:
+            name (str): What is timed, e.g. 'db.get_environment_by_name'.
+            **args: Details recorded with the span. More can be added with `set` on the value of the with statement.
+
+        Returns:
+            A context manager, which does nothing while tracing is off.
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return _ActiveSpan(self, name, args)
+
+    def record(self, name: str, start: float, duration: float, **args) -> None:
+        """
+        Stores a span timed by the caller as its own trace, for work that cannot be wrapped in a with block, such as
+        a generator consumed elsewhere.
+
+        Args:
+            name (str): What was timed.
+            start (float): The `time.perf_counter` time it started.
+            duration (float): Its length in seconds.
+            **args: Details recorded with the span.
+        """
+        if not self.enabled:
+            return
+        span = Span(name, start, 0, args)
+        span.duration = duration
+        with self._lock:
+            self._traces.append([span])
+
+    def traces(self) -> list[list[Span]]:
+        """
+        Returns the recorded traces, oldest first.
+
+        Returns:
+            list[list[Span]]: Each trace's spans in start order, the first being the outermost.
+        """
+        with self._lock:
+            return list(self._traces)
+
+    def summary(self) -> list[dict]:
+        """
+        Summarises the recorded spans per name.
+
+        Returns:
+            list[dict]: One entry per span name with its 'name', 'count', 'total_ms', 'p50_ms', 'p95_ms', 'max_ms' and
+            'errors', slowest total first.
+        """
+        durations: dict[str, list[float]] = {}
+        errors: dict[str, int] = {}
+        for trace in self.traces():
+            for span in trace:
+                durations.setdefault(span.name, []).append(span.duration * 1000)
+                if span.error:
+                    errors[span.name] = errors.get(span.name, 0) + 1
+        rows = []
+        for name, samples in durations.items():
+            samples.sort()
+            rows.append({"name": name, "count": len(samples), "total_ms": round(sum(samples), 3),
+                         "p50_ms": round(samples[min(len(samples) - 1, len(samples) // 2)], 3),
+                         "p95_ms": round(samples[min(len(samples) - 1, int(0.95 * len(samples)))], 3),
+                         "max_ms": round(samples[-1], 3), "errors": errors.get(name, 0)})
+        rows.sort(key=lambda row: -row["total_ms"])
+        return rows
+
+    def to_json(self) -> dict:
+        """
+        Returns the recorded traces and their summary as JSON-serializable data.
+
+        Returns:
+            dict: 'traces', a list of span lists, and 'summary', as returned by `summary`.
+        """
+        return {"traces": [[span.to_dict() for span in trace] for trace in self.traces()], "summary": self.summary()}
+
+    def to_chrome_trace(self) -> dict:
+        """
+        Returns the recorded spans in the Chrome trace event format.
+
+        Returns:
+            dict: The trace, with one complete ('X') event per span.
+        """
+        pid = os.getpid()
+        events = []
+        threads: dict[int, str] = {}
+        for trace in self.traces():
+            for span in trace:
+                threads[span.thread_id] = span.thread
+                event = {"name": span.name, "cat": span.name.split('.')[0], "ph": "X", "pid": pid, "tid": span.thread_id,
+                         "ts": round((span.start - self._epoch) * 1e6, 3), "dur": round(span.duration * 1e6, 3),
+                         "args": {k: str(v) for k, v in span.args.items()}}
+                if span.error:
+                    event["args"]["error"] = span.error
+                events.append(event)
+        for thread_id, thread_name in threads.items():
+            events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": thread_id, "args": {"name": thread_name}})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export(self, path: str, chrome: bool = True) -> str:
+        """
+        Writes the recorded traces to a file.
+
+        Args:
+            path (str): The file to write.
+            chrome (bool): Whether to write the Chrome trace event format instead of `to_json`. Defaults to True.
+
+        Returns:
+            str: The path written.
+        """
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(self.to_chrome_trace() if chrome else self.to_json(), file, indent=1)
+        return path
+
+_shared_tracer: Tracer | None = None
+
+def get_tracer() -> Tracer:
+    """
+    Returns the process-wide tracer, enabled when the FOCALAI_TRACE environment variable is set.
+
+    Returns:
+        Tracer: The shared tracer.
+    """
+    global _shared_tracer
+    if _shared_tracer is None:
+        _shared_tracer = Tracer(enabled=os.environ.get(TRACE_ENV, "").strip().lower() not in ("", "0", "false", "no"))
+    return _shared_tracer
+
+def span(name: str, **args) -> Any:
+    """
+    Times the code in a with block with the shared tracer.
+
+    Args:
+        name (str): What is timed.
+        **args: Details recorded with the span.
+
+    Returns:
+        A context manager, which does nothing while tracing is off.
+    """
+    return get_tracer().span(name, **args)
+
+def traced(name: str | None = None) -> Callable[[Callable], Callable]:
+    """
+    Decorates a function so each call is timed with the shared tracer.
+
+    Args:
+        name (str | None): The span name. Defaults to the function's qualified name.
+
+    Returns:
+        Callable[[Callable], Callable]: The decorator.
+    """
+    def decorator(function: Callable) -> Callable:
+        span_name = name or function.__qualname__
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            tracer = get_tracer()
+            if not tracer.enabled:
+                return function(*args, **kwargs)
+            with _ActiveSpan(tracer, span_name, {}):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,21 @@
+"""
+Puts the application and the benchmark stand-ins on the path, and points FOCALAI_HOME at a temporary directory so the
+tests never write into the source tree.
+"""
+import os
+import sys
+import shutil
+import tempfile
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (os.path.join(ROOT_DIR, "benchmarks"), os.path.join(ROOT_DIR, "src", "frontend_build"),
+             os.path.join(ROOT_DIR, "src")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+_home = tempfile.mkdtemp(prefix="focalai-test-")
+os.environ["FOCALAI_HOME"] = _home
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_home, ignore_errors=True)
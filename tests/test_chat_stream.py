@@ -0,0 +1,62 @@
+import time
+import threading
+import pytest
+
+from stand_ins import StandInConfig, StandInServer
+from GPT_caller import GPTCaller, CHAT_ENDPOINT_ENV
+
+INTERVAL = 0.1 # Seconds between the pieces the stand-in streams
+
+class _Keys:
+    """The part of APIManager GPTCaller uses, returning a fixed key."""
+    def get_and_save_key(self, key_type: str) -> str:
+        return "test-key"
+
+@pytest.fixture
+def server(monkeypatch):
+    server = StandInServer(StandInConfig(chat_chunks=20, chat_interval=INTERVAL)).start()
+    monkeypatch.setenv(CHAT_ENDPOINT_ENV, server.environment()[CHAT_ENDPOINT_ENV])
+    yield server
+    server.stop()
+
+def stream(on_delta, is_cancelled=None) -> tuple[str, bool]:
+    caller = GPTCaller("https://github.com/owner/model", _Keys(), readme="")
+    return caller._request_chat_response("test-key", "", "question", on_delta=on_delta, is_cancelled=is_cancelled)
+
+def test_deltas_arrive_before_the_stream_ends(server):
+    started = time.perf_counter()
+    arrivals = []
+    text, completed = stream(lambda delta: arrivals.append(time.perf_counter() - started))
+    assert completed
+    assert len(arrivals) == 20
+    assert text.startswith("piece 0000 ")
+    assert arrivals[0] < 1.5 * INTERVAL # Each piece is passed on as it arrives, not once a buffer fills
+    assert arrivals[-1] - arrivals[0] > 0.5 * INTERVAL * 19
+
+def test_cancelling_closes_the_connection(server):
+    deltas = []
+    cancelled = threading.Event()
+
+    def on_delta(delta: str) -> None:
+        deltas.append(delta)
+        if len(deltas) == 2:
+            cancelled.set()
+    started = time.perf_counter()
+    text, completed = stream(on_delta, cancelled.is_set)
+    assert not completed
+    assert text == "".join(deltas)
+    assert len(deltas) < 20
+    assert time.perf_counter() - started < INTERVAL * 10
+
+    deadline = time.monotonic() + 2
+    while server.cancelled_streams == 0 and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert server.cancelled_streams == 1 # The server stopped writing because the client hung up
+
+def test_non_ascii_deltas_are_decoded_as_utf8(server):
+    server.config.chat_word = "pièce→模型"
+    deltas = []
+    text, completed = stream(deltas.append)
+    assert completed
+    assert deltas[0].startswith("pièce→模型 0000")
+    assert "Ã" not in text
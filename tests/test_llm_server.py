@@ -0,0 +1,73 @@
+import os
+import shutil
+import tempfile
+import threading
+import pytest
+
+from llm_client import LLMClient
+
+PROMPT = " ".join(f"word{i}" for i in range(40))
+
+@pytest.fixture
+def socket_dir():
+    path = tempfile.mkdtemp(prefix="llm-", dir="/tmp") # Short, Unix socket paths are limited to about 104 bytes
+    yield path
+    shutil.rmtree(path, ignore_errors=True)
+
+@pytest.fixture
+def client(socket_dir, monkeypatch):
+    monkeypatch.setenv("FOCALAI_ECHO_DELAY", "0.01") # Slow enough for a generation to be cancelled halfway
+    client = LLMClient(backend="echo", socket_path=os.path.join(socket_dir, "echo.sock"), start_timeout=30)
+    yield client
+    client.shutdown()
+    if client._process is not None:
+        client._process.wait(timeout=10)
+
+def test_starts_the_echo_server_and_streams(client):
+    pieces = []
+    reply = client.generate("hello there", on_token=pieces.append)
+    assert reply == "[turn 1] hello there"
+    assert "".join(pieces) == reply
+    assert len(pieces) == 4
+    assert client.is_running()
+
+def test_session_turns_are_numbered_across_calls(client):
+    assert client.generate("one").startswith("[turn 1]")
+    assert client.generate("two").startswith("[turn 2]")
+    other = LLMClient(backend="echo", socket_path=client.socket_path, session="other")
+    assert other.generate("three").startswith("[turn 1]")
+
+def test_reset_starts_a_new_conversation(client):
+    client.generate("one")
+    client.reset()
+    assert client.generate("two").startswith("[turn 1]")
+
+def test_cancelling_drops_the_session(client):
+    client.generate("one")
+    cancelled = threading.Event()
+
+    def on_token(piece: str) -> None:
+        cancelled.set()
+    partial = client.generate(PROMPT, on_token=on_token, is_cancelled=cancelled.is_set)
+    assert partial.startswith("[turn")
+    assert len(partial.split()) < len(PROMPT.split())
+    # The same session is served in order, so this runs once the cancelled turn has been dropped
+    assert client.generate("again").startswith("[turn 1]")
+
+def test_stats_count_the_requests(client):
+    client.generate("one")
+    stats = client.stats()
+    assert stats is not None
+    assert stats["queue_depth"] == 0
+    assert stats["completed"] == 1
+
+def test_exits_after_the_idle_timeout(socket_dir):
+    client = LLMClient(backend="echo", socket_path=os.path.join(socket_dir, "idle.sock"), idle_timeout=0.5,
+                       start_timeout=30)
+    try:
+        assert client.generate("hello") == "[turn 1] hello"
+        assert client._process.wait(timeout=10) == 0
+        assert not os.path.exists(client.socket_path)
+        assert not client.is_running()
+    finally:
+        client.shutdown()
@@ -0,0 +1,43 @@
+from readme_renderer import split_sections, render_markdown
+
+README = """# Intro
+
+See [the docs][docs].
+
+# Usage
+
+A claim.[^1]
+
+# Notes
+
+Another.[^2]
+
+```
+[^3] inside code is not a footnote
+```
+
+[^1]: First note.
+[^2]: Second note.
+[docs]: https://example.com
+"""
+
+def render_sections(text: str) -> str:
+    sections, references = split_sections(text)
+    return "".join(render_markdown(section + "\n" + references if references else section) for section in sections)
+
+def test_footnotes_are_rendered_once():
+    html = render_sections(README)
+    assert html.count('class="footnote"') == 1
+    assert html.count('id="fn:1"') == 1
+    assert html.count('id="fn:2"') == 1
+
+def test_link_definitions_reach_every_section():
+    sections, references = split_sections(README)
+    assert references == "[docs]: https://example.com\n"
+    assert sections[0].startswith("# Intro")
+    assert 'href="https://example.com"' in render_sections(README)
+
+def test_sections_before_the_first_footnote_stay_separate():
+    sections, _ = split_sections(README)
+    assert len(sections) == 2
+    assert sections[1].startswith("# Usage")
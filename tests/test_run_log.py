@@ -0,0 +1,16 @@
+import time
+from run_log import RunLogWriter
+
+INTERVAL = 0.1
+
+def test_quiet_output_is_flushed_by_the_timer(tmp_path):
+    with RunLogWriter("call", "quiet", log_dir=str(tmp_path), flush_interval=INTERVAL) as writer:
+        writer.write("only line\n")
+        assert open(writer.path, encoding='utf-8').read() == ""
+        time.sleep(5 * INTERVAL)
+        assert open(writer.path, encoding='utf-8').read() == "only line\n"
+
+def test_large_output_is_flushed_at_once(tmp_path):
+    with RunLogWriter("call", "loud", log_dir=str(tmp_path), flush_interval=60, flush_bytes=16) as writer:
+        writer.write("x" * 20 + "\n")
+        assert open(writer.path, encoding='utf-8').read() == "x" * 20 + "\n"